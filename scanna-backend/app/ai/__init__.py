@@ -6,6 +6,7 @@ Detección de anemia mediante análisis de imágenes oculares
 from .ai_model import (
     AnemiaDetectionModel,
     get_model,
+    inferencia_lock,
     analyze_image,
     ImageQualityError
 )
@@ -19,6 +20,7 @@ from .ai_explainer import (
 __all__ = [
     "AnemiaDetectionModel",
     "get_model",
+    "inferencia_lock",
     "analyze_image",
     "ImageQualityError", 
     "GeminiExplainer",
@@ -4,6 +4,7 @@ Utiliza Vision Transformer (ViT) para análisis de imágenes oculares
 ✅ INCLUYE FILTRO DE VALIDACIÓN OOD (Out of Distribution)
 """
 
+import asyncio
 import os
 import io
 import torch
@@ -13,7 +14,7 @@ import matplotlib.pyplot as plt
 from PIL import Image
 from torchvision import transforms
 from transformers import ViTForImageClassification, AutoImageProcessor  # ✅ NUEVO: AutoImageProcessor
-from typing import Tuple, Optional, Dict
+from typing import Tuple, Optional, Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,12 @@ MODEL_PATH = 'best_model_vit.pth'
 DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 VIT_NAME = "google/vit-base-patch16-224-in21k"
 
+# Mapa de atención guardado: solo la capa de color (el cliente la superpone
+# sobre la imagen original), con el lado mayor limitado. El mapa sale de un
+# grid 14x14 interpolado, así que más resolución no agrega información.
+HEATMAP_MAX_SIDE = 512
+HEATMAP_ALPHA = 0.6
+
 # ✅ NUEVO: Configuración del filtro OOD (igual que Scanna.py)
 MSP_THRESHOLD = 0.75  # Umbral de confianza (75%)
 ENERGY_T = 2  # Temperatura de energía
@@ -243,11 +250,15 @@ class AnemiaDetectionModel:
             
             # Generar heatmap si se solicita
             if generate_heatmap:
-                heatmap_img = self._generate_heatmap(
+                # "heatmap": original + overlay lado a lado (solo para Gemini)
+                # "mapa_atencion": capa RGBA reducida (la que se guarda)
+                heatmap_img, overlay = self._generate_heatmap(
                     attention_maps, 
                     image
                 )
                 result["heatmap"] = heatmap_img
+                if overlay is not None:
+                    result["mapa_atencion"] = overlay
             
             logger.info(f"✅ Predicción: {result['resultado']} ({result['confianza']}%)")
             
@@ -260,14 +271,89 @@ class AnemiaDetectionModel:
             logger.error(f"❌ Error en predicción: {e}")
             raise
     
+    def predict_batch(
+        self,
+        images: List[Image.Image],
+        validate_quality: bool = True
+    ) -> List[dict]:
+        """
+        Predicción por lotes: un forward del ViT para todo el lote
+        (más uno para la validación OOD), en lugar de uno o dos por imagen
+        
+        Args:
+            images: Imágenes PIL en formato RGB
+            validate_quality: Si True, aplica el filtro OOD a cada imagen
+        
+        Returns:
+            Lista en el mismo orden que `images`. Cada elemento tiene el mismo
+            formato que predict() (sin heatmap), o bien
+            {"rechazada": True, "validacion_calidad": {...}} si la imagen
+            no pasa el filtro de calidad
+        """
+        if not images:
+            return []
+        
+        resultados: List[dict] = [{} for _ in images]
+        validas = list(range(len(images)))
+        
+        # PASO 1: VALIDACIÓN OOD DEL LOTE
+        if validate_quality:
+            inputs = self.processor(images=images, return_tensors="pt")
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+            
+            max_probs = F.softmax(logits, dim=-1).max(dim=-1).values
+            energias = -(self.energy_t * torch.logsumexp(logits / self.energy_t, dim=-1))
+            
+            validas = []
+            for i in range(len(images)):
+                confianza_ood = float(max_probs[i].item())
+                calidad = {
+                    "confianza_ood": round(confianza_ood * 100, 2),
+                    "umbral": round(self.msp_threshold * 100, 2),
+                    "energia": round(float(energias[i].item()), 2)
+                }
+                resultados[i]["validacion_calidad"] = calidad
+                if confianza_ood >= self.msp_threshold:
+                    validas.append(i)
+                else:
+                    resultados[i]["rechazada"] = True
+        
+        # PASO 2: PREDICCIÓN DE LAS IMÁGENES VÁLIDAS
+        if validas:
+            image_tensor = torch.stack([TRANSFORM(images[i]) for i in validas]).to(self.device)
+            
+            with torch.no_grad():
+                probabilities = torch.softmax(self.model(image_tensor).logits, dim=1)
+            
+            for fila, i in enumerate(validas):
+                predicted_idx = int(torch.argmax(probabilities[fila]).item())
+                predicted_class = self.classes[predicted_idx]
+                resultados[i].update({
+                    "resultado": "Anemia" if predicted_class == "ANEMIA" else "No Anemia",
+                    "confianza": round(probabilities[fila][predicted_idx].item() * 100, 2),
+                    "probabilidades": {
+                        "anemia": round(probabilities[fila][0].item() * 100, 2),
+                        "no_anemia": round(probabilities[fila][1].item() * 100, 2)
+                    }
+                })
+        
+        logger.info(
+            f"✅ Lote analizado: {len(validas)}/{len(images)} imágenes válidas"
+        )
+        
+        return resultados
+    
     def _generate_heatmap(
         self, 
         attention_maps: tuple, 
         original_image: Image.Image,
         grid_index: int = 90,
         layer_index: int = 3,
-        alpha: float = 0.6
-    ) -> Image.Image:
+        alpha: float = HEATMAP_ALPHA
+    ) -> Tuple[Image.Image, Optional[Image.Image]]:
         """
         Generar mapa de calor de atención
         
@@ -279,7 +365,7 @@ class AnemiaDetectionModel:
             alpha: Transparencia del overlay
         
         Returns:
-            Imagen PIL con heatmap superpuesto
+            tuple: (imagen combinada original + heatmap, overlay RGBA reducido)
         """
         try:
             # Extraer mapa de atención
@@ -287,43 +373,43 @@ class AnemiaDetectionModel:
             
             # Reshape a grid 14x14
             grid_size = (14, 14)
-            mask = att_map[grid_index].reshape(grid_size[0], grid_size[1])
+            grid = att_map[grid_index].reshape(grid_size[0], grid_size[1])
             
-            # Redimensionar al tamaño de la imagen original
-            mask = np.array(
-                Image.fromarray(mask).resize(
-                    original_image.size, 
-                    resample=Image.BILINEAR
+            def colorear(size: Tuple[int, int]) -> Image.Image:
+                # Redimensionar, normalizar y aplicar colormap rainbow
+                mask = np.array(
+                    Image.fromarray(grid).resize(size, resample=Image.BILINEAR)
                 )
-            )
+                mask = mask / np.max(mask) if np.max(mask) > 0 else mask
+                return Image.fromarray(np.uint8(plt.cm.rainbow(mask) * 255))
             
-            # Normalizar
-            mask = mask / np.max(mask) if np.max(mask) > 0 else mask
-            
-            # Crear heatmap con colormap rainbow
-            heatmap = Image.fromarray(
-                np.uint8(plt.cm.rainbow(mask) * 255)
-            )
-            
-            # Combinar con imagen original
+            # Combinar con imagen original (para la explicación de Gemini)
             heatmap_overlay = Image.blend(
                 original_image.convert("RGBA"), 
-                heatmap, 
+                colorear(original_image.size), 
                 alpha=alpha
             )
-            
-            # Crear imagen combinada (original + heatmap lado a lado)
             combined = self._concat_images_horizontally(
                 original_image, 
                 heatmap_overlay
             )
             
-            return combined
+            # Overlay para guardar: mismo aspecto que el original, lado mayor
+            # limitado y alfa constante (superponerlo equivale a Image.blend)
+            escala = min(1.0, HEATMAP_MAX_SIDE / max(original_image.size))
+            size = (
+                max(1, round(original_image.width * escala)),
+                max(1, round(original_image.height * escala))
+            )
+            overlay = colorear(size)
+            overlay.putalpha(round(alpha * 255))
+            
+            return combined, overlay
             
         except Exception as e:
             logger.error(f"❌ Error generando heatmap: {e}")
             # Retornar imagen original si falla
-            return original_image
+            return original_image, None
     
     def _concat_images_horizontally(
         self, 
@@ -350,6 +436,10 @@ class AnemiaDetectionModel:
 # Instancia global del modelo (singleton)
 _model_instance: Optional[AnemiaDetectionModel] = None
 
+# Un forward a la vez (análisis por lotes e importaciones): el modelo ya
+# paraleliza internamente
+inferencia_lock = asyncio.Lock()
+
 
 def get_model() -> AnemiaDetectionModel:
     """
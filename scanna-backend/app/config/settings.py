@@ -6,15 +6,67 @@ class Settings(BaseSettings):
     mongodb_uri: str
     mongodb_db_name: str = "scanna"
     
+    # Pool de conexiones y timeouts de MongoDB (por proceso/worker)
+    mongodb_max_pool_size: int = 50
+    mongodb_min_pool_size: int = 0
+    mongodb_max_idle_time_ms: int = 60000
+    mongodb_wait_queue_timeout_ms: int = 5000  # Espera máxima por una conexión libre
+    mongodb_server_selection_timeout_ms: int = 5000
+    mongodb_connect_timeout_ms: int = 5000
+    mongodb_socket_timeout_ms: int = 30000
+    mongodb_compressors: str = "zstd,snappy,zlib"  # Se usan los disponibles (zstd: zstandard, snappy: python-snappy)
+    
+    # maxTimeMS por clase de consulta (0 = sin límite)
+    mongodb_max_time_ms_lectura: int = 2000  # Documento por id / expediente / login
+    mongodb_max_time_ms_listado: int = 5000  # Listados, búsqueda, actividad reciente
+    mongodb_max_time_ms_dashboard: int = 5000  # Rollups y agregaciones del dashboard
+    mongodb_max_time_ms_exportacion: int = 0  # Exportaciones (cursor largo)
+    
+    # Lecturas analíticas (dashboard, listados, tendencias, exportación):
+    # primary | primaryPreferred | secondary | secondaryPreferred | nearest
+    mongodb_read_preference_analitica: str = "secondaryPreferred"
+    mongodb_max_staleness_seconds: int = 90  # Retraso máximo aceptado de un secundario (mínimo 90)
+    
     # JWT
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Hashing de contraseñas (pool dedicado para bcrypt)
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32  # Tareas en cola + en ejecución
+    password_hash_queue_timeout: float = 5.0  # Segundos esperando slot antes de rechazar
+    
+    # Caché del dashboard
+    dashboard_cache_ttl: int = 30  # Segundos
+    dashboard_cache_max_entries: int = 1000
+    # Límites de los grupos de edad: [0, 11, 21] -> "0-10", "11+" (el último
+    # límite es exclusivo). Al cambiarlos, ejecutar scripts/reconstruir_estadisticas.py
+    dashboard_edad_limites: List[int] = [0, 11, 21, 31, 41, 51, 61, 200]
+    # Zona horaria de los días del dashboard ("hoy", tendencias). Al cambiarla,
+    # ejecutar scripts/reconstruir_estadisticas.py
+    zona_horaria: str = "America/Mexico_City"
+    # Estimador HyperLogLog de pacientes únicos entre todos los especialistas
+    pacientes_hll_enabled: bool = True
+    
     # File Storage
+    storage_backend: str = "local"  # "local" o "s3" (AWS S3, MinIO...)
     upload_folder: str = "./uploads"
     max_upload_size: int = 10485760  # 10MB
-    
+    storage_io_workers: int = 8  # Hilos para E/S de disco (backend local)
+
+    # Almacenamiento S3 (solo con storage_backend = "s3")
+    s3_bucket: str = ""
+    s3_prefix: str = ""
+    s3_region: str = "us-east-1"
+    s3_endpoint_url: str = ""  # Vacío = AWS; p. ej. http://localhost:9000 para MinIO
+    s3_public_endpoint_url: str = ""  # Endpoint usado en las URLs pre-firmadas (si difiere)
+    s3_access_key: str = ""
+    s3_secret_key: str = ""
+    s3_presign_expiration: int = 3600  # Segundos
+    s3_multipart_threshold: int = 8 * 1024 * 1024
+    s3_multipart_chunksize: int = 8 * 1024 * 1024
+
     # Google Gemini AI
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.5-flash"  # Mismo modelo que Streamlit
@@ -23,6 +75,14 @@ class Settings(BaseSettings):
     # AI Model
     ai_model_path: str = "best_model_vit.pth"
     ai_enabled: bool = True  # Habilitar/deshabilitar análisis con IA
+    ai_batch_size: int = 8  # Imágenes por forward en análisis por lotes
+    ai_batch_max_images: int = 50  # Máximo de imágenes por petición de lote
+    
+    # Importación masiva (campañas de tamizaje)
+    import_max_size: int = 1024 * 1024 * 1024  # 1GB (ZIP completo)
+    import_max_registros: int = 5000
+    import_chunk_size: int = 64  # Registros por insert_many
+    import_concurrencia: int = 8  # Escrituras de imágenes simultáneas
     
     # CORS
     allowed_origins: List[str] = ["http://localhost:3000", "http://localhost:5173"]
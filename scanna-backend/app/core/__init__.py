@@ -1,28 +1,28 @@
 from .auth import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    password_pool,
     create_access_token,
     get_current_especialista,
     get_current_active_especialista
 )
 
 from .utils import (
-    save_uploaded_image,
-    generate_numero_expediente,
     validate_image_file,
-    delete_file,
-    get_file_path
+    delete_file
 )
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
+    "password_pool",
     "create_access_token",
     "get_current_especialista",
     "get_current_active_especialista",
-    "save_uploaded_image",
-    "generate_numero_expediente",
     "validate_image_file",
-    "delete_file",
-    "get_file_path"
+    "delete_file"
 ]
\ No newline at end of file
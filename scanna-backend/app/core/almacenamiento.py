@@ -0,0 +1,368 @@
+"""
+Almacenamiento de archivos
+Backends intercambiables: disco local o almacenamiento de objetos compatible con S3
+"""
+
+import asyncio
+import io
+import mimetypes
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Optional
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# aioboto3 es opcional: solo se necesita con STORAGE_BACKEND=s3
+try:
+    import aioboto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    aioboto3 = None
+
+
+def tipo_contenido(ruta: str) -> str:
+    """Content-Type a partir de la extensión"""
+    return mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+
+
+# ============================================
+# INTERFAZ
+# ============================================
+
+class Almacenamiento(ABC):
+    """
+    Interfaz común de los backends
+
+    Todas las rutas son relativas a la raíz del almacenamiento
+    (p. ej. "blobs/ab/cd/<sha256>.jpg"), igual que las guardadas en
+    los registros.
+
+    Operaciones propias de un backend (p. ej. `estado` y `ruta_absoluta`
+    del disco local, usadas para sendfile) no forman parte de la interfaz:
+    quien las use debe comprobar el tipo del backend.
+    """
+
+    nombre = "base"
+
+    @abstractmethod
+    async def guardar(self, ruta: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def leer(self, ruta: str) -> bytes:
+        """Raises: FileNotFoundError si no existe"""
+
+    @abstractmethod
+    async def existe(self, ruta: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def eliminar(self, ruta: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def mover(self, origen: str, destino: str) -> None:
+        ...
+
+    async def url_firmada(self, ruta: str, cache_control: Optional[str] = None) -> Optional[str]:
+        """URL temporal de descarga directa, o None si la API sirve el archivo"""
+        return None
+
+    async def cerrar(self) -> None:
+        pass
+
+    def metricas(self) -> dict:
+        return {"backend": self.nombre}
+
+
+# ============================================
+# DISCO LOCAL
+# ============================================
+
+class AlmacenamientoLocal(Almacenamiento):
+    """
+    Archivos bajo `upload_folder` (un solo disco compartido por los workers)
+
+    Toda operación de disco se ejecuta en un pool de hilos propio: un disco
+    lento o un montaje NFS no bloquea el event loop ni agota el pool por
+    defecto que usan otras partes de la aplicación.
+    """
+
+    nombre = "local"
+
+    def __init__(self, base: str, max_workers: int = 8):
+        self.base = Path(base)
+        self.base.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _en_hilo(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="almacenamiento"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def ruta_absoluta(self, ruta: str) -> Path:
+        """
+        Ruta en disco de un archivo
+
+        Raises:
+            ValueError: Si la ruta sale de la carpeta base
+        """
+        base = self.base.resolve()
+        destino = (base / ruta).resolve()
+        if destino != base and base not in destino.parents:
+            raise ValueError(f"Ruta fuera del almacenamiento: {ruta}")
+        return destino
+
+    # Operaciones bloqueantes (se ejecutan en _en_hilo)
+
+    def _guardar(self, ruta: str, data: bytes) -> None:
+        destino = self.ruta_absoluta(ruta)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+
+        # Temporal único + fsync + rename atómico: nunca se sirve un archivo
+        # a medio escribir, ni siquiera con escrituras concurrentes del mismo blob
+        descriptor, temporal = tempfile.mkstemp(
+            dir=destino.parent, prefix=f".{destino.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as buffer:
+                buffer.write(data)
+                buffer.flush()
+                os.fsync(buffer.fileno())
+            os.replace(temporal, destino)
+        except BaseException:
+            Path(temporal).unlink(missing_ok=True)
+            raise
+
+    def _leer(self, ruta: str) -> bytes:
+        with open(self.ruta_absoluta(ruta), "rb") as archivo:
+            return archivo.read()
+
+    def _existe(self, ruta: str) -> bool:
+        return self.ruta_absoluta(ruta).is_file()
+
+    def _estado(self, ruta: str) -> os.stat_result:
+        return self.ruta_absoluta(ruta).stat()
+
+    def _eliminar(self, ruta: str) -> bool:
+        try:
+            self.ruta_absoluta(ruta).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _mover(self, origen: str, destino: str) -> None:
+        os.replace(self.ruta_absoluta(origen), self.ruta_absoluta(destino))
+
+    # Interfaz asíncrona
+
+    async def guardar(self, ruta: str, data: bytes) -> None:
+        await self._en_hilo(self._guardar, ruta, data)
+
+    async def leer(self, ruta: str) -> bytes:
+        return await self._en_hilo(self._leer, ruta)
+
+    async def existe(self, ruta: str) -> bool:
+        return await self._en_hilo(self._existe, ruta)
+
+    async def eliminar(self, ruta: str) -> bool:
+        return await self._en_hilo(self._eliminar, ruta)
+
+    async def estado(self, ruta: str) -> os.stat_result:
+        """stat() del archivo (Raises: FileNotFoundError)"""
+        return await self._en_hilo(self._estado, ruta)
+
+    async def mover(self, origen: str, destino: str) -> None:
+        await self._en_hilo(self._mover, origen, destino)
+
+    async def cerrar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def metricas(self) -> dict:
+        return {
+            "backend": self.nombre,
+            "ruta": str(self.base.absolute()),
+            "hilos_io": self.max_workers
+        }
+
+
+# ============================================
+# S3 / MINIO
+# ============================================
+
+class AlmacenamientoS3(Almacenamiento):
+    """
+    Bucket compatible con S3 (AWS S3, MinIO, etc.)
+
+    Las subidas usan multipart a partir de `s3_multipart_threshold` y las
+    imágenes se sirven con URLs pre-firmadas, así los bytes no pasan por
+    los workers de la API.
+    """
+
+    nombre = "s3"
+
+    def __init__(self):
+        if aioboto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere el paquete aioboto3")
+        if not settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere S3_BUCKET")
+
+        self.bucket = settings.s3_bucket
+        self.prefijo = settings.s3_prefix.strip("/")
+        self._session = aioboto3.Session(
+            aws_access_key_id=settings.s3_access_key or None,
+            aws_secret_access_key=settings.s3_secret_key or None,
+            region_name=settings.s3_region
+        )
+        self._transferencia = TransferConfig(
+            multipart_threshold=settings.s3_multipart_threshold,
+            multipart_chunksize=settings.s3_multipart_chunksize
+        )
+        self._pila: Optional[AsyncExitStack] = None
+        self._cliente = None
+        self._cliente_firmas = None
+        self._lock = asyncio.Lock()
+
+    def _clave(self, ruta: str) -> str:
+        return f"{self.prefijo}/{ruta}" if self.prefijo else ruta
+
+    async def _clientes(self):
+        """Clientes S3 de larga duración (se abren una vez por worker)"""
+        async with self._lock:
+            if self._cliente is None:
+                self._pila = AsyncExitStack()
+                self._cliente = await self._pila.enter_async_context(
+                    self._session.client("s3", endpoint_url=settings.s3_endpoint_url or None)
+                )
+                # Con MinIO detrás de docker el endpoint interno no es accesible
+                # desde el navegador: las URLs se firman con el endpoint público
+                if settings.s3_public_endpoint_url:
+                    self._cliente_firmas = await self._pila.enter_async_context(
+                        self._session.client("s3", endpoint_url=settings.s3_public_endpoint_url)
+                    )
+                else:
+                    self._cliente_firmas = self._cliente
+        return self._cliente, self._cliente_firmas
+
+    async def guardar(self, ruta: str, data: bytes) -> None:
+        s3, _ = await self._clientes()
+        await s3.upload_fileobj(
+            io.BytesIO(data),
+            self.bucket,
+            self._clave(ruta),
+            ExtraArgs={"ContentType": tipo_contenido(ruta)},
+            Config=self._transferencia
+        )
+
+    async def leer(self, ruta: str) -> bytes:
+        s3, _ = await self._clientes()
+        try:
+            respuesta = await s3.get_object(Bucket=self.bucket, Key=self._clave(ruta))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise FileNotFoundError(ruta)
+            raise
+        async with respuesta["Body"] as cuerpo:
+            return await cuerpo.read()
+
+    async def existe(self, ruta: str) -> bool:
+        s3, _ = await self._clientes()
+        try:
+            await s3.head_object(Bucket=self.bucket, Key=self._clave(ruta))
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404", "NotFound"):
+                return False
+            raise
+
+    async def eliminar(self, ruta: str) -> bool:
+        s3, _ = await self._clientes()
+        await s3.delete_object(Bucket=self.bucket, Key=self._clave(ruta))
+        return True
+
+    async def mover(self, origen: str, destino: str) -> None:
+        s3, _ = await self._clientes()
+        await s3.copy_object(
+            Bucket=self.bucket,
+            Key=self._clave(destino),
+            CopySource={"Bucket": self.bucket, "Key": self._clave(origen)}
+        )
+        await s3.delete_object(Bucket=self.bucket, Key=self._clave(origen))
+
+    async def url_firmada(self, ruta: str, cache_control: Optional[str] = None) -> Optional[str]:
+        _, firmas = await self._clientes()
+        params = {"Bucket": self.bucket, "Key": self._clave(ruta)}
+        if cache_control:
+            # El bucket responde con esta cabecera (p. ej. immutable para blobs)
+            params["ResponseCacheControl"] = cache_control
+        return await firmas.generate_presigned_url(
+            "get_object",
+            Params=params,
+            ExpiresIn=settings.s3_presign_expiration
+        )
+
+    async def cerrar(self) -> None:
+        if self._pila is not None:
+            await self._pila.aclose()
+            self._pila = None
+            self._cliente = None
+            self._cliente_firmas = None
+
+    def metricas(self) -> dict:
+        return {
+            "backend": self.nombre,
+            "bucket": self.bucket,
+            "endpoint": settings.s3_endpoint_url or "aws"
+        }
+
+
+# ============================================
+# INSTANCIA GLOBAL
+# ============================================
+
+_almacenamiento: Optional[Almacenamiento] = None
+
+
+def get_almacenamiento() -> Almacenamiento:
+    """
+    Obtener el backend configurado (singleton por proceso)
+
+    STORAGE_BACKEND=local (default) o s3
+    """
+    global _almacenamiento
+
+    if _almacenamiento is None:
+        backend = settings.storage_backend.lower()
+        if backend == "s3":
+            _almacenamiento = AlmacenamientoS3()
+        elif backend == "local":
+            _almacenamiento = AlmacenamientoLocal(
+                settings.upload_folder,
+                max_workers=settings.storage_io_workers
+            )
+        else:
+            raise RuntimeError(f"STORAGE_BACKEND desconocido: {settings.storage_backend}")
+        logger.info(f"📦 Almacenamiento: {_almacenamiento.nombre}")
+
+    return _almacenamiento
+
+
+async def cerrar_almacenamiento() -> None:
+    """Cerrar conexiones del backend (al apagar la aplicación)"""
+    if _almacenamiento is not None:
+        await _almacenamiento.cerrar()
@@ -7,12 +7,20 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.config import settings
 from app.db.models import TokenData
-from app.db.database import get_database
+from app.db.database import get_database, max_time_ms
+from app.core.hashing import PasswordHashingPool, PoolSaturadoError
 
 # Configuración de encriptación
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Pool dedicado para bcrypt (no bloquear el event loop)
+password_pool = PasswordHashingPool(
+    max_workers=settings.password_hash_workers,
+    max_pendientes=settings.password_hash_max_pending,
+    timeout_cola=settings.password_hash_queue_timeout
+)
+
 # ============================================
 # FUNCIONES DE HASHING
 # ============================================
@@ -26,6 +34,31 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _servicio_saturado() -> HTTPException:
+    """Convertir saturación del pool en 503 con Retry-After"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado procesando credenciales. Intente de nuevo en unos segundos",
+        headers={"Retry-After": str(max(int(settings.password_hash_queue_timeout), 1))}
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verificar contraseña en el pool de hashing (sin bloquear el event loop)"""
+    try:
+        return await password_pool.run(verify_password, plain_password, hashed_password)
+    except PoolSaturadoError:
+        raise _servicio_saturado()
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hashear contraseña en el pool de hashing (sin bloquear el event loop)"""
+    try:
+        return await password_pool.run(get_password_hash, password)
+    except PoolSaturadoError:
+        raise _servicio_saturado()
+
+
 # ============================================
 # FUNCIONES JWT
 # ============================================
@@ -79,7 +112,8 @@ async def get_current_especialista(
     
     db = get_database()
     especialista = await db.especialistas.find_one(
-        {"email": token_data.email, "activo": True}
+        {"email": token_data.email, "activo": True},
+        max_time_ms=max_time_ms("lectura")
     )
     
     if especialista is None:
@@ -97,6 +131,16 @@ async def get_current_especialista(
     return especialista
 
 
+def es_administrador(especialista: dict) -> bool:
+    """
+    Indica si el especialista tiene rol de administrador
+
+    El rol se asigna directamente en la base de datos (`rol: "admin"` en
+    su documento); los especialistas nuevos no lo tienen.
+    """
+    return especialista.get("rol") == "admin"
+
+
 async def get_current_active_especialista(
     current_especialista: dict = Depends(get_current_especialista)
 ):
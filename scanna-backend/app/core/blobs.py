@@ -0,0 +1,188 @@
+"""
+Almacenamiento de imágenes direccionado por contenido
+Blobs identificados por SHA-256, con conteo de referencias en MongoDB
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import logging
+
+from app.core.almacenamiento import get_almacenamiento
+from app.core.derivados import eliminar_derivados
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+#
+# blobs/ab/cd/abcdef...<ext>   (relativo a la raíz del almacenamiento)
+#
+# Colección `blobs`:
+# {
+#   "_id": "<sha256>",
+#   "ruta": "blobs/ab/cd/<sha256>.jpg",
+#   "extension": ".jpg",
+#   "tamano": int,
+#   "refs": int,                 # registros que apuntan al blob
+#   "huerfanoDesde": datetime,   # presente solo si refs <= 0
+#   "creado": datetime
+# }
+
+PREFIJO_BLOBS = "blobs"
+SUFIJO_LAPIDA = ".eliminando"
+
+
+def calcular_digest(data: bytes) -> str:
+    """SHA-256 (hex) del contenido"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def ruta_blob(digest: str, extension: str) -> str:
+    """
+    Ruta relativa (desde la raíz del almacenamiento) de un blob
+
+    Se usan dos niveles de subdirectorios (256 x 256) para que ningún
+    directorio acumule demasiados archivos.
+    """
+    return f"{PREFIJO_BLOBS}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}"
+
+
+# ============================================
+# REFERENCIAS
+# ============================================
+
+async def guardar_blob(db, data: bytes, extension: str) -> dict:
+    """
+    Guardar contenido como blob y sumar una referencia
+
+    Si el mismo contenido ya existe (re-captura de la misma imagen,
+    re-análisis con el mismo resultado) no se duplican bytes en disco: se
+    devuelve la ruta ya registrada, aunque la extensión pedida sea otra.
+
+    Args:
+        db: Base de datos
+        data: Contenido del archivo
+        extension: Extensión (con punto) usada para servir el archivo
+
+    Returns:
+        dict con digest y ruta relativa
+    """
+    digest = calcular_digest(data)
+    operacion = {
+        "$inc": {"refs": 1},
+        "$unset": {"huerfanoDesde": ""},
+        "$setOnInsert": {
+            "ruta": ruta_blob(digest, extension),
+            "extension": extension.lower(),
+            "tamano": len(data),
+            "creado": datetime.utcnow()
+        }
+    }
+
+    # Primero la referencia: así la recolección no puede borrar el archivo
+    # entre que comprobamos que existe y que el registro apunta a él
+    try:
+        blob = await db.blobs.find_one_and_update(
+            {"_id": digest}, operacion, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Dos altas simultáneas del mismo contenido: la otra creó el documento
+        blob = await db.blobs.find_one_and_update(
+            {"_id": digest}, operacion, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    ruta = blob["ruta"]
+
+    almacenamiento = get_almacenamiento()
+    try:
+        if not await almacenamiento.existe(ruta):
+            await almacenamiento.guardar(ruta, data)
+    except Exception:
+        # Sin archivo no hay referencia: devolver la que se acaba de sumar
+        await liberar_blob(db, digest)
+        raise
+    logger.info(f"💾 Blob guardado: {ruta}")
+
+    return {"digest": digest, "ruta": ruta}
+
+
+async def liberar_blob(db, digest: Optional[str]) -> None:
+    """
+    Restar una referencia a un blob
+
+    Cuando llega a 0 se marca como huérfano; el archivo se elimina después
+    con recolectar_blobs (tras un periodo de gracia).
+    """
+    if not digest:
+        return
+
+    blob = await db.blobs.find_one_and_update(
+        {"_id": digest},
+        {"$inc": {"refs": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if blob and blob["refs"] <= 0:
+        await db.blobs.update_one(
+            {"_id": digest, "refs": {"$lte": 0}},
+            {"$set": {"huerfanoDesde": datetime.utcnow()}}
+        )
+
+
+# ============================================
+# RECOLECCIÓN DE BASURA
+# ============================================
+
+async def recolectar_blobs(db, gracia: timedelta = timedelta(hours=1)) -> int:
+    """
+    Eliminar blobs sin referencias desde hace más de `gracia`
+
+    Para cada candidato el archivo se renombra a una lápida, se borra el
+    documento solo si sigue sin referencias y entonces se elimina la
+    lápida. Si otra petición volvió a referenciar el blob mientras tanto,
+    se restaura el archivo.
+
+    Returns:
+        int: Número de blobs eliminados
+    """
+    almacenamiento = get_almacenamiento()
+    limite = datetime.utcnow() - gracia
+    eliminados = 0
+
+    candidatos = db.blobs.find(
+        {"refs": {"$lte": 0}, "huerfanoDesde": {"$lte": limite}},
+        {"ruta": 1}
+    )
+
+    async for blob in candidatos:
+        ruta = blob["ruta"]
+        lapida = ruta + SUFIJO_LAPIDA
+
+        try:
+            if await almacenamiento.existe(ruta):
+                await almacenamiento.mover(ruta, lapida)
+
+            result = await db.blobs.delete_one({"_id": blob["_id"], "refs": {"$lte": 0}})
+
+            if result.deleted_count == 1:
+                if await almacenamiento.existe(lapida):
+                    await almacenamiento.eliminar(lapida)
+                await eliminar_derivados(ruta)
+                eliminados += 1
+                logger.info(f"🗑️ Blob eliminado: {ruta}")
+            elif await almacenamiento.existe(lapida):
+                # Re-referenciado durante la recolección: restaurar (o descartar
+                # la lápida si la nueva referencia ya volvió a escribir el archivo)
+                if await almacenamiento.existe(ruta):
+                    await almacenamiento.eliminar(lapida)
+                else:
+                    await almacenamiento.mover(lapida, ruta)
+
+        except Exception as e:
+            logger.error(f"❌ Error recolectando blob {blob['_id']}: {e}")
+
+    return eliminados
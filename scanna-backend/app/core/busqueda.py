@@ -0,0 +1,112 @@
+"""
+Búsqueda de pacientes
+Tokens normalizados (sin acentos, minúsculas) y edge n-grams indexados
+"""
+
+import re
+import unicodedata
+from typing import Optional
+from bson import ObjectId
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Longitud mínima/máxima de los prefijos (edge n-grams) indexados por token.
+# Desde 1: una inicial ("m") también es una búsqueda válida, y en búsquedas
+# de varias palabras ninguna se descarta (descartarla ampliaría resultados)
+NGRAM_MIN = 1
+NGRAM_MAX = 15
+
+# Campo del registro con los tokens de búsqueda
+CAMPO_TOKENS = "busquedaTokens"
+
+
+# ============================================
+# NORMALIZACIÓN
+# ============================================
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normalizar texto para búsqueda
+
+    - Elimina acentos y diacríticos ("José Núñez" -> "jose nunez")
+    - Convierte a minúsculas
+    - Reemplaza cualquier carácter no alfanumérico por espacio
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        str: Texto normalizado
+    """
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", sin_acentos.lower()).strip()
+
+
+def tokenizar(texto: str) -> list[str]:
+    """Separar texto normalizado en tokens"""
+    return normalizar_texto(texto).split()
+
+
+def generar_tokens_busqueda(nombre: str) -> list[str]:
+    """
+    Generar edge n-grams de cada token del nombre
+
+    "María López" -> ["l", "lo", "lop", "lope", "lopez", "m", "ma", "mar", "mari", "maria"]
+
+    Args:
+        nombre: Nombre del paciente
+
+    Returns:
+        list: Prefijos únicos a guardar en el registro
+    """
+    prefijos = set()
+    for token in tokenizar(nombre):
+        for longitud in range(NGRAM_MIN, min(len(token), NGRAM_MAX) + 1):
+            prefijos.add(token[:longitud])
+    return sorted(prefijos)
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def construir_filtro_busqueda(especialista_id: ObjectId, buscar: str) -> Optional[dict]:
+    """
+    Construir filtro indexado para el parámetro `buscar` de los listados
+
+    - Nombre: todos los tokens de la búsqueda deben ser prefijo de algún
+      token del nombre (índice especialistaId + busquedaTokens)
+    - Expediente: prefijo anclado y sensible a mayúsculas sobre
+      numeroExpediente (índice especialistaId + numeroExpediente)
+
+    Cada rama del $or incluye especialistaId para que el planificador use
+    un índice por rama en lugar de recorrer los registros del especialista.
+
+    Args:
+        especialista_id: ObjectId del especialista
+        buscar: Texto de búsqueda
+
+    Returns:
+        dict con el filtro, o None si la búsqueda está vacía
+    """
+    buscar = (buscar or "").strip()
+    if not buscar:
+        return None
+
+    ramas = [{
+        "especialistaId": especialista_id,
+        "numeroExpediente": {"$regex": "^" + re.escape(buscar.upper())}
+    }]
+
+    tokens = [token[:NGRAM_MAX] for token in tokenizar(buscar)]
+    if tokens:
+        ramas.append({
+            "especialistaId": especialista_id,
+            CAMPO_TOKENS: {"$all": sorted(set(tokens))}
+        })
+
+    return {"$or": ramas}
@@ -0,0 +1,180 @@
+"""
+Caché de respuestas del dashboard
+Caché por especialista con TTL corto, ETag e invalidación en escrituras
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from bson import ObjectId
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+import logging
+
+from app.config import settings
+from app.db.estadisticas import clave_dia
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardCache:
+    """
+    Caché en memoria (LRU + TTL) de respuestas del dashboard
+
+    Cada entrada se identifica por especialista, endpoint y parámetros, y
+    guarda la versión de datos del especialista con la que se calculó.
+    La versión vive en el documento del especialista (campo `versionDatos`)
+    y se incrementa en cada alta, re-análisis o baja de registro, así que
+    todos los workers ven el cambio aunque cada uno tenga su propia caché.
+    """
+
+    def __init__(self, ttl: int, max_entradas: int):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas: OrderedDict = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: tuple, etag: str) -> Optional[bytes]:
+        """Obtener cuerpo cacheado si la entrada sigue vigente para ese ETag"""
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            self.fallos += 1
+            return None
+
+        entrada_etag, cuerpo, expira = entrada
+        if entrada_etag != etag or expira < time.monotonic():
+            del self._entradas[clave]
+            self.fallos += 1
+            return None
+
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return cuerpo
+
+    def guardar(self, clave: tuple, etag: str, cuerpo: bytes) -> None:
+        """Guardar cuerpo con su ETag (expulsa la entrada más antigua si está llena)"""
+        self._entradas[clave] = (etag, cuerpo, time.monotonic() + self.ttl)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    def invalidar(self, especialista_id: str) -> None:
+        """Eliminar todas las entradas de un especialista"""
+        for clave in [c for c in self._entradas if c[0] == especialista_id]:
+            del self._entradas[clave]
+
+    def metricas(self) -> dict:
+        return {
+            "entradas": len(self._entradas),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "ttl_segundos": self.ttl
+        }
+
+
+dashboard_cache = DashboardCache(
+    ttl=settings.dashboard_cache_ttl,
+    max_entradas=settings.dashboard_cache_max_entries
+)
+
+
+# ============================================
+# ETAG Y RESPUESTAS
+# ============================================
+
+def calcular_etag(especialista: dict, endpoint: str, params: tuple) -> str:
+    """
+    Calcular ETag débil sin tocar la base de datos
+
+    Depende de la versión de datos del especialista y del día local
+    (settings.zona_horaria, el mismo de los rollups), ya que indicadores
+    como "hoy", "esta semana" o el último punto de las tendencias cambian
+    al cambiar de día.
+    """
+    semilla = "|".join([
+        str(especialista["_id"]),
+        str(especialista.get("versionDatos", 0)),
+        endpoint,
+        repr(params),
+        clave_dia(datetime.utcnow())
+    ])
+    return 'W/"' + hashlib.sha1(semilla.encode()).hexdigest() + '"'
+
+
+def _etag_coincide(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip() for valor in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+
+async def responder_con_cache(
+    request: Request,
+    especialista: dict,
+    endpoint: str,
+    params: tuple,
+    calcular: Callable[[], Awaitable]
+) -> Response:
+    """
+    Responder un endpoint del dashboard con ETag y caché por especialista
+
+    - If-None-Match igual al ETag actual: 304 sin ejecutar consultas
+    - Entrada vigente en caché: se devuelve sin ejecutar consultas
+    - En otro caso se ejecuta `calcular()` y se guarda el resultado
+
+    Args:
+        request: Request actual
+        especialista: Documento del especialista autenticado
+        endpoint: Nombre del endpoint (parte de la clave)
+        params: Parámetros de la consulta (parte de la clave)
+        calcular: Corrutina que produce el contenido de la respuesta
+
+    Returns:
+        Response JSON (200) o vacía (304)
+    """
+    etag = calcular_etag(especialista, endpoint, params)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_coincide(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    clave = (str(especialista["_id"]), endpoint, params)
+    cuerpo = dashboard_cache.obtener(clave, etag)
+
+    if cuerpo is None:
+        contenido = await calcular()
+        cuerpo = json.dumps(jsonable_encoder(contenido), ensure_ascii=False).encode("utf-8")
+        dashboard_cache.guardar(clave, etag, cuerpo)
+
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
+
+
+# ============================================
+# INVALIDACIÓN
+# ============================================
+
+async def invalidar_dashboard(db, especialista_id: ObjectId) -> None:
+    """
+    Invalidar respuestas cacheadas de un especialista tras una escritura
+
+    Incrementa `versionDatos` en su documento (invalida en todos los workers
+    y cambia el ETag), guarda `ultimaEscritura` (sus lecturas analíticas
+    vuelven al primario, ver get_database_analitica) y limpia la caché local.
+    """
+    dashboard_cache.invalidar(str(especialista_id))
+    try:
+        await db.especialistas.update_one(
+            {"_id": especialista_id},
+            {
+                "$inc": {"versionDatos": 1},
+                "$set": {"ultimaEscritura": datetime.utcnow()}
+            }
+        )
+    except Exception as e:
+        # Sin la nueva versión, las demás réplicas sirven datos viejos hasta el TTL
+        logger.warning(f"⚠️ Error invalidando caché del dashboard: {e}")
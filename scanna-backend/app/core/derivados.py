@@ -0,0 +1,136 @@
+"""
+Derivados de imágenes
+Versiones reducidas en WebP (miniatura, mediana, completa) generadas bajo demanda
+"""
+
+import asyncio
+import io
+from typing import Optional
+from PIL import Image
+import logging
+
+from app.core.almacenamiento import get_almacenamiento
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Lado mayor máximo de cada variante (None = tamaño original)
+VARIANTES = {
+    "miniatura": 256,
+    "mediano": 1024,
+    "completo": None
+}
+
+CALIDAD_WEBP = 80
+PREFIJO_DERIVADOS = "derivados"
+
+# Cabecera para contenido que nunca cambia en la misma URL
+CACHE_INMUTABLE = "private, max-age=31536000, immutable"
+
+# Generaciones en curso (evita codificar la misma variante varias veces
+# cuando llegan peticiones simultáneas)
+_en_curso: dict[str, asyncio.Future] = {}
+
+
+def ruta_derivado(ruta: str, variante: str) -> str:
+    """
+    Ruta del derivado de una imagen
+
+    "blobs/ab/cd/<sha256>.jpg" -> "derivados/miniatura/blobs/ab/cd/<sha256>.webp"
+    """
+    base = ruta.rsplit(".", 1)[0] if "." in ruta.rsplit("/", 1)[-1] else ruta
+    return f"{PREFIJO_DERIVADOS}/{variante}/{base}.webp"
+
+
+def es_inmutable(ruta: str) -> bool:
+    """
+    Indica si el contenido de la ruta nunca cambia
+
+    Los blobs se nombran por su SHA-256 (ver app/core/blobs.py), así que
+    ellos y sus derivados pueden cachearse indefinidamente. Las rutas
+    anteriores por número de expediente no tienen esa garantía.
+    """
+    return ruta.startswith("blobs/")
+
+
+# ============================================
+# GENERACIÓN
+# ============================================
+
+def _codificar(data: bytes, lado_max: Optional[int]) -> bytes:
+    """Redimensionar (sin ampliar) y codificar como WebP"""
+    with Image.open(io.BytesIO(data)) as imagen:
+        imagen.load()
+        tiene_alfa = imagen.mode in ("RGBA", "LA") or "transparency" in imagen.info
+        imagen = imagen.convert("RGBA" if tiene_alfa else "RGB")
+
+        if lado_max:
+            imagen.thumbnail((lado_max, lado_max), Image.Resampling.LANCZOS)
+
+        salida = io.BytesIO()
+        imagen.save(salida, format="WEBP", quality=CALIDAD_WEBP, method=4)
+        return salida.getvalue()
+
+
+def codificar_mapa_atencion(overlay: Image.Image) -> bytes:
+    """
+    Codificar el overlay RGBA del mapa de atención como WebP con alfa
+
+    Args:
+        overlay: Capa de color del modelo (ya reducida)
+
+    Returns:
+        bytes: Contenido listo para guardar como blob
+    """
+    salida = io.BytesIO()
+    overlay.save(salida, format="WEBP", quality=CALIDAD_WEBP, method=4)
+    return salida.getvalue()
+
+
+async def _generar(ruta: str, variante: str, destino: str) -> None:
+    almacenamiento = get_almacenamiento()
+    original = await almacenamiento.leer(ruta)
+    derivado = await asyncio.to_thread(_codificar, original, VARIANTES[variante])
+    await almacenamiento.guardar(destino, derivado)
+    logger.info(f"🖼️ Derivado generado: {destino} ({len(original) // 1024}KB -> {len(derivado) // 1024}KB)")
+
+
+async def obtener_derivado(ruta: str, variante: str) -> str:
+    """
+    Obtener (generando si hace falta) la ruta del derivado de una imagen
+
+    Args:
+        ruta: Ruta de la imagen original
+        variante: Clave de VARIANTES
+
+    Returns:
+        str: Ruta del derivado en el almacenamiento
+
+    Raises:
+        FileNotFoundError: Si la imagen original no existe
+    """
+    destino = ruta_derivado(ruta, variante)
+
+    if await get_almacenamiento().existe(destino):
+        return destino
+
+    tarea = _en_curso.get(destino)
+    if tarea is None:
+        tarea = asyncio.ensure_future(_generar(ruta, variante, destino))
+        _en_curso[destino] = tarea
+        tarea.add_done_callback(lambda _: _en_curso.pop(destino, None))
+
+    # shield: si el cliente cancela, la generación termina para los demás
+    await asyncio.shield(tarea)
+    return destino
+
+
+async def eliminar_derivados(ruta: str) -> None:
+    """Eliminar todas las variantes de una imagen (al recolectar su blob)"""
+    almacenamiento = get_almacenamiento()
+    for variante in VARIANTES:
+        await almacenamiento.eliminar(ruta_derivado(ruta, variante))
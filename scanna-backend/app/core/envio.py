@@ -0,0 +1,232 @@
+"""
+Envío de archivos
+Respuestas con ETag fuerte, 304 condicional, rangos de bytes y envío sin copia
+"""
+
+import os
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+import anyio
+from fastapi import Request, Response
+
+from app.core.derivados import PREFIJO_DERIVADOS, es_inmutable
+
+# Cabecera para archivos que pueden cambiar (rutas por número de expediente):
+# el navegador guarda la copia pero revalida con If-None-Match (304)
+CACHE_REVALIDAR = "private, no-cache"
+
+
+# ============================================
+# ETAG Y RANGOS
+# ============================================
+
+def etag_archivo(ruta: str, estado: os.stat_result) -> str:
+    """
+    ETag fuerte de un archivo
+
+    - Blob: su SHA-256 (el nombre del archivo)
+    - Derivado de un blob: SHA-256 + variante
+    - Otras rutas: fecha de modificación (ns) + tamaño
+    """
+    partes = ruta.split("/")
+    if es_inmutable(ruta):
+        return f'"{Path(ruta).stem}"'
+    if partes[0] == PREFIJO_DERIVADOS and len(partes) > 2 and es_inmutable("/".join(partes[2:])):
+        return f'"{Path(ruta).stem}-{partes[1]}"'
+    return f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"'
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 §13.1.2)"""
+    if not if_none_match:
+        return False
+    valor = etag.removeprefix("W/")
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or candidato.removeprefix("W/") == valor:
+            return True
+    return False
+
+
+class RangoInsatisfacible(Exception):
+    pass
+
+
+def parsear_rango(cabecera: str, tamano: int) -> Optional[tuple[int, int]]:
+    """
+    Interpretar una cabecera Range de un solo rango
+
+    Returns:
+        (inicio, fin) inclusivos, o None si la cabecera se ignora
+        (formato desconocido o varios rangos: se responde el archivo completo)
+
+    Raises:
+        RangoInsatisfacible: Si el rango queda fuera del archivo (416)
+    """
+    unidad, _, especificacion = cabecera.partition("=")
+    if unidad.strip().lower() != "bytes" or "," in especificacion:
+        return None
+
+    inicio_txt, guion, fin_txt = especificacion.strip().partition("-")
+    if not guion:
+        return None
+
+    try:
+        if not inicio_txt:
+            # Sufijo: últimos N bytes
+            sufijo = int(fin_txt)
+            if sufijo <= 0 or tamano == 0:
+                raise RangoInsatisfacible()
+            return max(0, tamano - sufijo), tamano - 1
+
+        inicio = int(inicio_txt)
+        fin = int(fin_txt) if fin_txt else tamano - 1
+    except ValueError:
+        return None
+
+    if inicio >= tamano:
+        raise RangoInsatisfacible()
+    if fin < inicio:
+        return None
+    return inicio, min(fin, tamano - 1)
+
+
+# ============================================
+# RESPUESTA
+# ============================================
+
+class ArchivoResponse(Response):
+    """
+    Envía un tramo de un archivo
+
+    Usa la extensión ASGI `http.response.zerocopy` (sendfile) o
+    `http.response.pathsend` si el servidor las ofrece; si no, lee por
+    bloques en un hilo.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        archivo: Path,
+        inicio: int,
+        cantidad: int,
+        tamano_total: int,
+        status_code: int,
+        headers: dict,
+        media_type: str
+    ):
+        headers = {**headers, "Content-Length": str(cantidad)}
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.archivo = archivo
+        self.inicio = inicio
+        self.cantidad = cantidad
+        self.tamano_total = tamano_total
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+
+        if scope.get("method") == "HEAD" or self.cantidad == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensiones = scope.get("extensions") or {}
+
+        if "http.response.zerocopy" in extensiones:
+            archivo = await anyio.to_thread.run_sync(open, self.archivo, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": archivo,
+                    "offset": self.inicio,
+                    "count": self.cantidad
+                })
+            finally:
+                await anyio.to_thread.run_sync(archivo.close)
+            return
+
+        if "http.response.pathsend" in extensiones and self.cantidad == self.tamano_total:
+            await send({"type": "http.response.pathsend", "path": str(self.archivo)})
+            return
+
+        async with await anyio.open_file(self.archivo, "rb") as archivo:
+            await archivo.seek(self.inicio)
+            restante = self.cantidad
+            while restante > 0:
+                bloque = await archivo.read(min(self.chunk_size, restante))
+                if not bloque:
+                    break
+                restante -= len(bloque)
+                await send({"type": "http.response.body", "body": bloque, "more_body": restante > 0})
+            if restante > 0:
+                # Archivo truncado mientras se enviaba: cerrar la respuesta
+                await send({"type": "http.response.body", "body": b""})
+
+
+def responder_archivo(
+    request: Request,
+    archivo: Path,
+    ruta: str,
+    estado: os.stat_result,
+    media_type: str,
+    cache_control: Optional[str] = None
+) -> Response:
+    """
+    Construir la respuesta para un archivo local
+
+    - If-None-Match igual al ETag: 304 sin cuerpo
+    - Range de un solo tramo: 206 (If-Range distinto del ETag: archivo completo)
+    - Rango fuera del archivo: 416
+
+    Args:
+        request: Request actual
+        archivo: Ruta absoluta en disco
+        ruta: Ruta relativa (para el ETag)
+        estado: Resultado de stat() del archivo
+        media_type: Content-Type
+        cache_control: Cabecera Cache-Control (CACHE_REVALIDAR si no se indica)
+    """
+    etag = etag_archivo(ruta, estado)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(estado.st_mtime, usegmt=True),
+        "Cache-Control": cache_control or CACHE_REVALIDAR,
+        "Accept-Ranges": "bytes"
+    }
+
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    tamano = estado.st_size
+    inicio, fin = 0, tamano - 1
+    status_code = 200
+
+    cabecera_rango = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if cabecera_rango and (if_range is None or if_range == etag):
+        try:
+            rango = parsear_rango(cabecera_rango, tamano)
+        except RangoInsatisfacible:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{tamano}"}
+            )
+        if rango:
+            inicio, fin = rango
+            status_code = 206
+            headers["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+
+    return ArchivoResponse(
+        archivo,
+        inicio=inicio,
+        cantidad=max(0, fin - inicio + 1),
+        tamano_total=tamano,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
@@ -0,0 +1,244 @@
+"""
+Exportación de registros
+CSV o Parquet generados por bloques desde un cursor de Mongo (memoria constante)
+"""
+
+import csv
+import io
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from bson import ObjectId
+
+from app.db.database import max_time_ms
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Opcional: solo para formato Parquet
+    pa = None
+    pq = None
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Documentos por lote del cursor (y filas por row group en Parquet)
+TAMANO_LOTE = 1000
+
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet")
+}
+
+PROYECCION_EXPORTACION = {
+    "_id": 1,
+    "numeroExpediente": 1,
+    "especialistaId": 1,
+    "paciente": 1,
+    "resultado": 1,
+    "analisis.confianza": 1,
+    "analisis.procesadoConIA": 1,
+    "fechaAnalisis": 1
+}
+
+# (columna, función que extrae el valor del documento)
+COLUMNAS = [
+    ("id", lambda r: str(r["_id"])),
+    ("numero_expediente", lambda r: r.get("numeroExpediente")),
+    ("especialista_id", lambda r: str(r["especialistaId"]) if r.get("especialistaId") else None),
+    ("paciente_nombre", lambda r: r.get("paciente", {}).get("nombre")),
+    ("paciente_edad", lambda r: r.get("paciente", {}).get("edad")),
+    ("paciente_sexo", lambda r: r.get("paciente", {}).get("sexo")),
+    ("resultado", lambda r: r.get("resultado")),
+    ("confianza", lambda r: r.get("analisis", {}).get("confianza")),
+    ("procesado_con_ia", lambda r: r.get("analisis", {}).get("procesadoConIA")),
+    ("fecha_analisis", lambda r: r.get("fechaAnalisis"))
+]
+
+
+# Caracteres con los que Excel/LibreOffice interpretan una celda como fórmula
+INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parquet_disponible() -> bool:
+    return pq is not None
+
+
+def neutralizar_celda(valor):
+    """
+    Evitar inyección de fórmulas en el CSV
+
+    Los nombres de pacientes los escribe el usuario: "=HYPERLINK(...)" se
+    exporta como "'=HYPERLINK(...)" para que la hoja de cálculo lo muestre
+    como texto.
+    """
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def construir_filtro_exportacion(
+    especialista_id: Optional[ObjectId] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    resultado: Optional[str] = None
+) -> dict:
+    """
+    Filtro de la exportación
+
+    Con especialista usa el índice (especialistaId, fechaAnalisis, _id);
+    sin especialista (administradores), el índice (fechaAnalisis, _id).
+
+    Args:
+        especialista_id: Dueño de los registros (None = todos)
+        desde: Fecha de análisis inicial (inclusive, UTC)
+        hasta: Fecha de análisis final (exclusiva, UTC)
+        resultado: "Anemia" o "No Anemia"
+    """
+    filtro = {}
+    if especialista_id is not None:
+        filtro["especialistaId"] = especialista_id
+
+    rango = {}
+    if desde:
+        rango["$gte"] = desde
+    if hasta:
+        rango["$lt"] = hasta
+    if rango:
+        filtro["fechaAnalisis"] = rango
+
+    if resultado:
+        filtro["resultado"] = resultado
+
+    return filtro
+
+
+async def _lotes(db, filtro: dict) -> AsyncIterator[list]:
+    """Documentos del cursor agrupados de TAMANO_LOTE en TAMANO_LOTE"""
+    cursor = db.registros.find(
+        filtro, PROYECCION_EXPORTACION, max_time_ms=max_time_ms("exportacion")
+    ).sort(
+        [("fechaAnalisis", 1), ("_id", 1)]
+    ).batch_size(TAMANO_LOTE)
+
+    lote = []
+    async for registro in cursor:
+        lote.append(registro)
+        if len(lote) >= TAMANO_LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# ============================================
+# FORMATOS
+# ============================================
+
+async def exportar_csv(db, filtro: dict) -> AsyncIterator[bytes]:
+    """
+    Generar el CSV por bloques (encabezado + un bloque por lote del cursor)
+
+    Las fechas se escriben en ISO 8601 (UTC). Se incluye BOM para que
+    Excel detecte UTF-8 (nombres con acentos), y los textos que empiezan
+    como una fórmula se neutralizan (ver neutralizar_celda).
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([nombre for nombre, _ in COLUMNAS])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    async for lote in _lotes(db, filtro):
+        buffer.seek(0)
+        buffer.truncate()
+        for registro in lote:
+            fila = []
+            for _, extraer in COLUMNAS:
+                valor = extraer(registro)
+                fila.append(valor.isoformat() if isinstance(valor, datetime) else neutralizar_celda(valor))
+            escritor.writerow(fila)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Sumidero(io.RawIOBase):
+    """Archivo de solo escritura que acumula bytes hasta que se vacían"""
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+        self._posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._partes.append(bytes(data))
+        self._posicion += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def vaciar(self) -> bytes:
+        data = b"".join(self._partes)
+        self._partes.clear()
+        return data
+
+
+def _esquema_parquet():
+    return pa.schema([
+        ("id", pa.string()),
+        ("numero_expediente", pa.string()),
+        ("especialista_id", pa.string()),
+        ("paciente_nombre", pa.string()),
+        ("paciente_edad", pa.int32()),
+        ("paciente_sexo", pa.string()),
+        ("resultado", pa.string()),
+        ("confianza", pa.float64()),
+        ("procesado_con_ia", pa.bool_()),
+        ("fecha_analisis", pa.timestamp("ms", tz="UTC"))
+    ])
+
+
+async def exportar_parquet(db, filtro: dict) -> AsyncIterator[bytes]:
+    """
+    Generar el Parquet por bloques: un row group por lote del cursor
+
+    Cada row group se envía en cuanto se escribe; el pie del archivo
+    (metadatos) se envía al final.
+
+    Raises:
+        RuntimeError: Si pyarrow no está instalado
+    """
+    if not parquet_disponible():
+        raise RuntimeError("Exportar a Parquet requiere pyarrow (pip install pyarrow)")
+
+    esquema = _esquema_parquet()
+    sumidero = _Sumidero()
+    escritor = pq.ParquetWriter(sumidero, esquema, compression="zstd")
+
+    try:
+        async for lote in _lotes(db, filtro):
+            columnas = {nombre: [extraer(r) for r in lote] for nombre, extraer in COLUMNAS}
+            # Mongo devuelve datetime sin zona (UTC)
+            columnas["fecha_analisis"] = [
+                fecha.replace(tzinfo=timezone.utc) if fecha else None
+                for fecha in columnas["fecha_analisis"]
+            ]
+            escritor.write_table(pa.Table.from_pydict(columnas, schema=esquema))
+            yield sumidero.vaciar()
+    finally:
+        escritor.close()
+
+    yield sumidero.vaciar()
+
+
+def exportar(db, filtro: dict, formato: str) -> AsyncIterator[bytes]:
+    """Generador de bytes del formato pedido ("csv" o "parquet")"""
+    if formato == "parquet":
+        return exportar_parquet(db, filtro)
+    return exportar_csv(db, filtro)
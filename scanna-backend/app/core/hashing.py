@@ -0,0 +1,142 @@
+"""
+Pool de hashing de contraseñas
+Ejecuta bcrypt en un executor dedicado y acotado, fuera del event loop
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PoolSaturadoError(Exception):
+    """Excepción lanzada cuando el pool de hashing no acepta más trabajo"""
+    def __init__(self, pendientes: int, max_pendientes: int):
+        self.pendientes = pendientes
+        self.max_pendientes = max_pendientes
+        super().__init__(
+            f"Pool de hashing saturado ({pendientes}/{max_pendientes} tareas pendientes)"
+        )
+
+
+class PasswordHashingPool:
+    """
+    Executor acotado para operaciones de bcrypt
+
+    bcrypt libera el GIL mientras calcula el hash, así que un
+    ThreadPoolExecutor pequeño basta para aislar ese trabajo del event loop.
+    El número de tareas pendientes (en cola + en ejecución) está limitado:
+    cuando se alcanza el límite, las nuevas tareas esperan como máximo
+    `timeout_cola` segundos antes de ser rechazadas con PoolSaturadoError.
+    """
+
+    def __init__(self, max_workers: int, max_pendientes: int, timeout_cola: float):
+        self.max_workers = max_workers
+        self.max_pendientes = max_pendientes
+        self.timeout_cola = timeout_cola
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self._pendientes = 0
+        self._en_ejecucion = 0
+        self._completadas = 0
+        self._rechazadas = 0
+        self._tiempo_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pendientes)
+        return self._slots
+
+    def _ejecutar(self, func: Callable[..., T], *args) -> T:
+        """Envolver la tarea para medir tiempo y trabajos en ejecución"""
+        with self._lock:
+            self._en_ejecucion += 1
+        inicio = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                self._en_ejecucion -= 1
+                self._completadas += 1
+                self._tiempo_total += duracion
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Ejecutar una función de hashing en el pool
+
+        Args:
+            func: Función bloqueante a ejecutar
+            *args: Argumentos de la función
+
+        Returns:
+            Resultado de la función
+
+        Raises:
+            PoolSaturadoError: Si no se obtuvo un slot dentro de `timeout_cola`
+        """
+        slots = self._get_slots()
+
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.timeout_cola)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._rechazadas += 1
+            logger.warning(
+                f"⚠️ Pool de hashing saturado: {self._pendientes}/{self.max_pendientes} pendientes"
+            )
+            raise PoolSaturadoError(self._pendientes, self.max_pendientes)
+
+        with self._lock:
+            self._pendientes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._ejecutar, func, *args)
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+            slots.release()
+
+    def metricas(self) -> dict:
+        """Obtener métricas del pool (profundidad de cola, ejecución, latencia)"""
+        with self._lock:
+            pendientes = self._pendientes
+            en_ejecucion = self._en_ejecucion
+            completadas = self._completadas
+            rechazadas = self._rechazadas
+            tiempo_total = self._tiempo_total
+
+        return {
+            "workers": self.max_workers,
+            "max_pendientes": self.max_pendientes,
+            "en_cola": max(pendientes - en_ejecucion, 0),
+            "en_ejecucion": en_ejecucion,
+            "completadas": completadas,
+            "rechazadas": rechazadas,
+            "tiempo_promedio_ms": round(tiempo_total / completadas * 1000, 2) if completadas else 0.0
+        }
+
+    def shutdown(self) -> None:
+        """Cerrar el executor (al apagar la aplicación)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info("🔌 Pool de hashing cerrado")
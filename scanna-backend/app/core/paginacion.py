@@ -0,0 +1,77 @@
+"""
+Paginación por cursor (keyset)
+Cursores opacos sobre (fechaAnalisis, _id) para listados ordenados por fecha
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+# Orden estable de los listados: más recientes primero, _id como desempate
+ORDEN_REGISTROS = [("fechaAnalisis", -1), ("_id", -1)]
+
+
+def codificar_cursor(documento: dict) -> str:
+    """
+    Generar cursor opaco a partir del último documento de una página
+
+    Args:
+        documento: Documento con fechaAnalisis y _id
+
+    Returns:
+        str: Cursor en base64 url-safe
+    """
+    datos = {
+        "f": documento["fechaAnalisis"].isoformat(),
+        "i": str(documento["_id"])
+    }
+    crudo = json.dumps(datos, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    """
+    Decodificar un cursor generado por codificar_cursor
+
+    Raises:
+        HTTPException: Si el cursor es inválido
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.fromisoformat(datos["f"]), ObjectId(datos["i"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def filtro_despues_de(cursor: Optional[str]) -> dict:
+    """
+    Filtro de Mongo para los documentos posteriores al cursor (en ORDEN_REGISTROS)
+
+    Con el índice (especialistaId, fechaAnalisis, _id) la consulta empieza
+    directamente en la posición del cursor: la página N cuesta lo mismo que
+    la página 1, a diferencia de skip().
+
+    Args:
+        cursor: Cursor opaco o None (primera página)
+
+    Returns:
+        dict: Filtro a combinar con el query del listado ({} si no hay cursor)
+    """
+    if not cursor:
+        return {}
+
+    fecha, ultimo_id = decodificar_cursor(cursor)
+    return {
+        "$or": [
+            {"fechaAnalisis": {"$lt": fecha}},
+            {"fechaAnalisis": fecha, "_id": {"$lt": ultimo_id}}
+        ]
+    }
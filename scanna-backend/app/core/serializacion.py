@@ -0,0 +1,40 @@
+"""
+Serialización rápida de respuestas
+Convierte documentos BSON directamente a JSON con orjson
+"""
+
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import Response
+import orjson
+
+
+def _default(obj: Any) -> Any:
+    """Tipos BSON que orjson no serializa de forma nativa"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def a_json(contenido: Any) -> bytes:
+    """
+    Serializar documentos de Mongo (dicts/listas con ObjectId y datetime) a JSON
+
+    datetime se serializa en ISO 8601 igual que pydantic, así que el JSON es
+    equivalente al que produce el response_model para los mismos campos.
+    """
+    return orjson.dumps(contenido, default=_default)
+
+
+class BSONJSONResponse(Response):
+    """
+    Respuesta JSON para documentos de Mongo sin pasar por pydantic
+
+    Al devolver una Response, FastAPI omite la validación del response_model
+    (que se mantiene en el decorador solo para la documentación OpenAPI).
+    Los documentos deben venir proyectados a los campos del modelo.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
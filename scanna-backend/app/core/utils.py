@@ -3,17 +3,15 @@ Utilidades del core
 Funciones helper para validación y gestión de archivos
 """
 
-import os
 import re
-import shutil
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
 from fastapi import UploadFile, HTTPException, status
 from PIL import Image
 import io
 import logging
 
+from app.core.almacenamiento import get_almacenamiento
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,10 +19,6 @@ logger = logging.getLogger(__name__)
 # CONFIGURACIÓN
 # ============================================
 
-UPLOAD_FOLDER = Path("uploads")
-ORIGINALES_FOLDER = UPLOAD_FOLDER / "originales"
-MAPAS_FOLDER = UPLOAD_FOLDER / "mapas_atencion"
-
 # Tipos de archivo permitidos
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
 ALLOWED_CONTENT_TYPES = {
@@ -42,21 +36,6 @@ MAX_IMAGE_WIDTH = 10000
 MAX_IMAGE_HEIGHT = 10000
 
 
-# ============================================
-# INICIALIZACIÓN
-# ============================================
-
-def init_folders():
-    """Crear carpetas necesarias si no existen"""
-    ORIGINALES_FOLDER.mkdir(parents=True, exist_ok=True)
-    MAPAS_FOLDER.mkdir(parents=True, exist_ok=True)
-    logger.info(f"✅ Carpetas de upload inicializadas")
-
-
-# Inicializar al importar
-init_folders()
-
-
 # ============================================
 # VALIDACIÓN DE IMÁGENES
 # ============================================
@@ -291,83 +270,9 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
-async def save_uploaded_image(
-    file: UploadFile,
-    numero_expediente: str,
-    tipo: str = "original"
-) -> str:
-    """
-    Guardar imagen subida en disco
-    
-    Args:
-        file: Archivo a guardar
-        numero_expediente: Número de expediente del registro
-        tipo: Tipo de imagen ("original" o "mapa_atencion")
-    
-    Returns:
-        str: Ruta relativa del archivo guardado
-    
-    Raises:
-        HTTPException: Si hay error al guardar
-    """
-    # Validar tipo
-    if tipo not in ["original", "mapa_atencion"]:
-        raise ValueError(f"Tipo inválido: {tipo}")
-    
-    # Determinar carpeta
-    folder = ORIGINALES_FOLDER if tipo == "original" else MAPAS_FOLDER
-    
-    # Generar nombre de archivo
-    extension = Path(file.filename).suffix.lower()
-    if tipo == "original":
-        filename = f"{numero_expediente}{extension}"
-    else:
-        filename = f"{numero_expediente}_mapa{extension}"
-    
-    # Sanitizar
-    filename = sanitize_filename(filename)
-    
-    # Construir ruta completa
-    file_path = folder / filename
-    
-    # Guardar archivo
-    try:
-        # Resetear puntero si es necesario
-        await file.seek(0)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        logger.info(f"💾 Archivo guardado: {file_path}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error guardando archivo: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error guardando archivo: {str(e)}"
-        )
-    
-    # Retornar ruta relativa
-    relative_path = file_path.relative_to(UPLOAD_FOLDER)
-    return str(relative_path)
-
-
-def get_file_path(relative_path: str) -> Path:
-    """
-    Obtener ruta completa de un archivo
-    
-    Args:
-        relative_path: Ruta relativa desde uploads/
-    
-    Returns:
-        Path: Ruta completa del archivo
-    """
-    return UPLOAD_FOLDER / relative_path
-
-
-def delete_file(relative_path: str) -> bool:
+async def delete_file(relative_path: str) -> bool:
     """
-    Eliminar un archivo
+    Eliminar un archivo del almacenamiento configurado
     
     Args:
         relative_path: Ruta relativa desde uploads/
@@ -376,79 +281,14 @@ def delete_file(relative_path: str) -> bool:
         bool: True si se eliminó correctamente
     """
     try:
-        file_path = get_file_path(relative_path)
-        
-        if file_path.exists():
-            file_path.unlink()
-            logger.info(f"🗑️ Archivo eliminado: {file_path}")
+        if await get_almacenamiento().eliminar(relative_path):
+            logger.info(f"🗑️ Archivo eliminado: {relative_path}")
             return True
         else:
-            logger.warning(f"⚠️ Archivo no existe: {file_path}")
+            logger.warning(f"⚠️ Archivo no existe: {relative_path}")
             return False
             
     except Exception as e:
         logger.error(f"❌ Error eliminando archivo: {e}")
         return False
 
-
-# ============================================
-# GENERACIÓN DE NÚMERO DE EXPEDIENTE
-# ============================================
-
-def generate_numero_expediente() -> str:
-    """
-    Generar número de expediente único
-    
-    Formato: YYYYMMDD-XXXX
-    Donde XXXX es un hash aleatorio de 4 caracteres
-    
-    Returns:
-        str: Número de expediente
-    """
-    import random
-    import string
-    
-    # Fecha actual
-    fecha = datetime.now().strftime("%Y%m%d")
-    
-    # 4 caracteres alfanuméricos aleatorios
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(chars, k=4))
-    
-    return f"{fecha}-{random_part}"
-
-
-# ============================================
-# INFORMACIÓN DE ARCHIVO
-# ============================================
-
-def get_file_info(relative_path: str) -> dict:
-    """
-    Obtener información de un archivo
-    
-    Args:
-        relative_path: Ruta relativa del archivo
-    
-    Returns:
-        dict con información del archivo
-    """
-    file_path = get_file_path(relative_path)
-    
-    if not file_path.exists():
-        return {
-            "exists": False,
-            "path": str(relative_path)
-        }
-    
-    stat = file_path.stat()
-    
-    return {
-        "exists": True,
-        "path": str(relative_path),
-        "full_path": str(file_path),
-        "size_bytes": stat.st_size,
-        "size_kb": stat.st_size / 1024,
-        "size_mb": stat.st_size / 1024 / 1024,
-        "created": datetime.fromtimestamp(stat.st_ctime),
-        "modified": datetime.fromtimestamp(stat.st_mtime)
-    }
\ No newline at end of file
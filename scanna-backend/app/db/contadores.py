@@ -0,0 +1,73 @@
+"""
+Contadores atómicos
+Secuencias por día para números de expediente (find_one_and_update + $inc)
+"""
+
+from datetime import datetime
+from typing import Optional
+from pymongo import ReturnDocument
+
+
+# Números generados que se prueban antes de rendirse: un número de la
+# secuencia solo choca con números antiguos (formato aleatorio anterior)
+EXPEDIENTE_REINTENTOS = 5
+
+
+async def siguiente_secuencia(db, nombre: str, cantidad: int = 1) -> int:
+    """
+    Obtener el siguiente valor de una secuencia (un solo round-trip)
+
+    Args:
+        db: Base de datos
+        nombre: Identificador de la secuencia
+        cantidad: Valores a reservar de una vez (importaciones masivas)
+
+    Returns:
+        int: Último valor asignado (empieza en 1); con cantidad > 1 se
+        reservan los valores [resultado - cantidad + 1, resultado]
+    """
+    contador = await db.contadores.find_one_and_update(
+        {"_id": nombre},
+        {"$inc": {"secuencia": cantidad}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return contador["secuencia"]
+
+
+async def asignar_numero_expediente(db, fecha: Optional[datetime] = None) -> str:
+    """
+    Asignar número de expediente sin colisiones
+
+    Formato: YYYYMMDD-NNNN, donde NNNN es la secuencia del día (se
+    ensancha a más dígitos si se superan 9999 registros en un día).
+
+    Args:
+        db: Base de datos
+        fecha: Día del expediente (por defecto, hoy)
+
+    Returns:
+        str: Número de expediente
+    """
+    dia = (fecha or datetime.now()).strftime("%Y%m%d")
+    secuencia = await siguiente_secuencia(db, f"expediente-{dia}")
+    return f"{dia}-{secuencia:04d}"
+
+
+async def asignar_numeros_expediente(db, cantidad: int, fecha: Optional[datetime] = None) -> list[str]:
+    """
+    Reservar varios números de expediente consecutivos con un solo $inc
+
+    Args:
+        db: Base de datos
+        cantidad: Números a asignar
+        fecha: Día de los expedientes (por defecto, hoy)
+
+    Returns:
+        list[str]: Números de expediente en orden
+    """
+    if cantidad <= 0:
+        return []
+    dia = (fecha or datetime.now()).strftime("%Y%m%d")
+    ultima = await siguiente_secuencia(db, f"expediente-{dia}", cantidad)
+    return [f"{dia}-{secuencia:04d}" for secuencia in range(ultima - cantidad + 1, ultima + 1)]
@@ -1,5 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import Nearest, PrimaryPreferred, Secondary, SecondaryPreferred
+from datetime import datetime, timedelta
+from typing import Optional
 from app.config import settings
+import importlib.util
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,23 +13,308 @@ logger = logging.getLogger(__name__)
 class MongoDB:
     client: AsyncIOMotorClient = None
     db = None
+    db_analitica = None  # Mismo db con la preferencia de lectura analítica
 
 mongodb = MongoDB()
 
+
+# ============================================
+# POOL Y TIEMPOS
+# ============================================
+
+# Módulo que necesita cada compresor del protocolo (zlib viene con Python)
+MODULOS_COMPRESORES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+
+def compresores_disponibles() -> list[str]:
+    """Compresores configurados cuyo módulo está instalado (en orden de preferencia)"""
+    disponibles = []
+    for nombre in settings.mongodb_compressors.split(","):
+        nombre = nombre.strip()
+        if nombre not in MODULOS_COMPRESORES:
+            continue
+        modulo = MODULOS_COMPRESORES[nombre]
+        if modulo is None or importlib.util.find_spec(modulo) is not None:
+            disponibles.append(nombre)
+    return disponibles
+
+
+def max_time_ms(clase: str) -> int:
+    """
+    maxTimeMS de una clase de consulta ("lectura", "listado", "dashboard", "exportacion")
+
+    Mongo aborta la consulta al superar el límite (ExecutionTimeout -> 503);
+    0 desactiva el límite.
+    """
+    return getattr(settings, f"mongodb_max_time_ms_{clase}")
+
+
+class MonitorPool(monitoring.ConnectionPoolListener):
+    """Contadores del pool de conexiones (eventos de PyMongo)"""
+
+    def __init__(self):
+        self.abiertas = 0
+        self.en_uso = 0
+        self.esperas_fallidas = 0
+        self.limpiezas = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.limpiezas += 1
+
+    def connection_ready(self, event):
+        self.abiertas += 1
+
+    def connection_closed(self, event):
+        self.abiertas -= 1
+
+    def connection_check_out_failed(self, event):
+        self.esperas_fallidas += 1
+
+    def connection_checked_out(self, event):
+        self.en_uso += 1
+
+    def connection_checked_in(self, event):
+        self.en_uso -= 1
+
+
+monitor_pool = MonitorPool()
+
+
+# ============================================
+# ENRUTAMIENTO DE LECTURAS
+# ============================================
+
+PREFERENCIAS_LECTURA = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+# PyMongo estima el retraso de cada secundario con sus heartbeats (10s)
+HEARTBEAT_SEGUNDOS = 10
+
+
+def preferencia_analitica():
+    """Preferencia de lectura para consultas analíticas (None = primario)"""
+    clase = PREFERENCIAS_LECTURA.get(settings.mongodb_read_preference_analitica)
+    if clase is None:
+        return None
+    return clase(max_staleness=max(settings.mongodb_max_staleness_seconds, 90))
+
+
+def ventana_lecturas_propias() -> timedelta:
+    """
+    Tiempo tras una escritura en que las lecturas del especialista van al primario
+
+    Pasado ese tiempo, cualquier secundario elegible (retraso <= max staleness)
+    ya tiene la escritura.
+    """
+    return timedelta(seconds=max(settings.mongodb_max_staleness_seconds, 90) + HEARTBEAT_SEGUNDOS)
+
+
+def get_database_analitica(especialista: Optional[dict] = None):
+    """
+    Base de datos para lecturas analíticas y listados (dashboard, historial,
+    tendencias, exportación), que toleran unos segundos de retraso
+
+    Usa secundarios con retraso acotado para no competir con las escrituras
+    en el primario. Si el especialista escribió hace poco (`ultimaEscritura`,
+    ver invalidar_dashboard) devuelve el primario: siempre ve sus propios
+    registros recién creados.
+
+    Args:
+        especialista: Documento del especialista autenticado (leído del primario)
+    """
+    if mongodb.db_analitica is None:
+        return mongodb.db
+
+    ultima_escritura = (especialista or {}).get("ultimaEscritura")
+    if ultima_escritura and datetime.utcnow() - ultima_escritura < ventana_lecturas_propias():
+        return mongodb.db
+
+    return mongodb.db_analitica
+
+
+def opciones_cliente() -> dict:
+    """Opciones de AsyncIOMotorClient desde Settings"""
+    opciones = {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongodb_wait_queue_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongodb_socket_timeout_ms,
+        "event_listeners": [monitor_pool]
+    }
+    compresores = compresores_disponibles()
+    if compresores:
+        opciones["compressors"] = ",".join(compresores)
+    return opciones
+
+
+def metricas_mongodb() -> dict:
+    """Configuración efectiva y estado del pool (para /health)"""
+    return {
+        "pool": {
+            "max": settings.mongodb_max_pool_size,
+            "min": settings.mongodb_min_pool_size,
+            "abiertas": monitor_pool.abiertas,
+            "en_uso": monitor_pool.en_uso,
+            "esperas_fallidas": monitor_pool.esperas_fallidas,
+            "limpiezas": monitor_pool.limpiezas
+        },
+        "timeouts_ms": {
+            "espera_conexion": settings.mongodb_wait_queue_timeout_ms,
+            "seleccion_servidor": settings.mongodb_server_selection_timeout_ms,
+            "conexion": settings.mongodb_connect_timeout_ms,
+            "socket": settings.mongodb_socket_timeout_ms
+        },
+        "max_time_ms": {
+            clase: max_time_ms(clase)
+            for clase in ("lectura", "listado", "dashboard", "exportacion")
+        },
+        "compresores": compresores_disponibles(),
+        "lecturas_analiticas": {
+            "preferencia": settings.mongodb_read_preference_analitica if preferencia_analitica() else "primary",
+            "max_staleness_s": max(settings.mongodb_max_staleness_seconds, 90),
+            "ventana_lecturas_propias_s": int(ventana_lecturas_propias().total_seconds())
+        }
+    }
+
+
 async def connect_to_mongo():
     """Conectar a MongoDB Atlas"""
     try:
-        mongodb.client = AsyncIOMotorClient(settings.mongodb_uri)
+        mongodb.client = AsyncIOMotorClient(settings.mongodb_uri, **opciones_cliente())
         mongodb.db = mongodb.client[settings.mongodb_db_name]
         
+        preferencia = preferencia_analitica()
+        if preferencia is not None:
+            mongodb.db_analitica = mongodb.client.get_database(
+                settings.mongodb_db_name,
+                read_preference=preferencia
+            )
+        
         # Verificar conexión
         await mongodb.client.admin.command('ping')
-        logger.info("✅ Conectado exitosamente a MongoDB Atlas")
+        logger.info(f"✅ Conectado exitosamente a MongoDB Atlas (compresión: {compresores_disponibles() or 'ninguna'})")
+        
+        # Sin este índice se aceptarían expedientes duplicados: no arrancar
+        await crear_indice_expediente()
+        
+        try:
+            await crear_indices()
+        except Exception as e:
+            # Sin índices la API funciona, pero más lenta y sin garantías de unicidad
+            logger.warning(f"⚠️ No se pudieron crear los índices: {e}")
         
     except Exception as e:
         logger.error(f"❌ Error conectando a MongoDB: {e}")
         raise
 
+async def crear_indice_expediente():
+    """
+    Crear el índice único de números de expediente (idempotente)
+    
+    La API no busca duplicados antes de insertar: la unicidad depende de
+    este índice, por lo que un error aquí detiene el arranque.
+    
+    Raises:
+        RuntimeError: Si hay expedientes repetidos en la colección
+    """
+    try:
+        await mongodb.db.registros.create_index(
+            "numeroExpediente",
+            unique=True,
+            name="numero_expediente_unico"
+        )
+    except OperationFailure as e:
+        if e.code == 11000:
+            raise RuntimeError(
+                "Hay números de expediente repetidos en registros; no se puede crear el "
+                "índice único. Ejecute: python scripts/deduplicar_expedientes.py --aplicar"
+            ) from e
+        raise
+
+
+async def crear_indices():
+    """Crear índices secundarios (idempotente; sin ellos la API solo es más lenta)"""
+    db = mongodb.db
+    
+    # Listados por fecha y paginación por cursor (mismo índice que scripts/init_db.py)
+    await db.registros.create_index(
+        [("especialistaId", 1), ("fechaAnalisis", -1), ("_id", -1)],
+        name="especialista_fecha_id"
+    )
+    
+    # Exportación de todos los registros por rango de fechas (administradores)
+    await db.registros.create_index(
+        [("fechaAnalisis", -1), ("_id", -1)],
+        name="fecha_id"
+    )
+    
+    # Búsqueda de pacientes: tokens normalizados y prefijo de expediente
+    await db.registros.create_index(
+        [("especialistaId", 1), ("busquedaTokens", 1), ("fechaAnalisis", -1)],
+        name="especialista_busqueda"
+    )
+    await db.registros.create_index(
+        [("especialistaId", 1), ("numeroExpediente", 1)],
+        name="especialista_expediente"
+    )
+    
+    # Rollups diarios: una fila por especialista y día (upsert con $inc)
+    await db.estadisticas_diarias.create_index(
+        [("especialistaId", 1), ("fecha", 1)],
+        unique=True,
+        name="especialista_fecha"
+    )
+    
+    # Pacientes: una entidad por especialista y nombre normalizado
+    await db.pacientes.create_index(
+        [("especialistaId", 1), ("clave", 1)],
+        unique=True,
+        name="especialista_clave"
+    )
+    
+    # Rollups semanales y mensuales (tendencias largas)
+    await db.estadisticas_periodos.create_index(
+        [("especialistaId", 1), ("periodo", 1), ("fecha", 1)],
+        unique=True,
+        name="especialista_periodo_fecha"
+    )
+    
+    # Totales por especialista (lectura O(1) del dashboard)
+    await db.estadisticas_totales.create_index("especialistaId", unique=True)
+
+    # Blobs huérfanos pendientes de recolección
+    await db.blobs.create_index("huerfanoDesde", sparse=True, name="huerfano_desde")
+
+    # Importaciones masivas: listado de trabajos por especialista
+    await db.importaciones.create_index(
+        [("especialistaId", 1), ("creado", -1)],
+        name="especialista_creado"
+    )
+
+    logger.info("✅ Índices verificados")
+
 async def close_mongo_connection():
     """Cerrar conexión a MongoDB"""
     if mongodb.client:
@@ -0,0 +1,804 @@
+"""
+Motor de estadísticas de registros
+- Rollups diarios mantenidos con $inc (lectura del dashboard)
+- Agregación $facet sobre registros (cálculo de referencia y reconstrucción)
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+from bson import ObjectId
+import asyncio
+import logging
+
+from app.config import settings
+from app.db.database import max_time_ms
+from app.db.pacientes import registrar_paciente, registrar_pacientes, liberar_paciente, reconstruir_pacientes
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+def construir_rangos_edad(limites: list) -> dict:
+    """
+    Etiquetas de los grupos de edad a partir de sus límites
+
+    [0, 11, 21, 200] -> {0: "0-10", 11: "11-20", 21: "21+"}
+
+    El orden del dict es el orden de los grupos en el gráfico.
+    """
+    rangos = {}
+    for indice, (inferior, superior) in enumerate(zip(limites, limites[1:])):
+        ultimo = indice == len(limites) - 2
+        rangos[inferior] = f"{inferior}+" if ultimo else f"{inferior}-{superior - 1}"
+    return rangos
+
+
+# Límites de los grupos de edad ($bucket y contadores) y sus etiquetas
+EDAD_LIMITES = sorted(set(settings.dashboard_edad_limites))
+EDAD_RANGOS = construir_rangos_edad(EDAD_LIMITES)
+
+# Los días del dashboard empiezan a medianoche local, no UTC
+ZONA = ZoneInfo(settings.zona_horaria)
+
+
+def dia_local(fecha: datetime) -> date:
+    """Día local de una fecha UTC (datetime sin zona, como se guarda en Mongo)"""
+    return fecha.replace(tzinfo=timezone.utc).astimezone(ZONA).date()
+
+
+def inicio_dia_utc(dia: date) -> datetime:
+    """Medianoche local de un día, en UTC sin zona (para comparar con fechaAnalisis)"""
+    inicio = datetime(dia.year, dia.month, dia.day, tzinfo=ZONA)
+    return inicio.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _es_positivo() -> dict:
+    return {"$cond": [{"$eq": ["$resultado", "Anemia"]}, 1, 0]}
+
+
+def _contar_si(condicion: dict) -> dict:
+    return {"$sum": {"$cond": [condicion, 1, 0]}}
+
+
+# ============================================
+# PIPELINE
+# ============================================
+
+def construir_pipeline_estadisticas(especialista_id: ObjectId, ahora: datetime) -> list:
+    """
+    Construir pipeline $facet con todos los indicadores del especialista
+
+    El $match inicial usa el índice (especialistaId, fechaAnalisis) y el
+    $project reduce cada documento a los campos necesarios antes del $facet.
+
+    Args:
+        especialista_id: ObjectId del especialista
+        ahora: Fecha de referencia (UTC) para "hoy" y "esta semana"
+            (días locales, ver ZONA)
+
+    Returns:
+        list: Pipeline de agregación
+    """
+    hoy = dia_local(ahora)
+    hoy_inicio = inicio_dia_utc(hoy)
+    hoy_fin = inicio_dia_utc(hoy + timedelta(days=1))
+    semana_inicio = inicio_dia_utc(hoy - timedelta(days=7))
+
+    return [
+        {"$match": {"especialistaId": especialista_id}},
+        {
+            "$project": {
+                "_id": 0,
+                "resultado": 1,
+                "fechaAnalisis": 1,
+                "paciente.nombre": 1,
+                "paciente.edad": 1
+            }
+        },
+        {
+            "$facet": {
+                "resumen": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "total": {"$sum": 1},
+                            "positivos": {"$sum": _es_positivo()},
+                            "negativos": _contar_si({"$eq": ["$resultado", "No Anemia"]}),
+                            "hoy": _contar_si({
+                                "$and": [
+                                    {"$gte": ["$fechaAnalisis", hoy_inicio]},
+                                    {"$lt": ["$fechaAnalisis", hoy_fin]}
+                                ]
+                            }),
+                            "semana": _contar_si({"$gte": ["$fechaAnalisis", semana_inicio]})
+                        }
+                    }
+                ],
+                "pacientes": [
+                    {"$group": {"_id": "$paciente.nombre"}},
+                    {"$count": "total"}
+                ],
+                "edades": [
+                    {
+                        "$bucket": {
+                            "groupBy": "$paciente.edad",
+                            "boundaries": EDAD_LIMITES,
+                            "default": "Otro",
+                            "output": {
+                                "total": {"$sum": 1},
+                                "positivos": {"$sum": _es_positivo()}
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+    ]
+
+
+# ============================================
+# FORMATEO
+# ============================================
+
+def formatear_distribucion_edad(conteos: dict) -> dict:
+    """
+    Formatear los conteos por grupo de edad para el gráfico
+
+    Los grupos salen en el orden de EDAD_LIMITES (también los vacíos, para
+    que el eje del gráfico no cambie); "Otro" (sin edad o fuera de los
+    límites) va al final y solo si tiene casos. Etiquetas que no están en
+    la definición actual (límites cambiados sin reconstruir) se ignoran.
+
+    Args:
+        conteos: {rango: {total, positivos}} (contadores o $bucket)
+
+    Returns:
+        dict con total_casos, positivos, mayor_grupo y datos_grafico
+    """
+    datos_grafico = []
+    total_casos = 0
+    total_positivos = 0
+    mayor_grupo = {"rango": "", "total": 0}
+
+    rangos = list(EDAD_RANGOS.values())
+    if conteos.get("Otro", {}).get("total", 0) > 0:
+        rangos.append("Otro")
+
+    for rango in rangos:
+        total = conteos.get(rango, {}).get("total", 0)
+        positivos = conteos.get(rango, {}).get("positivos", 0)
+
+        datos_grafico.append({
+            "rango": rango,
+            "total": total,
+            "positivos": positivos,
+            "negativos": total - positivos
+        })
+
+        total_casos += total
+        total_positivos += positivos
+
+        if total > mayor_grupo["total"]:
+            mayor_grupo = {"rango": rango, "total": total}
+
+    return {
+        "total_casos": total_casos,
+        "positivos": total_positivos,
+        "mayor_grupo": mayor_grupo["rango"] if mayor_grupo["rango"] else "N/A",
+        "datos_grafico": datos_grafico
+    }
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+async def calcular_estadisticas(
+    db,
+    especialista_id: ObjectId,
+    ahora: Optional[datetime] = None
+) -> dict:
+    """
+    Calcular todas las estadísticas de un especialista en un solo round-trip
+
+    Args:
+        db: Base de datos
+        especialista_id: ObjectId del especialista
+        ahora: Fecha de referencia (por defecto, utcnow)
+
+    Returns:
+        dict con total, positivos, negativos, hoy, semana,
+        total_pacientes y distribucion_edad
+    """
+    ahora = ahora or datetime.utcnow()
+    pipeline = construir_pipeline_estadisticas(especialista_id, ahora)
+
+    resultado = await db.registros.aggregate(
+        pipeline, maxTimeMS=max_time_ms("dashboard")
+    ).to_list(length=1)
+    facetas = resultado[0] if resultado else {}
+
+    resumen = facetas.get("resumen") or [{}]
+    resumen = resumen[0]
+    pacientes = facetas.get("pacientes") or [{}]
+
+    return {
+        "total": resumen.get("total", 0),
+        "positivos": resumen.get("positivos", 0),
+        "negativos": resumen.get("negativos", 0),
+        "hoy": resumen.get("hoy", 0),
+        "semana": resumen.get("semana", 0),
+        "total_pacientes": pacientes[0].get("total", 0),
+        "distribucion_edad": formatear_distribucion_edad({
+            EDAD_RANGOS.get(bucket["_id"], "Otro"): bucket
+            for bucket in facetas.get("edades", [])
+        })
+    }
+
+
+# ============================================
+# ROLLUPS (estadisticas_diarias / estadisticas_totales)
+# ============================================
+#
+# Contadores que se actualizan con $inc en cada alta, re-análisis y baja
+# de registro, con la misma forma en ambas colecciones:
+#
+# - estadisticas_diarias: un documento por (especialistaId, fecha)
+# - estadisticas_periodos: un documento por (especialistaId, periodo, fecha)
+#   con periodo "semana" (lunes a domingo) o "mes"; fecha = primer día
+# - estadisticas_totales: un documento por especialistaId (lectura O(1))
+#
+# Los días son locales (ZONA), así que una tendencia de 365 días lee 12
+# documentos mensuales, 53 semanales o 365 diarios, sin tocar registros.
+#
+# {
+#   "especialistaId": ObjectId,
+#   "periodo": "semana" | "mes",                 (solo periodos)
+#   "fecha": "YYYY-MM-DD",                       (diarias y periodos)
+#   "total": int, "positivos": int, "negativos": int,
+#   "edades": {"0-10": {"total": int, "positivos": int}, ...},
+#   "confianza": {
+#       "suma": float, "sumaCuadrados": float, "n": int,
+#       "histograma": {"80-90": int, "90-100": int, ...}
+#   }
+# }
+#
+# La media y la varianza se derivan de (n, suma, sumaCuadrados), que son
+# los únicos acumuladores que se pueden mantener con $inc atómicos.
+
+COLECCION_DIARIAS = "estadisticas_diarias"
+COLECCION_TOTALES = "estadisticas_totales"
+COLECCION_PERIODOS = "estadisticas_periodos"
+
+# Especialistas cuyos rollups quedaron a medias por un error de escritura:
+# {"_id": especialistaId, "desde": datetime, "actualizado": datetime, "error": str}
+# Se corrigen reconstruyéndolos (scripts/reconstruir_estadisticas.py --pendientes)
+COLECCION_PENDIENTES = "estadisticas_pendientes"
+
+GRANULARIDADES = ("dia", "semana", "mes")
+
+# Ancho de cada barra del histograma de confianza (en puntos porcentuales)
+CONFIANZA_BIN_ANCHO = 10
+
+
+def clave_dia(fecha: datetime) -> str:
+    """Clave del día local de una fecha UTC para el rollup"""
+    return dia_local(fecha).isoformat()
+
+
+def inicio_periodo(dia: date, granularidad: str) -> date:
+    """Primer día del periodo que contiene a `dia` (lunes para semanas)"""
+    if granularidad == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if granularidad == "mes":
+        return dia.replace(day=1)
+    return dia
+
+
+def siguiente_periodo(inicio: date, granularidad: str) -> date:
+    """Primer día del periodo siguiente"""
+    if granularidad == "semana":
+        return inicio + timedelta(days=7)
+    if granularidad == "mes":
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+
+def rango_edad(edad: Optional[int]) -> str:
+    """Etiqueta del grupo de edad (mismos límites que el $bucket)"""
+    if edad is None:
+        return "Otro"
+    for inferior, superior in zip(EDAD_LIMITES, EDAD_LIMITES[1:]):
+        if inferior <= edad < superior:
+            return EDAD_RANGOS[inferior]
+    return "Otro"
+
+
+def bin_confianza(confianza: float) -> str:
+    """Etiqueta de la barra del histograma para una confianza (0-100)"""
+    inferior = int(min(max(confianza, 0), 100 - 1e-9) // CONFIANZA_BIN_ANCHO) * CONFIANZA_BIN_ANCHO
+    return f"{inferior}-{inferior + CONFIANZA_BIN_ANCHO}"
+
+
+def incrementos_registro(registro: dict, signo: int = 1) -> dict:
+    """
+    Construir el $inc que aporta un registro a sus rollups
+
+    Args:
+        registro: Documento del registro (resultado, paciente, analisis)
+        signo: 1 para alta, -1 para baja
+
+    Returns:
+        dict para usar en {"$inc": ...}
+    """
+    positivo = 1 if registro.get("resultado") == "Anemia" else 0
+    negativo = 1 if registro.get("resultado") == "No Anemia" else 0
+    rango = rango_edad(registro.get("paciente", {}).get("edad"))
+
+    incrementos = {
+        "total": signo,
+        "positivos": signo * positivo,
+        "negativos": signo * negativo,
+        f"edades.{rango}.total": signo,
+        f"edades.{rango}.positivos": signo * positivo
+    }
+
+    confianza = registro.get("analisis", {}).get("confianza")
+    if confianza is not None:
+        confianza = float(confianza)
+        incrementos["confianza.suma"] = signo * confianza
+        incrementos["confianza.sumaCuadrados"] = signo * confianza * confianza
+        incrementos["confianza.n"] = signo
+        incrementos[f"confianza.histograma.{bin_confianza(confianza)}"] = signo
+
+    return incrementos
+
+
+def combinar_incrementos(*partes: dict) -> dict:
+    """Sumar varios $inc en uno solo (omitiendo los que se anulan)"""
+    combinado: dict = {}
+    for parte in partes:
+        for campo, valor in parte.items():
+            combinado[campo] = combinado.get(campo, 0) + valor
+    return {campo: valor for campo, valor in combinado.items() if valor != 0}
+
+
+def resumen_confianza(confianza: Optional[dict]) -> dict:
+    """
+    Derivar media, varianza y desviación de los acumuladores de confianza
+
+    Args:
+        confianza: Subdocumento {suma, sumaCuadrados, n, histograma}
+
+    Returns:
+        dict con promedio, varianza, desviacion, n e histograma ordenado
+    """
+    confianza = confianza or {}
+    n = confianza.get("n", 0)
+    if n <= 0:
+        return {"promedio": 0.0, "varianza": 0.0, "desviacion": 0.0, "n": 0, "histograma": []}
+
+    promedio = confianza.get("suma", 0.0) / n
+    # max(0, ...) absorbe el error de redondeo de las restas acumuladas
+    varianza = max(confianza.get("sumaCuadrados", 0.0) / n - promedio * promedio, 0.0)
+
+    histograma = [
+        {"rango": rango, "total": total}
+        for rango, total in sorted(
+            confianza.get("histograma", {}).items(),
+            key=lambda item: int(item[0].split("-")[0])
+        )
+        if total > 0
+    ]
+
+    return {
+        "promedio": round(promedio, 2),
+        "varianza": round(varianza, 2),
+        "desviacion": round(varianza ** 0.5, 2),
+        "n": n,
+        "histograma": histograma
+    }
+
+
+def _rollups_de(especialista_id: ObjectId, fecha: datetime) -> list:
+    """(colección, filtro) de cada rollup al que suma un registro"""
+    dia = dia_local(fecha)
+    return [
+        (COLECCION_DIARIAS, {"especialistaId": especialista_id, "fecha": dia.isoformat()}),
+        *(
+            (COLECCION_PERIODOS, {
+                "especialistaId": especialista_id,
+                "periodo": granularidad,
+                "fecha": inicio_periodo(dia, granularidad).isoformat()
+            })
+            for granularidad in ("semana", "mes")
+        ),
+        (COLECCION_TOTALES, {"especialistaId": especialista_id})
+    ]
+
+
+def _agrupar_incrementos(registros, agrupados: Optional[dict] = None) -> dict:
+    """
+    Sumar los incrementos (altas) de varios registros por rollup
+
+    Args:
+        registros: Registros a sumar
+        agrupados: Acumulador previo (para sumar por partes)
+
+    Returns:
+        dict {(colección, filtro como tupla): incrementos}
+    """
+    agrupados = {} if agrupados is None else agrupados
+    for registro in registros:
+        incrementos = incrementos_registro(registro, 1)
+        for coleccion, filtro in _rollups_de(registro["especialistaId"], registro["fechaAnalisis"]):
+            clave = (coleccion, tuple(filtro.items()))
+            agrupados[clave] = combinar_incrementos(agrupados.get(clave, {}), incrementos)
+    return agrupados
+
+
+async def _aplicar_incrementos(db, especialista_id: ObjectId, fecha: datetime, incrementos: dict) -> None:
+    if not incrementos:
+        return
+    await asyncio.gather(*(
+        db[coleccion].update_one(filtro, {"$inc": incrementos}, upsert=True)
+        for coleccion, filtro in _rollups_de(especialista_id, fecha)
+    ))
+
+
+async def _sumar_pacientes(db, especialista_id: ObjectId, cantidad: int) -> None:
+    if cantidad:
+        await db[COLECCION_TOTALES].update_one(
+            {"especialistaId": especialista_id},
+            {"$inc": {"pacientes": cantidad}},
+            upsert=True
+        )
+
+
+# ============================================
+# PENDIENTES
+# ============================================
+#
+# Los $inc de un registro van a cinco documentos (día, semana, mes,
+# totales, paciente) y no son transaccionales con el insert/update/delete
+# del registro. Los errores transitorios los reintenta el driver
+# (retryable writes); si aun así falla alguno, no se repite el $inc (podría
+# haberse aplicado) sino que el especialista queda marcado como pendiente
+# y sus rollups se reconstruyen desde los registros.
+
+async def marcar_pendiente(db, especialista_id: ObjectId, error: Exception) -> None:
+    """Registrar que los rollups de un especialista necesitan reconstruirse"""
+    ahora = datetime.utcnow()
+    try:
+        await db[COLECCION_PENDIENTES].update_one(
+            {"_id": especialista_id},
+            {
+                "$setOnInsert": {"desde": ahora},
+                "$set": {"actualizado": ahora, "error": str(error)}
+            },
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"❌ No se pudo marcar rollups pendientes de {especialista_id}: {e} (error original: {error})")
+
+
+async def listar_pendientes(db) -> list:
+    """Especialistas con rollups pendientes de reconstruir"""
+    return await db[COLECCION_PENDIENTES].find().sort("desde", 1).to_list(length=None)
+
+
+async def reconstruir_pendientes(db) -> int:
+    """
+    Reconstruir los rollups de los especialistas marcados como pendientes
+
+    La marca se borra solo si no cambió durante la reconstrucción (si hubo
+    un error nuevo mientras tanto, queda para la siguiente pasada).
+
+    Returns:
+        int: Especialistas reconstruidos
+    """
+    reconstruidos = 0
+    for pendiente in await listar_pendientes(db):
+        await reconstruir_rollups(db, pendiente["_id"])
+        await db[COLECCION_PENDIENTES].delete_one(
+            {"_id": pendiente["_id"], "actualizado": pendiente["actualizado"]}
+        )
+        reconstruidos += 1
+    return reconstruidos
+
+
+# ============================================
+# ALTAS, BAJAS Y RE-ANÁLISIS
+# ============================================
+
+async def registrar_alta(db, registro: dict) -> None:
+    """
+    Sumar un registro recién creado a sus rollups (y a su paciente)
+
+    Si alguna escritura falla, marca al especialista como pendiente y
+    propaga el error.
+    """
+    try:
+        await _aplicar_incrementos(
+            db,
+            registro["especialistaId"],
+            registro["fechaAnalisis"],
+            incrementos_registro(registro, 1)
+        )
+        nuevo = await registrar_paciente(
+            db, registro["especialistaId"], registro["paciente"]["nombre"], registro["fechaAnalisis"]
+        )
+        if nuevo:
+            await _sumar_pacientes(db, registro["especialistaId"], 1)
+    except Exception as e:
+        await marcar_pendiente(db, registro["especialistaId"], e)
+        raise
+
+
+async def registrar_altas(db, registros: list) -> None:
+    """
+    Sumar muchos registros nuevos a sus rollups (importaciones masivas)
+
+    Agrupa los incrementos por rollup: una actualización por día, semana
+    y mes afectados y una por especialista, en lugar de cuatro por registro.
+    Si alguna escritura falla, marca a los especialistas del lote como
+    pendientes y propaga el error.
+    """
+    try:
+        await asyncio.gather(*(
+            db[coleccion].update_one(dict(filtro), {"$inc": incrementos}, upsert=True)
+            for (coleccion, filtro), incrementos in _agrupar_incrementos(registros).items()
+            if incrementos
+        ))
+
+        nuevos = await registrar_pacientes(db, registros)
+        await asyncio.gather(*(
+            _sumar_pacientes(db, especialista_id, cantidad)
+            for especialista_id, cantidad in nuevos.items()
+        ))
+    except Exception as e:
+        for especialista_id in {registro["especialistaId"] for registro in registros}:
+            await marcar_pendiente(db, especialista_id, e)
+        raise
+
+
+async def registrar_baja(db, registro: dict) -> None:
+    """Restar un registro eliminado de sus rollups (y de su paciente)"""
+    try:
+        await _aplicar_incrementos(
+            db,
+            registro["especialistaId"],
+            registro["fechaAnalisis"],
+            incrementos_registro(registro, -1)
+        )
+        sin_registros = await liberar_paciente(
+            db, registro["especialistaId"], registro.get("paciente", {}).get("nombre", "")
+        )
+        if sin_registros:
+            await _sumar_pacientes(db, registro["especialistaId"], -1)
+    except Exception as e:
+        await marcar_pendiente(db, registro["especialistaId"], e)
+        raise
+
+
+async def registrar_reanalisis(db, anterior: dict, actualizado: dict) -> None:
+    """
+    Ajustar los rollups tras un re-análisis (un solo $inc con la diferencia)
+
+    Args:
+        db: Base de datos
+        anterior: Registro justo antes de la actualización (el devuelto por
+            find_one_and_update con ReturnDocument.BEFORE, no una lectura
+            previa: con re-análisis simultáneos la diferencia se contaría dos veces)
+        actualizado: Registro con el nuevo resultado/confianza
+    """
+    try:
+        await _aplicar_incrementos(
+            db,
+            anterior["especialistaId"],
+            anterior["fechaAnalisis"],
+            combinar_incrementos(
+                incrementos_registro(anterior, -1),
+                incrementos_registro(actualizado, 1)
+            )
+        )
+    except Exception as e:
+        await marcar_pendiente(db, anterior["especialistaId"], e)
+        raise
+
+
+async def leer_rollups(
+    db,
+    especialista_id: ObjectId,
+    desde: Optional[str] = None
+) -> list:
+    """
+    Leer rollups diarios de un especialista ordenados por fecha
+
+    Args:
+        db: Base de datos
+        especialista_id: ObjectId del especialista
+        desde: Clave de día inicial (inclusive), opcional
+
+    Returns:
+        list de documentos diarios
+    """
+    query = {"especialistaId": especialista_id}
+    if desde:
+        query["fecha"] = {"$gte": desde}
+
+    cursor = db[COLECCION_DIARIAS].find(
+        query, {"_id": 0}, max_time_ms=max_time_ms("dashboard")
+    ).sort("fecha", 1)
+    return await cursor.to_list(length=None)
+
+
+async def leer_tendencia(
+    db,
+    especialista_id: ObjectId,
+    desde: date,
+    hasta: date,
+    granularidad: str = "dia"
+) -> list:
+    """
+    Serie de tiempo completa (con ceros) desde los rollups
+
+    Lee un documento por periodo con datos, así que el costo depende del
+    número de periodos y no del número de registros.
+
+    Args:
+        db: Base de datos
+        especialista_id: ObjectId del especialista
+        desde: Primer día local (se ajusta al inicio de su periodo)
+        hasta: Último día local (inclusive)
+        granularidad: "dia", "semana" o "mes"
+
+    Returns:
+        list de {fecha, total, positivos, negativos, confianza} por
+        periodo, en orden, incluidos los periodos sin registros
+    """
+    inicio = inicio_periodo(desde, granularidad)
+    query = {
+        "especialistaId": especialista_id,
+        "fecha": {"$gte": inicio.isoformat(), "$lte": hasta.isoformat()}
+    }
+    coleccion = COLECCION_DIARIAS
+    if granularidad != "dia":
+        coleccion = COLECCION_PERIODOS
+        query["periodo"] = granularidad
+
+    proyeccion = {"_id": 0, "fecha": 1, "total": 1, "positivos": 1, "negativos": 1, "confianza": 1}
+    documentos = await db[coleccion].find(
+        query, proyeccion, max_time_ms=max_time_ms("dashboard")
+    ).to_list(length=None)
+    por_fecha = {documento["fecha"]: documento for documento in documentos}
+
+    serie = []
+    periodo = inicio
+    while periodo <= hasta:
+        documento = por_fecha.get(periodo.isoformat(), {})
+        serie.append({
+            "fecha": periodo.isoformat(),
+            "total": documento.get("total", 0),
+            "positivos": documento.get("positivos", 0),
+            "negativos": documento.get("negativos", 0),
+            "confianza": documento.get("confianza")
+        })
+        periodo = siguiente_periodo(periodo, granularidad)
+
+    return serie
+
+
+async def leer_totales(db, especialista_id: ObjectId) -> dict:
+    """Leer el documento de totales del especialista (O(1))"""
+    totales = await db[COLECCION_TOTALES].find_one(
+        {"especialistaId": especialista_id},
+        {"_id": 0},
+        max_time_ms=max_time_ms("dashboard")
+    )
+    return totales or {}
+
+
+async def leer_estadisticas(
+    db,
+    especialista_id: ObjectId,
+    ahora: Optional[datetime] = None
+) -> dict:
+    """
+    Estadísticas del especialista a partir de los rollups
+
+    Devuelve la misma estructura que calcular_estadisticas (más el resumen
+    de confianza) leyendo el documento de totales y los días de la última
+    semana, en lugar de todos los registros.
+
+    Args:
+        db: Base de datos
+        especialista_id: ObjectId del especialista
+        ahora: Fecha de referencia (por defecto, utcnow)
+
+    Returns:
+        dict con total, positivos, negativos, hoy, semana, confianza,
+        total_pacientes y distribucion_edad
+    """
+    ahora = ahora or datetime.utcnow()
+    hoy = clave_dia(ahora)
+    semana_inicio = clave_dia(ahora - timedelta(days=7))
+
+    totales, semana = await asyncio.gather(
+        leer_totales(db, especialista_id),
+        leer_rollups(db, especialista_id, desde=semana_inicio)
+    )
+
+    return {
+        "total": totales.get("total", 0),
+        "positivos": totales.get("positivos", 0),
+        "negativos": totales.get("negativos", 0),
+        "hoy": sum(dia.get("total", 0) for dia in semana if dia["fecha"] == hoy),
+        "semana": sum(dia.get("total", 0) for dia in semana),
+        "confianza": resumen_confianza(totales.get("confianza")),
+        # Contador de entidades `pacientes` (nombre normalizado), sin $group
+        "total_pacientes": totales.get("pacientes", 0),
+        "distribucion_edad": formatear_distribucion_edad(totales.get("edades", {}))
+    }
+
+
+def _documento_desde_incrementos(base: dict, incrementos: dict) -> dict:
+    """Expandir un $inc con rutas punteadas a un documento anidado"""
+    documento = dict(base)
+    for campo, valor in incrementos.items():
+        destino = documento
+        partes = campo.split(".")
+        for parte in partes[:-1]:
+            destino = destino.setdefault(parte, {})
+        destino[partes[-1]] = valor
+    return documento
+
+
+async def reconstruir_rollups(db, especialista_id: Optional[ObjectId] = None) -> int:
+    """
+    Reconstruir rollups (diarios, semanales, mensuales y totales) desde los registros
+
+    Recorre los registros una sola vez con proyección y reemplaza los
+    documentos del especialista (o de todos si no se indica). Necesario
+    al cambiar la zona horaria o los grupos de edad. También reconstruye
+    las entidades de pacientes.
+
+    Returns:
+        int: Número de documentos diarios escritos
+    """
+    query = {"especialistaId": especialista_id} if especialista_id else {}
+    proyeccion = {
+        "especialistaId": 1,
+        "fechaAnalisis": 1,
+        "resultado": 1,
+        "paciente.edad": 1,
+        "analisis.confianza": 1
+    }
+
+    agrupados: dict = {}
+    async for registro in db.registros.find(query, proyeccion):
+        _agrupar_incrementos([registro], agrupados)
+
+    documentos: dict = {COLECCION_DIARIAS: [], COLECCION_PERIODOS: [], COLECCION_TOTALES: []}
+    for (coleccion, filtro), incrementos in agrupados.items():
+        documentos[coleccion].append(_documento_desde_incrementos(dict(filtro), incrementos))
+
+    for coleccion, docs in documentos.items():
+        await db[coleccion].delete_many(query)
+        if docs:
+            await db[coleccion].insert_many(docs, ordered=False)
+
+    # Entidades de pacientes y su contador en los totales
+    pacientes = await reconstruir_pacientes(db, especialista_id)
+    for esp_id, total in pacientes.items():
+        await db[COLECCION_TOTALES].update_one(
+            {"especialistaId": esp_id},
+            {"$set": {"pacientes": total}},
+            upsert=True
+        )
+
+    return len(documentos[COLECCION_DIARIAS])
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_serializer
 from typing import Optional, Literal
 from datetime import datetime
 from bson import ObjectId
@@ -79,10 +79,24 @@ class ImagenesData(BaseModel):
     """
     ruta_original: str = Field(..., alias="rutaOriginal")
     ruta_mapa_atencion: Optional[str] = Field(None, alias="rutaMapaAtencion")
-    
+    # SHA-256 del blob (registros anteriores al almacenamiento por contenido no lo tienen)
+    digest_original: Optional[str] = Field(None, alias="digestOriginal")
+    digest_mapa_atencion: Optional[str] = Field(None, alias="digestMapaAtencion")
+
     class Config:
         populate_by_name = True
 
+    @model_serializer(mode="wrap")
+    def _omitir_digests_ausentes(self, handler):
+        # Misma forma que la serialización directa del documento (orjson):
+        # un digest que el documento no tiene no se emite como null
+        datos = handler(self)
+        for campo in ("digest_original", "digest_mapa_atencion"):
+            if campo not in self.model_fields_set:
+                datos.pop(campo, None)
+                datos.pop(self.model_fields[campo].alias, None)
+        return datos
+
 class AnalisisData(BaseModel):
     """
     Modelo para datos de análisis
@@ -120,6 +134,77 @@ class RegistroResponse(BaseModel):
         json_encoders = {ObjectId: str}
 
 
+class AnalisisResumen(BaseModel):
+    """Datos de análisis para listados (sin el texto de aiSummary)"""
+    resultado: Literal["Anemia", "No Anemia"]
+    confianza: Optional[float] = None
+
+class RegistroResumen(BaseModel):
+    """
+    Modelo ligero para listados (historial, actividad, últimos análisis)
+    El documento completo solo se devuelve en GET /registros/{id}
+    """
+    id: str = Field(alias="_id")
+    numero_expediente: str = Field(alias="numeroExpediente")
+    paciente: PacienteData
+    especialista_id: str = Field(alias="especialistaId")
+    imagenes: ImagenesData
+    analisis: AnalisisResumen
+    resultado: str
+    fecha_analisis: datetime = Field(alias="fechaAnalisis")
+
+    class Config:
+        populate_by_name = True
+        json_encoders = {ObjectId: str}
+
+
+# Proyección de Mongo con los campos de RegistroResumen
+PROYECCION_RESUMEN = {
+    "numeroExpediente": 1,
+    "paciente": 1,
+    "especialistaId": 1,
+    "imagenes": 1,
+    "analisis.resultado": 1,
+    "analisis.confianza": 1,
+    "resultado": 1,
+    "fechaAnalisis": 1
+}
+
+# Proyección de Mongo con los campos de RegistroResponse
+PROYECCION_REGISTRO = {
+    "numeroExpediente": 1,
+    "paciente": 1,
+    "especialistaId": 1,
+    "imagenes": 1,
+    "analisis.resultado": 1,
+    "analisis.aiSummary": 1,
+    "resultado": 1,
+    "fechaAnalisis": 1
+}
+
+
+def aplicar_proyeccion(documento: dict, proyeccion: dict) -> dict:
+    """
+    Aplicar en memoria una proyección de inclusión (con rutas "a.b")
+
+    Para responder con un documento recién insertado sin volver a leerlo.
+    Como en Mongo, `_id` se incluye siempre.
+    """
+    resultado = {"_id": documento["_id"]} if "_id" in documento else {}
+    for ruta in proyeccion:
+        origen, destino = documento, resultado
+        *padres, campo = ruta.split(".")
+        for padre in padres:
+            origen = origen.get(padre)
+            if not isinstance(origen, dict):
+                break
+            destino = destino.setdefault(padre, {})
+        else:
+            if campo in origen:
+                destino[campo] = origen[campo]
+    return resultado
+
+
 # ============================================
 # MODELOS DE AUTENTICACIÓN
 # ============================================
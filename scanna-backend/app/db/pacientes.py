@@ -0,0 +1,258 @@
+"""
+Pacientes
+Entidad por (especialista, nombre normalizado) para contar pacientes únicos
+sin agrupar registros, y estimador HyperLogLog para el conteo global
+"""
+
+import hashlib
+import math
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.core.busqueda import normalizar_texto
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+#
+# Colección `pacientes` (índice único especialistaId + clave):
+# {
+#   "especialistaId": ObjectId,
+#   "clave": "jose nunez",       # nombre normalizado (sin acentos ni mayúsculas)
+#   "nombre": "José Núñez",      # primera forma registrada
+#   "registros": int,            # registros que apuntan al paciente
+#   "creado": datetime,
+#   "ultimoRegistro": datetime
+# }
+#
+# El número de pacientes del especialista vive en estadisticas_totales
+# ("pacientes") y se ajusta solo cuando se crea o elimina una entidad.
+#
+# Colección `estadisticas_globales`, documento "pacientes": registros de un
+# HyperLogLog sobre las claves de todos los especialistas ({"r.<i>": rango},
+# actualizados con $max). Solo crece: las bajas se reflejan al reconstruir.
+
+COLECCION_GLOBALES = "estadisticas_globales"
+HLL_ID = "pacientes"
+
+# 2^11 registros: error estándar ~1.04 / sqrt(2048) ≈ 2.3%
+HLL_PRECISION = 11
+HLL_REGISTROS = 1 << HLL_PRECISION
+
+
+def clave_paciente(nombre: str) -> str:
+    """
+    Clave del paciente: nombre normalizado
+
+    "José  Núñez" y "jose nunez" son el mismo paciente.
+    """
+    return normalizar_texto(nombre)
+
+
+# ============================================
+# HYPERLOGLOG
+# ============================================
+
+def posicion_hll(clave: str) -> tuple[int, int]:
+    """
+    Registro y rango de una clave en el HyperLogLog
+
+    Returns:
+        (índice del registro, posición del primer bit 1 en el resto del hash)
+    """
+    valor = int.from_bytes(hashlib.blake2b(clave.encode("utf-8"), digest_size=8).digest(), "big")
+    indice = valor >> (64 - HLL_PRECISION)
+    resto = valor & ((1 << (64 - HLL_PRECISION)) - 1)
+    rango = (64 - HLL_PRECISION) - resto.bit_length() + 1
+    return indice, rango
+
+
+def estimar_cardinalidad(registros: dict) -> int:
+    """
+    Estimación HyperLogLog (con corrección de rango pequeño)
+
+    Args:
+        registros: {"<índice>": rango} (los ausentes valen 0)
+    """
+    m = HLL_REGISTROS
+    alfa = 0.7213 / (1 + 1.079 / m)
+    suma = m - len(registros)  # registros en 0: 2^0 = 1
+    suma += sum(2.0 ** -rango for rango in registros.values())
+    estimacion = alfa * m * m / suma
+
+    vacios = m - sum(1 for rango in registros.values() if rango > 0)
+    if estimacion <= 2.5 * m and vacios > 0:
+        estimacion = m * math.log(m / vacios)
+
+    return round(estimacion)
+
+
+async def _actualizar_hll(db, claves: list) -> None:
+    if not settings.pacientes_hll_enabled or not claves:
+        return
+
+    maximos: dict = {}
+    for clave in claves:
+        indice, rango = posicion_hll(clave)
+        maximos[f"r.{indice}"] = max(maximos.get(f"r.{indice}", 0), rango)
+
+    await db[COLECCION_GLOBALES].update_one(
+        {"_id": HLL_ID},
+        {"$max": maximos},
+        upsert=True
+    )
+
+
+async def estimar_pacientes_globales(db) -> int:
+    """Pacientes únicos estimados entre todos los especialistas"""
+    documento = await db[COLECCION_GLOBALES].find_one({"_id": HLL_ID}, {"r": 1})
+    return estimar_cardinalidad((documento or {}).get("r", {}))
+
+
+# ============================================
+# ALTAS Y BAJAS
+# ============================================
+
+async def registrar_paciente(db, especialista_id: ObjectId, nombre: str, fecha: datetime) -> bool:
+    """
+    Sumar un registro a la entidad del paciente (creándola si no existe)
+
+    Returns:
+        bool: True si el paciente es nuevo para el especialista
+    """
+    clave = clave_paciente(nombre)
+    operacion = {
+        "$inc": {"registros": 1},
+        "$max": {"ultimoRegistro": fecha},
+        "$setOnInsert": {"nombre": nombre, "creado": datetime.utcnow()}
+    }
+
+    try:
+        resultado = await db.pacientes.update_one(
+            {"especialistaId": especialista_id, "clave": clave}, operacion, upsert=True
+        )
+    except DuplicateKeyError:
+        # Dos altas simultáneas del mismo paciente: la otra lo creó
+        resultado = await db.pacientes.update_one(
+            {"especialistaId": especialista_id, "clave": clave}, operacion, upsert=True
+        )
+
+    if resultado.upserted_id is None:
+        return False
+
+    await _actualizar_hll(db, [clave])
+    return True
+
+
+async def registrar_pacientes(db, registros: list) -> dict:
+    """
+    Sumar muchos registros a sus pacientes con un solo bulk_write
+
+    Returns:
+        dict {especialistaId: pacientes nuevos}
+    """
+    agrupados: dict = {}
+    for registro in registros:
+        clave = (registro["especialistaId"], clave_paciente(registro["paciente"]["nombre"]))
+        actual = agrupados.setdefault(clave, {"n": 0, "nombre": registro["paciente"]["nombre"], "fecha": registro["fechaAnalisis"]})
+        actual["n"] += 1
+        actual["fecha"] = max(actual["fecha"], registro["fechaAnalisis"])
+
+    if not agrupados:
+        return {}
+
+    claves = list(agrupados)
+    operaciones = [
+        UpdateOne(
+            {"especialistaId": especialista_id, "clave": clave},
+            {
+                "$inc": {"registros": agrupados[(especialista_id, clave)]["n"]},
+                "$max": {"ultimoRegistro": agrupados[(especialista_id, clave)]["fecha"]},
+                "$setOnInsert": {"nombre": agrupados[(especialista_id, clave)]["nombre"], "creado": datetime.utcnow()}
+            },
+            upsert=True
+        )
+        for especialista_id, clave in claves
+    ]
+    resultado = await db.pacientes.bulk_write(operaciones, ordered=False)
+
+    nuevos: dict = {}
+    for indice in resultado.upserted_ids:
+        especialista_id = claves[indice][0]
+        nuevos[especialista_id] = nuevos.get(especialista_id, 0) + 1
+
+    await _actualizar_hll(db, [claves[indice][1] for indice in resultado.upserted_ids])
+    return nuevos
+
+
+async def liberar_paciente(db, especialista_id: ObjectId, nombre: str) -> bool:
+    """
+    Restar un registro a la entidad del paciente (eliminándola al llegar a 0)
+
+    Returns:
+        bool: True si el paciente ya no tiene registros
+    """
+    paciente = await db.pacientes.find_one_and_update(
+        {"especialistaId": especialista_id, "clave": clave_paciente(nombre)},
+        {"$inc": {"registros": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not paciente or paciente["registros"] > 0:
+        return False
+
+    resultado = await db.pacientes.delete_one({"_id": paciente["_id"], "registros": {"$lte": 0}})
+    return resultado.deleted_count == 1
+
+
+# ============================================
+# RECONSTRUCCIÓN
+# ============================================
+
+async def reconstruir_pacientes(db, especialista_id: Optional[ObjectId] = None) -> dict:
+    """
+    Reconstruir las entidades de pacientes (y el HyperLogLog) desde los registros
+
+    El HyperLogLog solo se reconstruye al procesar todos los especialistas.
+
+    Returns:
+        dict {especialistaId: pacientes}
+    """
+    query = {"especialistaId": especialista_id} if especialista_id else {}
+    proyeccion = {"especialistaId": 1, "paciente.nombre": 1, "fechaAnalisis": 1}
+
+    entidades: dict = {}
+    async for registro in db.registros.find(query, proyeccion).sort("fechaAnalisis", 1):
+        nombre = registro.get("paciente", {}).get("nombre") or ""
+        clave = (registro["especialistaId"], clave_paciente(nombre))
+        entidad = entidades.get(clave)
+        if entidad is None:
+            entidades[clave] = {
+                "especialistaId": clave[0],
+                "clave": clave[1],
+                "nombre": nombre,
+                "registros": 1,
+                "creado": registro["fechaAnalisis"],
+                "ultimoRegistro": registro["fechaAnalisis"]
+            }
+        else:
+            entidad["registros"] += 1
+            entidad["ultimoRegistro"] = registro["fechaAnalisis"]
+
+    await db.pacientes.delete_many(query)
+    if entidades:
+        await db.pacientes.insert_many(list(entidades.values()), ordered=False)
+
+    if especialista_id is None:
+        await db[COLECCION_GLOBALES].delete_one({"_id": HLL_ID})
+        await _actualizar_hll(db, list({clave for _, clave in entidades}))
+
+    conteo: dict = {}
+    for esp_id, _ in entidades:
+        conteo[esp_id] = conteo.get(esp_id, 0) + 1
+    return conteo
@@ -1,20 +1,24 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+from pymongo.errors import ExecutionTimeout, ServerSelectionTimeoutError, WaitQueueTimeoutError
 import logging
 import os
-from pathlib import Path
 from datetime import datetime
 
 from app.config import settings
-from app.db.database import connect_to_mongo, close_mongo_connection
+from app.db.database import connect_to_mongo, close_mongo_connection, metricas_mongodb
+from app.core.auth import password_pool
+from app.core.cache import dashboard_cache
+from app.core.almacenamiento import get_almacenamiento, cerrar_almacenamiento
 from app.routes import (
     auth_router,
     especialistas_router,
     registros_router,
-    dashboard_router
+    dashboard_router,
+    archivos_router,
+    importaciones_router
 )
 
 # Configurar logging
@@ -33,19 +37,8 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Iniciando aplicación SCANNA...")
     await connect_to_mongo()
     
-    # ✅ CORRECCIÓN: Crear directorios dentro de uploads/
-    upload_base = Path(settings.upload_folder)
-    upload_base.mkdir(exist_ok=True)
-    
-    originales_path = upload_base / "originales"
-    mapas_path = upload_base / "mapas_atencion"
-    
-    originales_path.mkdir(exist_ok=True)
-    mapas_path.mkdir(exist_ok=True)
-    
-    logger.info(f"📁 Directorio base: {upload_base.absolute()}")
-    logger.info(f"📁 Originales: {originales_path.absolute()}")
-    logger.info(f"📁 Mapas de atención: {mapas_path.absolute()}")
+    # Backend de almacenamiento (disco local o S3/MinIO)
+    logger.info(f"📁 Almacenamiento: {get_almacenamiento().metricas()}")
     
     logger.info("✅ Aplicación lista")
     
@@ -54,6 +47,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Cerrando aplicación...")
     await close_mongo_connection()
+    await cerrar_almacenamiento()
+    password_pool.shutdown()
     logger.info("👋 Aplicación cerrada")
 
 
@@ -73,6 +68,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
@@ -85,6 +81,20 @@ async def log_requests(request: Request, call_next):
     return response
 
 
+# Base de datos saturada o consulta demasiado lenta: 503 inmediato en lugar
+# de mantener la petición abierta (el cliente puede reintentar)
+@app.exception_handler(ExecutionTimeout)
+@app.exception_handler(WaitQueueTimeoutError)
+@app.exception_handler(ServerSelectionTimeoutError)
+async def mongo_timeout_handler(request: Request, exc: Exception):
+    logger.warning(f"⏱️ Timeout de MongoDB en {request.url.path}: {type(exc).__name__}")
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "2"},
+        content={"detail": "Base de datos ocupada, intente de nuevo en unos segundos"}
+    )
+
+
 # Exception handler global
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -103,20 +113,10 @@ app.include_router(auth_router)
 app.include_router(especialistas_router)
 app.include_router(registros_router)
 app.include_router(dashboard_router)
+app.include_router(importaciones_router)
 
-
-# ✅ Servir archivos estáticos
-# IMPORTANTE: Los StaticFiles DEBEN montarse DESPUÉS de los routers
-
-# Servir toda la carpeta uploads/ (RECOMENDADO - más simple)
-upload_path = Path(settings.upload_folder)
-if upload_path.exists():
-    app.mount("/uploads", StaticFiles(directory=str(upload_path)), name="uploads")
-    logger.info(f"📂 Sirviendo /uploads desde {upload_path.absolute()}")
-else:
-    upload_path.mkdir(parents=True, exist_ok=True)
-    app.mount("/uploads", StaticFiles(directory=str(upload_path)), name="uploads")
-    logger.warning(f"⚠️ Directorio 'uploads' creado en {upload_path.absolute()}")
+# Imágenes: /uploads/<ruta> (archivo local o redirección a URL pre-firmada)
+app.include_router(archivos_router)
 
 
 # Rutas básicas
@@ -141,19 +141,16 @@ async def health_check():
         # Verificar conexión a MongoDB
         await db.command("ping")
         
-        # Verificar directorios de imágenes
-        upload_base = Path(settings.upload_folder)
-        dirs_status = {
-            "uploads": upload_base.exists(),
-            "originales": (upload_base / "originales").exists(),
-            "mapas_atencion": (upload_base / "mapas_atencion").exists()
-        }
+        # Backend de almacenamiento de imágenes
+        almacenamiento = get_almacenamiento()
         
         return {
             "status": "healthy",
             "database": "connected",
-            "storage": dirs_status,
-            "upload_path": str(upload_base.absolute()),
+            "mongodb": metricas_mongodb(),
+            "storage": almacenamiento.metricas(),
+            "password_pool": password_pool.metricas(),
+            "dashboard_cache": dashboard_cache.metricas(),
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -179,12 +176,13 @@ async def api_info():
             "auth": "/auth",
             "especialistas": "/especialistas",
             "registros": "/registros",
+            "importaciones": "/importaciones",
             "dashboard": "/dashboard"
         },
         "static_files": {
-            "uploads": "/uploads",
-            "originales": "/uploads/originales",
-            "mapas_atencion": "/uploads/mapas_atencion"
+            "uploads": "/uploads/<ruta>",
+            "blobs": "/uploads/blobs/<ab>/<cd>/<sha256>.<ext> (rutaOriginal, rutaMapaAtencion)",
+            "derivados": "/uploads/<ruta>?tam=miniatura|mediano|completo (WebP)"
         },
         "documentation": "/docs"
     }
@@ -194,21 +192,30 @@ async def api_info():
 if settings.mongodb_uri.startswith("mongodb://localhost"):
     @app.get("/debug/files")
     async def list_files():
-        """Listar archivos en directorios de imágenes (solo desarrollo)"""
+        """Resumen del almacenamiento de imágenes (solo desarrollo)"""
+        from app.db.database import get_database
+        
         try:
-            upload_base = Path(settings.upload_folder)
-            originales_path = upload_base / "originales"
-            mapas_path = upload_base / "mapas_atencion"
-            
-            originales = list(originales_path.glob("*")) if originales_path.exists() else []
-            mapas = list(mapas_path.glob("*")) if mapas_path.exists() else []
+            db = get_database()
+            # Conteos desde la colección `blobs` (sin recorrer directorios)
+            resumen = await db.blobs.aggregate([
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "bytes": {"$sum": "$tamano"},
+                    "referencias": {"$sum": "$refs"},
+                    "huerfanos": {"$sum": {"$cond": [{"$lte": ["$refs", 0]}, 1, 0]}}
+                }}
+            ]).to_list(length=1)
+            resumen = resumen[0] if resumen else {"total": 0, "bytes": 0, "referencias": 0, "huerfanos": 0}
+            resumen.pop("_id", None)
             
             return {
-                "base_path": str(upload_base.absolute()),
-                "originales": [f.name for f in originales if f.is_file()],
-                "mapas_atencion": [f.name for f in mapas if f.is_file()],
-                "total_originales": len([f for f in originales if f.is_file()]),
-                "total_mapas": len([f for f in mapas if f.is_file()])
+                "almacenamiento": get_almacenamiento().metricas(),
+                "blobs": resumen,
+                "registros_sin_digest": await db.registros.count_documents(
+                    {"imagenes.digestOriginal": {"$exists": False}}
+                )
             }
         except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
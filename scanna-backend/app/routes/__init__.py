@@ -2,10 +2,14 @@ from .auth import router as auth_router
 from .especialistas import router as especialistas_router
 from .registros import router as registros_router
 from .dashboard import router as dashboard_router
+from .archivos import router as archivos_router
+from .importaciones import router as importaciones_router
 
 __all__ = [
     "auth_router",
     "especialistas_router",
     "registros_router",
-    "dashboard_router"
+    "dashboard_router",
+    "archivos_router",
+    "importaciones_router"
 ]
\ No newline at end of file
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import RedirectResponse, Response
+from PIL import Image
+from typing import Optional
+import stat
+import logging
+
+from app.config import settings
+from app.core.almacenamiento import AlmacenamientoLocal, get_almacenamiento, tipo_contenido
+from app.core.derivados import PREFIJO_DERIVADOS, VARIANTES, CACHE_INMUTABLE, es_inmutable, obtener_derivado
+from app.core.envio import responder_archivo
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/uploads", tags=["Archivos"])
+
+
+@router.api_route("/{ruta:path}", methods=["GET", "HEAD"])
+async def servir_archivo(request: Request, ruta: str, tam: Optional[str] = None):
+    """
+    Servir una imagen guardada (`rutaOriginal`, `rutaMapaAtencion`)
+
+    - `?tam=miniatura|mediano|completo`: derivado WebP (se genera la primera
+      vez que se pide y queda guardado). No se aceptan sobre derivados, y
+      si el archivo no es una imagen decodificable se responde 415
+    - Almacenamiento S3: redirección a una URL pre-firmada; el navegador
+      descarga directo del bucket y los bytes no pasan por la API
+    - Almacenamiento local: ETag fuerte, 304 con If-None-Match, rangos de
+      bytes (206) y sendfile si el servidor lo soporta
+
+    Los blobs (y sus derivados) no cambian nunca: se sirven con
+    `Cache-Control: immutable`.
+
+    Mantiene las URLs `/uploads/<ruta>` que usa el frontend.
+    """
+    almacenamiento = get_almacenamiento()
+    cache_control = CACHE_INMUTABLE if es_inmutable(ruta) else None
+
+    if tam is not None:
+        if tam not in VARIANTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tamaño inválido: {tam}. Use: {', '.join(VARIANTES)}"
+            )
+        if ruta.startswith(f"{PREFIJO_DERIVADOS}/"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Los derivados no admiten el parámetro tam"
+            )
+        try:
+            ruta = await obtener_derivado(ruta, tam)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Archivo no encontrado"
+            )
+        except (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            # OSError: JPEG truncado o corrupto (Image.load)
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="El archivo no es una imagen que se pueda redimensionar"
+            )
+
+    url = await almacenamiento.url_firmada(ruta, cache_control=cache_control)
+    if url:
+        # La redirección se puede cachear mientras la firma siga vigente;
+        # ETag, 304 y rangos los resuelve el propio bucket
+        max_age = max(0, min(300, settings.s3_presign_expiration // 2))
+        return RedirectResponse(
+            url,
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": f"private, max-age={max_age}"}
+        )
+
+    if not isinstance(almacenamiento, AlmacenamientoLocal):
+        # Backend sin URLs firmadas ni archivos en disco: servir los bytes
+        try:
+            contenido = await almacenamiento.leer(ruta)
+        except (FileNotFoundError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Archivo no encontrado"
+            )
+        return Response(
+            contenido,
+            media_type=tipo_contenido(ruta),
+            headers={"Cache-Control": cache_control} if cache_control else None
+        )
+
+    try:
+        estado = await almacenamiento.estado(ruta)
+        encontrado = stat.S_ISREG(estado.st_mode)
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        encontrado = False
+
+    if not encontrado:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archivo no encontrado"
+        )
+
+    return responder_archivo(
+        request,
+        almacenamiento.ruta_absoluta(ruta),
+        ruta,
+        estado,
+        media_type=tipo_contenido(ruta),
+        cache_control=cache_control
+    )
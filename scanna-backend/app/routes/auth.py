@@ -8,12 +8,12 @@ from app.db.models import (
     EspecialistaResponse
 )
 from app.core.auth import (
-    get_password_hash, 
-    verify_password, 
+    get_password_hash_async,
+    verify_password_async,
     create_access_token, 
     get_current_active_especialista
 )
-from app.db.database import get_database
+from app.db.database import get_database, max_time_ms
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Autenticación"])
@@ -50,7 +50,7 @@ async def registrar_especialista(especialista: EspecialistaCreate):
         "nombre": especialista.nombre,
         "apellido": especialista.apellido,
         "email": especialista.email,
-        "password": get_password_hash(especialista.password),
+        "password": await get_password_hash_async(especialista.password),
         "area": especialista.area,
         "activo": True,
         "fechaRegistro": datetime.utcnow(),
@@ -75,13 +75,11 @@ async def registrar_especialista(especialista: EspecialistaCreate):
         # Insertar en la base de datos
         result = await db.especialistas.insert_one(especialista_doc)
         
-        # Obtener el especialista creado
-        created_especialista = await db.especialistas.find_one({"_id": result.inserted_id})
+        # Responder con el documento insertado (sin volver a leerlo);
+        # response_model deja fuera el password
+        especialista_doc["_id"] = str(result.inserted_id)
         
-        # Convertir ObjectId a string para la respuesta
-        created_especialista["_id"] = str(created_especialista["_id"])
-        
-        return created_especialista
+        return especialista_doc
         
     except Exception as e:
         # Manejo de errores más específico
@@ -102,10 +100,13 @@ async def login(credentials: EspecialistaLogin):
     db = get_database()
     
     # Buscar especialista por email
-    especialista = await db.especialistas.find_one({"email": credentials.email})
+    especialista = await db.especialistas.find_one(
+        {"email": credentials.email},
+        max_time_ms=max_time_ms("lectura")
+    )
     
-    # Verificar que existe y la contraseña es correcta
-    if not especialista or not verify_password(credentials.password, especialista["password"]):
+    # Verificar que existe y la contraseña es correcta (bcrypt corre en el pool dedicado)
+    if not especialista or not await verify_password_async(credentials.password, especialista["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -1,178 +1,104 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from datetime import datetime, timedelta
 from typing import Dict, List
 
-from app.core.auth import get_current_active_especialista
-from app.db.database import get_database
-from collections import defaultdict
+from app.core.auth import get_current_active_especialista, es_administrador
+from app.core.cache import responder_con_cache
+from app.db.database import get_database_analitica, max_time_ms
+from app.db.pacientes import HLL_REGISTROS, estimar_pacientes_globales
+from app.db.estadisticas import (
+    GRANULARIDADES,
+    dia_local,
+    leer_estadisticas,
+    leer_tendencia,
+    resumen_confianza
+)
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/estadisticas")
 async def obtener_estadisticas_dashboard(
+    request: Request,
     current_especialista: dict = Depends(get_current_active_especialista)
 ):
     """
     Obtener estadísticas para el dashboard principal
+    
+    Respuesta cacheada por especialista (ETag / If-None-Match)
     """
-    db = get_database()
+    return await responder_con_cache(
+        request,
+        current_especialista,
+        "estadisticas",
+        (),
+        lambda: calcular_estadisticas_dashboard(current_especialista)
+    )
+
+
+async def calcular_estadisticas_dashboard(current_especialista: dict) -> dict:
+    """Calcular estadísticas del dashboard principal"""
+    db = get_database_analitica(current_especialista)
     especialista_id = current_especialista["_id"]
     
-    # Fechas para filtros
-    hoy_inicio = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    hoy_fin = hoy_inicio + timedelta(days=1)
-    
-    semana_inicio = hoy_inicio - timedelta(days=7)
-    
-    # 1. Detecciones hoy
-    detecciones_hoy = await db.registros.count_documents({
-        "especialistaId": especialista_id,
-        "fechaAnalisis": {"$gte": hoy_inicio, "$lt": hoy_fin}
-    })
-    
-    # 2. Casos positivos (total)
-    casos_positivos = await db.registros.count_documents({
-        "especialistaId": especialista_id,
-        "resultado": "Anemia"
-    })
-    
-    # 3. Total de pacientes únicos (contando nombres únicos)
-    # Nota: En producción, considera usar un campo de ID de paciente único
-    pipeline_pacientes = [
-        {"$match": {"especialistaId": especialista_id}},
-        {"$group": {"_id": "$paciente.nombre"}},
-        {"$count": "total"}
-    ]
-    result_pacientes = await db.registros.aggregate(pipeline_pacientes).to_list(length=1)
-    total_pacientes = result_pacientes[0]["total"] if result_pacientes else 0
-    
-    # 4. Detecciones esta semana
-    esta_semana = await db.registros.count_documents({
-        "especialistaId": especialista_id,
-        "fechaAnalisis": {"$gte": semana_inicio}
-    })
-    
-    # 5. Distribución por edad
-    distribucion_edad = await calcular_distribucion_edad(db, especialista_id)
-    
-    # 6. Resumen de detecciones
-    total_registros = await db.registros.count_documents({
-        "especialistaId": especialista_id
-    })
-    
-    casos_negativos = await db.registros.count_documents({
-        "especialistaId": especialista_id,
-        "resultado": "No Anemia"
-    })
-    
-    # 7. Confianza promedio (si tienes este dato)
-    # Por ahora, usaremos un valor simulado basado en detecciones
-    confianza_promedio = 90.0 if total_registros > 100 else 85.0
-    
-    # 8. Tasa de detección
+    # Indicadores desde los rollups diarios (O(días), no O(registros))
+    estadisticas = await leer_estadisticas(db, especialista_id)
+    
+    total_registros = estadisticas["total"]
+    casos_positivos = estadisticas["positivos"]
+    
+    # Tasa de detección
     tasa_deteccion = round((casos_positivos / total_registros * 100) if total_registros > 0 else 0, 1)
     
     return {
-        "detecciones_hoy": detecciones_hoy,
+        "detecciones_hoy": estadisticas["hoy"],
         "casos_positivos": casos_positivos,
-        "total_pacientes": total_pacientes,
-        "esta_semana": esta_semana,
-        "distribucion_edad": distribucion_edad,
+        "total_pacientes": estadisticas["total_pacientes"],
+        "esta_semana": estadisticas["semana"],
+        "distribucion_edad": estadisticas["distribucion_edad"],
         "resumen_detecciones": {
             "total_casos": total_registros,
             "positivos": casos_positivos,
-            "negativos": casos_negativos,
+            "negativos": estadisticas["negativos"],
             "tasa_deteccion": tasa_deteccion
         },
-        "confianza_promedio": confianza_promedio
-    }
-
-
-async def calcular_distribucion_edad(db, especialista_id):
-    """
-    Calcular distribución de casos por grupo de edad
-    """
-    # Pipeline de agregación para agrupar por rangos de edad
-    pipeline = [
-        {"$match": {"especialistaId": especialista_id}},
-        {
-            "$bucket": {
-                "groupBy": "$paciente.edad",
-                "boundaries": [0, 11, 21, 31, 41, 51, 61, 200],
-                "default": "Otro",
-                "output": {
-                    "total": {"$sum": 1},
-                    "positivos": {
-                        "$sum": {
-                            "$cond": [{"$eq": ["$resultado", "Anemia"]}, 1, 0]
-                        }
-                    }
-                }
-            }
-        }
-    ]
-    
-    resultados = await db.registros.aggregate(pipeline).to_list(length=10)
-    
-    # Mapear resultados a rangos legibles
-    rangos_map = {
-        0: "0-10",
-        11: "11-20",
-        21: "21-30",
-        31: "31-40",
-        41: "41-50",
-        51: "51-60",
-        61: "61+"
-    }
-    
-    # Construir datos para el gráfico
-    datos_grafico = []
-    total_casos = 0
-    total_positivos = 0
-    mayor_grupo = {"rango": "", "total": 0}
-    
-    for resultado in resultados:
-        rango = rangos_map.get(resultado["_id"], "Otro")
-        total = resultado["total"]
-        positivos = resultado["positivos"]
-        
-        datos_grafico.append({
-            "rango": rango,
-            "total": total,
-            "positivos": positivos,
-            "negativos": total - positivos
-        })
-        
-        total_casos += total
-        total_positivos += positivos
-        
-        if total > mayor_grupo["total"]:
-            mayor_grupo = {"rango": rango, "total": total}
-    
-    return {
-        "total_casos": total_casos,
-        "positivos": total_positivos,
-        "mayor_grupo": mayor_grupo["rango"] if mayor_grupo["rango"] else "N/A",
-        "datos_grafico": sorted(datos_grafico, key=lambda x: x["rango"])
+        # Media real de analisis.confianza (acumuladores incrementales)
+        "confianza_promedio": estadisticas["confianza"]["promedio"],
+        "confianza": estadisticas["confianza"]
     }
 
 
 @router.get("/actividad-reciente")
 async def obtener_actividad_reciente(
+    request: Request,
     limit: int = 10,
     current_especialista: dict = Depends(get_current_active_especialista)
 ):
     """
     Obtener actividad reciente del especialista
+    
+    Respuesta cacheada por especialista (ETag / If-None-Match)
     """
-    db = get_database()
+    return await responder_con_cache(
+        request,
+        current_especialista,
+        "actividad-reciente",
+        (limit,),
+        lambda: calcular_actividad_reciente(current_especialista, limit)
+    )
+
+
+async def calcular_actividad_reciente(current_especialista: dict, limit: int) -> list:
+    """Obtener los últimos registros del especialista"""
+    db = get_database_analitica(current_especialista)
     especialista_id = current_especialista["_id"]
     
-    # Obtener ultimos registros
-    registros = await db.registros.find({
-        "especialistaId": especialista_id
-    }).sort("fechaAnalisis", -1).limit(limit).to_list(length=limit)
+    # Obtener ultimos registros (solo los campos que se muestran)
+    registros = await db.registros.find(
+        {"especialistaId": especialista_id},
+        {"numeroExpediente": 1, "paciente.nombre": 1, "resultado": 1, "fechaAnalisis": 1},
+        max_time_ms=max_time_ms("listado")
+    ).sort("fechaAnalisis", -1).limit(limit).to_list(length=limit)
     
     # Formatear resultados
     actividad = []
@@ -190,60 +116,114 @@ async def obtener_actividad_reciente(
 
 @router.get("/tendencias")
 async def obtener_tendencias(
+    request: Request,
     dias: int = 30,
+    granularidad: str = "dia",
+    incluir_confianza: bool = False,
     current_especialista: dict = Depends(get_current_active_especialista)
 ):
     """
     Obtener tendencias de detecciones en los últimos N días
+    
+    - granularidad: "dia", "semana" (lunes a domingo) o "mes"
+    - Días en la zona horaria configurada (ZONA_HORARIA), no en UTC
+    - Serie completa: los periodos sin registros vienen con total 0
+    
+    Con incluir_confianza=true cada periodo incluye su confianza promedio.
+    Respuesta cacheada por especialista (ETag / If-None-Match)
     """
-    db = get_database()
+    if granularidad not in GRANULARIDADES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Granularidad inválida: {granularidad}. Use: {', '.join(GRANULARIDADES)}"
+        )
+    if not 1 <= dias <= 3660:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="dias debe estar entre 1 y 3660"
+        )
+    
+    return await responder_con_cache(
+        request,
+        current_especialista,
+        "tendencias",
+        (dias, granularidad, incluir_confianza),
+        lambda: calcular_tendencias(current_especialista, dias, granularidad, incluir_confianza)
+    )
+
+
+async def calcular_tendencias(
+    current_especialista: dict,
+    dias: int,
+    granularidad: str,
+    incluir_confianza: bool
+) -> list:
+    """Calcular tendencias desde los rollups (diarios, semanales o mensuales)"""
+    db = get_database_analitica(current_especialista)
     especialista_id = current_especialista["_id"]
     
-    # Fecha de inicio
-    fecha_inicio = datetime.utcnow() - timedelta(days=dias)
+    # Últimos N días locales, incluido hoy
+    hoy = dia_local(datetime.utcnow())
+    desde = hoy - timedelta(days=dias - 1)
     
-    # Pipeline de agregación por día
-    pipeline = [
-        {
-            "$match": {
-                "especialistaId": especialista_id,
-                "fechaAnalisis": {"$gte": fecha_inicio}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": "$fechaAnalisis"
-                    }
-                },
-                "total": {"$sum": 1},
-                "positivos": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$resultado", "Anemia"]}, 1, 0]
-                    }
-                },
-                "negativos": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$resultado", "No Anemia"]}, 1, 0]
-                    }
-                }
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-    
-    resultados = await db.registros.aggregate(pipeline).to_list(length=dias)
+    serie = await leer_tendencia(db, especialista_id, desde, hoy, granularidad)
     
     # Formatear para el frontend
     tendencias = []
-    for resultado in resultados:
-        tendencias.append({
-            "fecha": resultado["_id"],
-            "total": resultado["total"],
-            "positivos": resultado["positivos"],
-            "negativos": resultado["negativos"]
-        })
+    for periodo in serie:
+        punto = {
+            "fecha": periodo["fecha"],
+            "total": periodo["total"],
+            "positivos": periodo["positivos"],
+            "negativos": periodo["negativos"]
+        }
+        if incluir_confianza:
+            confianza = resumen_confianza(periodo["confianza"])
+            punto["confianza_promedio"] = confianza["promedio"]
+            punto["confianza_desviacion"] = confianza["desviacion"]
+        tendencias.append(punto)
     
-    return tendencias
\ No newline at end of file
+    return tendencias
+
+
+@router.get("/organizacion")
+async def obtener_resumen_organizacion(
+    current_especialista: dict = Depends(get_current_active_especialista)
+):
+    """
+    Resumen de toda la organización (solo administradores)
+    
+    Los totales se suman desde estadisticas_totales (un documento por
+    especialista); los pacientes únicos entre especialistas se estiman con
+    HyperLogLog (error estándar ~2%), sin recorrer registros.
+    """
+    if not es_administrador(current_especialista):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden ver el resumen de la organización"
+        )
+    
+    db = get_database_analitica()
+    
+    resumen = await db.estadisticas_totales.aggregate([
+        {
+            "$group": {
+                "_id": None,
+                "especialistas": {"$sum": 1},
+                "total": {"$sum": "$total"},
+                "positivos": {"$sum": "$positivos"},
+                "pacientes": {"$sum": "$pacientes"}
+            }
+        }
+    ], maxTimeMS=max_time_ms("dashboard")).to_list(length=1)
+    resumen = resumen[0] if resumen else {}
+    
+    return {
+        "especialistas": resumen.get("especialistas", 0),
+        "total_registros": resumen.get("total", 0),
+        "casos_positivos": resumen.get("positivos", 0),
+        # Suma por especialista: un paciente visto por dos especialistas cuenta dos veces
+        "pacientes_por_especialista": resumen.get("pacientes", 0),
+        "pacientes_unicos_estimados": await estimar_pacientes_globales(db),
+        "error_estandar_estimacion": round(1.04 / HLL_REGISTROS ** 0.5, 4)
+    }
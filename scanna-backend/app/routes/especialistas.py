@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
-from app.db.models import EspecialistaResponse, EspecialistaUpdate
+from app.db.models import EspecialistaResponse, EspecialistaUpdate, PROYECCION_RESUMEN
 from app.core.auth import get_current_active_especialista
-from app.db.database import get_database
+from app.db.database import get_database, get_database_analitica, max_time_ms
+from app.db.estadisticas import leer_estadisticas
 
 router = APIRouter(prefix="/especialistas", tags=["Especialistas"])
 
@@ -36,23 +38,19 @@ async def actualizar_perfil(
     # Agregar timestamp de actualización
     update_dict["updatedAt"] = datetime.utcnow()
     
-    # Actualizar en la base de datos
-    result = await db.especialistas.update_one(
+    # Actualizar y obtener el especialista actualizado en una sola operación
+    updated_especialista = await db.especialistas.find_one_and_update(
         {"_id": current_especialista["_id"]},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.modified_count == 0:
+    if updated_especialista is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No se realizaron cambios"
         )
     
-    # Obtener especialista actualizado
-    updated_especialista = await db.especialistas.find_one(
-        {"_id": current_especialista["_id"]}
-    )
-    
     updated_especialista["_id"] = str(updated_especialista["_id"])
     return EspecialistaResponse(**updated_especialista)
 
@@ -62,27 +60,20 @@ async def obtener_estadisticas_especialista(
     current_especialista: dict = Depends(get_current_active_especialista)
 ):
     """Obtener estadísticas del especialista"""
-    db = get_database()
+    db = get_database_analitica(current_especialista)
     especialista_id = current_especialista["_id"]
     
-    # Total de análisis realizados
-    total_analisis = await db.registros.count_documents(
-        {"especialistaId": especialista_id}
-    )
-    
-    # Análisis positivos
-    positivos = await db.registros.count_documents(
-        {"especialistaId": especialista_id, "resultado": "Anemia"}
-    )
-    
-    # Análisis negativos
-    negativos = await db.registros.count_documents(
-        {"especialistaId": especialista_id, "resultado": "No Anemia"}
-    )
+    # Totales con el mismo motor que el dashboard (rollups diarios)
+    estadisticas = await leer_estadisticas(db, especialista_id)
+    total_analisis = estadisticas["total"]
+    positivos = estadisticas["positivos"]
+    negativos = estadisticas["negativos"]
     
-    # Últimos 5 análisis
+    # Últimos 5 análisis (resumen, sin aiSummary)
     ultimos_analisis = await db.registros.find(
-        {"especialistaId": especialista_id}
+        {"especialistaId": especialista_id},
+        PROYECCION_RESUMEN,
+        max_time_ms=max_time_ms("listado")
     ).sort("fechaAnalisis", -1).limit(5).to_list(length=5)
     
     # Convertir ObjectIds a strings
@@ -0,0 +1,686 @@
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+import asyncio
+import csv
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+import logging
+
+from app.config import settings
+from app.core.auth import get_current_active_especialista
+from app.core.blobs import guardar_blob
+from app.core.busqueda import CAMPO_TOKENS, generar_tokens_busqueda
+from app.core.cache import invalidar_dashboard
+from app.core.serializacion import BSONJSONResponse
+from app.db.database import get_database
+from app.db.contadores import EXPEDIENTE_REINTENTOS, asignar_numero_expediente, asignar_numeros_expediente
+from app.db.estadisticas import registrar_altas
+from app.routes.registros import decodificar_imagen, liberar_imagenes
+from app.ai import get_model, inferencia_lock
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/importaciones", tags=["Importaciones"])
+
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+#
+# Colección `importaciones` (un documento por trabajo):
+# {
+#   "especialistaId": ObjectId,
+#   "estado": "pendiente" | "procesando" | "completada" | "fallida",
+#   "total": int,            # filas del CSV
+#   "procesados": int,       # filas terminadas (con o sin éxito)
+#   "insertados": int,
+#   "rechazados": int,       # imágenes que no pasaron la validación OOD
+#   "fallidos": int,         # filas con datos o imagen inválidos
+#   "errores": [{"fila", "archivo", "motivo"}],   # últimos MAX_ERRORES
+#   "estadisticasPendientes": bool,   # algún lote no actualizó los rollups
+#   "mensaje": str,          # error fatal o aviso para el operador
+#   "creado", "actualizado", "finalizado": datetime
+# }
+
+EXTENSIONES_IMAGEN = {".jpg", ".jpeg", ".png", ".webp"}
+SEXOS_VALIDOS = {"Masculino", "Femenino", "Otro"}
+MAX_ERRORES = 200
+
+# Sin progreso durante este tiempo, el trabajo se considera interrumpido
+# (p. ej. el servidor se reinició a mitad de la importación)
+TIEMPO_SIN_PROGRESO = timedelta(minutes=15)
+
+# Columnas del CSV (se aceptan también los nombres del formulario de registro)
+COLUMNAS = {
+    "archivo": ("archivo", "imagen"),
+    "nombre": ("nombre", "paciente_nombre"),
+    "edad": ("edad", "paciente_edad"),
+    "sexo": ("sexo", "paciente_sexo"),
+    "numero_expediente": ("numero_expediente", "expediente")
+}
+
+# Referencias a los trabajos en curso (evita que el recolector los cancele)
+_trabajos: set[asyncio.Task] = set()
+
+
+# ============================================
+# LECTURA DEL ZIP Y DEL CSV
+# ============================================
+
+def _guardar_temporal(origen) -> str:
+    """Copiar la subida a un archivo temporal (el UploadFile se cierra al responder)"""
+    with tempfile.NamedTemporaryFile(prefix="importacion-", suffix=".zip", delete=False) as destino:
+        shutil.copyfileobj(origen, destino, length=1024 * 1024)
+        return destino.name
+
+
+def _indice_imagenes(zf: zipfile.ZipFile) -> dict[str, zipfile.ZipInfo]:
+    """Imágenes del ZIP por ruta completa y por nombre de archivo"""
+    indice = {}
+    for info in zf.infolist():
+        if info.is_dir() or info.filename.startswith("__MACOSX/"):
+            continue
+        if Path(info.filename).suffix.lower() not in EXTENSIONES_IMAGEN:
+            continue
+        indice[info.filename] = info
+        indice.setdefault(Path(info.filename).name, info)
+    return indice
+
+
+def _leer_csv_del_zip(zf: zipfile.ZipFile) -> Optional[bytes]:
+    for info in zf.infolist():
+        if info.filename.lower().endswith(".csv") and not info.filename.startswith("__MACOSX/"):
+            return zf.read(info)
+    return None
+
+
+def parsear_csv(contenido: bytes) -> list[dict]:
+    """
+    Interpretar el CSV de pacientes
+
+    Columnas: archivo, nombre, edad, sexo y (opcional) numero_expediente.
+
+    Returns:
+        list[dict]: Filas normalizadas con su número de fila (1 = primera
+        fila de datos); las filas inválidas llevan la clave "motivo"
+
+    Raises:
+        HTTPException: Si el CSV no tiene las columnas requeridas
+    """
+    try:
+        texto = contenido.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        texto = contenido.decode("latin-1")
+
+    lector = csv.DictReader(io.StringIO(texto))
+    encabezados = {(nombre or "").strip().lower(): nombre for nombre in (lector.fieldnames or [])}
+
+    columnas = {}
+    for campo, alias in COLUMNAS.items():
+        columnas[campo] = next((encabezados[a] for a in alias if a in encabezados), None)
+
+    faltantes = [campo for campo in ("archivo", "nombre", "edad", "sexo") if not columnas[campo]]
+    if faltantes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Faltan columnas en el CSV: {', '.join(faltantes)}"
+        )
+
+    filas = []
+    for numero, fila in enumerate(lector, start=1):
+        valor = lambda campo: (fila.get(columnas[campo]) or "").strip() if columnas[campo] else ""
+        registro = {
+            "fila": numero,
+            "archivo": valor("archivo"),
+            "nombre": valor("nombre"),
+            "sexo": valor("sexo").capitalize(),
+            "numeroExpediente": valor("numero_expediente") or None
+        }
+
+        try:
+            registro["edad"] = int(valor("edad"))
+        except ValueError:
+            registro["edad"] = None
+
+        if not registro["archivo"]:
+            registro["motivo"] = "Fila sin archivo de imagen"
+        elif not 1 <= len(registro["nombre"]) <= 200:
+            registro["motivo"] = "Nombre vacío o demasiado largo"
+        elif registro["edad"] is None or not 0 <= registro["edad"] <= 150:
+            registro["motivo"] = "Edad inválida (0-150)"
+        elif registro["sexo"] not in SEXOS_VALIDOS:
+            registro["motivo"] = "Sexo debe ser 'Masculino', 'Femenino' u 'Otro'"
+
+        filas.append(registro)
+
+    return filas
+
+
+def _leer_imagenes(zf: zipfile.ZipFile, indice: dict, filas: list) -> list:
+    """
+    Leer del ZIP las imágenes de un lote (secuencial: ZipFile no es seguro
+    entre hilos; la decodificación sí se hace en paralelo)
+
+    Returns:
+        list: bytes de cada fila, o str con el motivo del error
+    """
+    datos = []
+    for fila in filas:
+        info = indice.get(fila["archivo"]) or indice.get(Path(fila["archivo"]).name)
+        if info is None:
+            datos.append("Imagen no encontrada en el ZIP")
+        elif info.file_size == 0:
+            datos.append("El archivo está vacío")
+        elif info.file_size > settings.max_upload_size:
+            datos.append(f"El archivo es muy grande. Máximo: {settings.max_upload_size / 1024 / 1024}MB")
+        else:
+            datos.append(zf.read(info))
+    return datos
+
+
+# ============================================
+# PROCESAMIENTO POR LOTES
+# ============================================
+
+async def _decodificar(data: bytes):
+    try:
+        return await asyncio.to_thread(decodificar_imagen, data)
+    except HTTPException as e:
+        return e.detail
+    except Exception as e:
+        return f"Error procesando imagen: {str(e)}"
+
+
+async def _insertar_en_orden(db, documentos: list, origen: list, errores: list) -> list:
+    """
+    insert_many ordenado; si un documento falla (p. ej. expediente repetido)
+    se registra el error, se liberan sus imágenes y se sigue con el resto
+
+    Un número de expediente generado que choca con uno antiguo no es un
+    error de la fila: se asigna otro y se reintenta (como en crear_registro).
+
+    Args:
+        db: Base de datos
+        documentos: Registros a insertar
+        origen: (fila, archivo, expediente generado) de cada documento,
+            para reportar errores
+        errores: Lista donde se agregan los errores
+
+    Returns:
+        list: Documentos insertados
+    """
+    insertados = []
+    reintentos: dict = {}
+
+    while documentos:
+        try:
+            await db.registros.insert_many(documentos, ordered=True)
+            insertados.extend(documentos)
+            break
+        except BulkWriteError as e:
+            if not e.details.get("writeErrors"):
+                raise
+            error = e.details["writeErrors"][0]
+            indice = error["index"]
+            fallido = documentos[indice]
+            fila, archivo, generado = origen[indice]
+
+            insertados.extend(documentos[:indice])
+
+            if error.get("code") == 11000 and generado and reintentos.get(fila, 0) < EXPEDIENTE_REINTENTOS - 1:
+                reintentos[fila] = reintentos.get(fila, 0) + 1
+                logger.warning(f"⚠️ Expediente {fallido['numeroExpediente']} ocupado (fila {fila}), reintentando")
+                fallido["numeroExpediente"] = await asignar_numero_expediente(db)
+                documentos = documentos[indice:]
+                origen = origen[indice:]
+                continue
+
+            if error.get("code") != 11000:
+                motivo = error.get("errmsg", "Error al insertar")
+            elif generado:
+                motivo = "Conflicto asignando número de expediente"
+            else:
+                motivo = f"El número de expediente '{fallido['numeroExpediente']}' ya existe"
+            errores.append({"fila": fila, "archivo": archivo, "motivo": motivo})
+            await liberar_imagenes(db, fallido["imagenes"])
+            documentos = documentos[indice + 1:]
+            origen = origen[indice + 1:]
+
+    return insertados
+
+
+async def procesar_lote(db, especialista_id: ObjectId, filas: list, datos: list) -> dict:
+    """
+    Procesar un lote de filas: decodificar, analizar, guardar e insertar
+
+    Args:
+        db: Base de datos
+        especialista_id: Dueño de los registros
+        filas: Filas del CSV (ya validadas)
+        datos: bytes de la imagen de cada fila (o str con el error)
+
+    Returns:
+        dict con insertados, rechazados, fallidos y errores
+    """
+    errores = []
+    rechazados = 0
+
+    # 1. Decodificar en paralelo (hilos) las filas cuya imagen se pudo leer
+    legibles = []
+    for fila, data in zip(filas, datos):
+        if isinstance(data, bytes):
+            legibles.append((fila, data))
+        else:
+            errores.append({"fila": fila["fila"], "archivo": fila["archivo"], "motivo": data})
+
+    imagenes = await asyncio.gather(*(_decodificar(data) for _, data in legibles))
+
+    validas = []
+    for (fila, data), imagen in zip(legibles, imagenes):
+        if isinstance(imagen, str):
+            errores.append({"fila": fila["fila"], "archivo": fila["archivo"], "motivo": imagen})
+        else:
+            validas.append((fila, data, imagen))
+
+    # 2. Inferencia por lotes (un forward por cada ai_batch_size imágenes)
+    model = get_model()
+    analizadas = []
+    for inicio in range(0, len(validas), settings.ai_batch_size):
+        grupo = validas[inicio:inicio + settings.ai_batch_size]
+        async with inferencia_lock:
+            resultados = await asyncio.to_thread(
+                model.predict_batch, [imagen for _, _, imagen in grupo], True
+            )
+        for (fila, data, _), resultado in zip(grupo, resultados):
+            if resultado.get("rechazada"):
+                rechazados += 1
+                calidad = resultado["validacion_calidad"]
+                errores.append({
+                    "fila": fila["fila"],
+                    "archivo": fila["archivo"],
+                    "motivo": (
+                        f"Imagen rechazada por baja calidad "
+                        f"(confianza {calidad['confianza_ood']}%, umbral {calidad['umbral']}%)"
+                    )
+                })
+            else:
+                analizadas.append((fila, data, resultado))
+
+    if not analizadas:
+        return {"insertados": 0, "rechazados": rechazados, "fallidos": len(errores) - rechazados, "errores": errores}
+
+    # 3. Números de expediente: un solo $inc para todo el lote
+    sin_numero = [fila for fila, _, _ in analizadas if not fila["numeroExpediente"]]
+    for fila, numero in zip(sin_numero, await asignar_numeros_expediente(db, len(sin_numero))):
+        fila["numeroExpediente"] = numero
+        fila["expedienteGenerado"] = True
+
+    # 4. Guardar imágenes en paralelo (blobs por contenido: idempotente)
+    limite = asyncio.Semaphore(settings.import_concurrencia)
+
+    async def guardar(fila: dict, data: bytes) -> dict:
+        async with limite:
+            return await guardar_blob(db, data, Path(fila["archivo"]).suffix.lower())
+
+    blobs = await asyncio.gather(
+        *(guardar(fila, data) for fila, data, _ in analizadas),
+        return_exceptions=True
+    )
+
+    # 5. Documentos (mismo formato que crear_registro, sin mapa ni explicación)
+    documentos = []
+    origen = []
+    for (fila, _, resultado), blob in zip(analizadas, blobs):
+        if isinstance(blob, Exception):
+            errores.append({"fila": fila["fila"], "archivo": fila["archivo"], "motivo": f"Error guardando imagen: {blob}"})
+            continue
+
+        ahora = datetime.utcnow()
+        documento = {
+            "numeroExpediente": fila["numeroExpediente"],
+            "paciente": {
+                "nombre": fila["nombre"],
+                "edad": fila["edad"],
+                "sexo": fila["sexo"]
+            },
+            "especialistaId": especialista_id,
+            "imagenes": {
+                "rutaOriginal": blob["ruta"],
+                "rutaMapaAtencion": None,
+                "digestOriginal": blob["digest"],
+                "digestMapaAtencion": None
+            },
+            "analisis": {
+                "resultado": resultado["resultado"],
+                "aiSummary": None,
+                "confianza": resultado["confianza"],
+                "procesadoConIA": True
+            },
+            "resultado": resultado["resultado"],
+            CAMPO_TOKENS: generar_tokens_busqueda(fila["nombre"]),
+            "fechaAnalisis": ahora,
+            "createdAt": ahora,
+            "updatedAt": ahora
+        }
+        if resultado.get("validacion_calidad"):
+            documento["validacionCalidad"] = resultado["validacion_calidad"]
+        documentos.append(documento)
+        origen.append((fila["fila"], fila["archivo"], fila.get("expedienteGenerado", False)))
+
+    # 6. Insertar en trozos ordenados
+    insertados = []
+    try:
+        for inicio in range(0, len(documentos), settings.import_chunk_size):
+            fin = inicio + settings.import_chunk_size
+            insertados.extend(await _insertar_en_orden(db, documentos[inicio:fin], origen[inicio:fin], errores))
+    except Exception:
+        # Error de conexión a mitad del lote: no dejar referencias colgando
+        guardados = {id(documento) for documento in insertados}
+        for documento in documentos:
+            if id(documento) not in guardados:
+                await liberar_imagenes(db, documento["imagenes"])
+        raise
+
+    # 7. Rollups del dashboard agrupados por día
+    error_estadisticas = None
+    if insertados:
+        try:
+            await registrar_altas(db, insertados)
+        except Exception as e:
+            # registrar_altas ya marcó al especialista como pendiente
+            logger.warning(f"⚠️ Error actualizando estadísticas (quedan pendientes de reconstruir): {e}")
+            error_estadisticas = str(e)
+
+    return {
+        "insertados": len(insertados),
+        "rechazados": rechazados,
+        "fallidos": len(errores) - rechazados,
+        "errores": errores,
+        "error_estadisticas": error_estadisticas
+    }
+
+
+async def _ejecutar_importacion(importacion_id: ObjectId, especialista_id: ObjectId, ruta_zip: str, filas: list) -> None:
+    """Trabajo en segundo plano: procesa el ZIP por lotes y reporta el progreso"""
+    db = get_database()
+    inicio = datetime.utcnow()
+
+    try:
+        await db.importaciones.update_one(
+            {"_id": importacion_id},
+            {"$set": {"estado": "procesando", "actualizado": datetime.utcnow()}}
+        )
+
+        zf = await asyncio.to_thread(zipfile.ZipFile, ruta_zip)
+        try:
+            indice = await asyncio.to_thread(_indice_imagenes, zf)
+
+            for posicion in range(0, len(filas), settings.import_chunk_size):
+                lote = filas[posicion:posicion + settings.import_chunk_size]
+
+                # Filas con datos inválidos: se reportan sin leer su imagen
+                invalidas = [fila for fila in lote if "motivo" in fila]
+                validas = [fila for fila in lote if "motivo" not in fila]
+
+                resumen = {"insertados": 0, "rechazados": 0, "fallidos": 0, "errores": []}
+                if validas:
+                    datos = await asyncio.to_thread(_leer_imagenes, zf, indice, validas)
+                    resumen = await procesar_lote(db, especialista_id, validas, datos)
+                
+                # Los rollups ya cambiaron: el dashboard no debe seguir
+                # respondiendo 304 con las cifras previas a la importación
+                if resumen["insertados"]:
+                    await invalidar_dashboard(db, especialista_id)
+                
+                avisos = {}
+                if resumen.get("error_estadisticas"):
+                    avisos = {
+                        "estadisticasPendientes": True,
+                        "mensaje": (
+                            "Las estadísticas del dashboard no se actualizaron por completo "
+                            f"({resumen['error_estadisticas']}). Ejecute "
+                            "scripts/reconstruir_estadisticas.py --pendientes"
+                        )
+                    }
+
+                errores = [
+                    {"fila": fila["fila"], "archivo": fila["archivo"], "motivo": fila["motivo"]}
+                    for fila in invalidas
+                ] + resumen["errores"]
+
+                await db.importaciones.update_one(
+                    {"_id": importacion_id},
+                    {
+                        "$inc": {
+                            "procesados": len(lote),
+                            "insertados": resumen["insertados"],
+                            "rechazados": resumen["rechazados"],
+                            "fallidos": resumen["fallidos"] + len(invalidas)
+                        },
+                        "$push": {"errores": {"$each": errores, "$slice": -MAX_ERRORES}},
+                        "$set": {"actualizado": datetime.utcnow(), **avisos}
+                    }
+                )
+        finally:
+            await asyncio.to_thread(zf.close)
+
+        await db.importaciones.update_one(
+            {"_id": importacion_id},
+            {"$set": {"estado": "completada", "finalizado": datetime.utcnow(), "actualizado": datetime.utcnow()}}
+        )
+        logger.info(f"✅ Importación {importacion_id} completada en {(datetime.utcnow() - inicio).total_seconds():.1f}s")
+
+    except Exception as e:
+        logger.error(f"❌ Error en importación {importacion_id}: {e}", exc_info=True)
+        await db.importaciones.update_one(
+            {"_id": importacion_id},
+            {"$set": {
+                "estado": "fallida",
+                "mensaje": str(e),
+                "finalizado": datetime.utcnow(),
+                "actualizado": datetime.utcnow()
+            }}
+        )
+
+    finally:
+        # Primero el ZIP temporal (puede pesar cientos de MB): que un error
+        # al invalidar no lo deje en disco
+        try:
+            await asyncio.to_thread(os.remove, ruta_zip)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo eliminar el ZIP temporal {ruta_zip}: {e}")
+        try:
+            await invalidar_dashboard(db, especialista_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Error invalidando la caché del dashboard: {e}")
+
+
+def _formatear_importacion(importacion: dict) -> dict:
+    """Documento de la importación con porcentaje y estado efectivo"""
+    importacion["id"] = str(importacion.pop("_id"))
+    importacion.pop("especialistaId", None)
+
+    total = importacion.get("total") or 0
+    importacion["porcentaje"] = round(importacion.get("procesados", 0) * 100 / total, 1) if total else 100.0
+
+    if (
+        importacion["estado"] in ("pendiente", "procesando")
+        and datetime.utcnow() - importacion["actualizado"] > TIEMPO_SIN_PROGRESO
+    ):
+        importacion["estado"] = "interrumpida"
+
+    return importacion
+
+
+# ============================================
+# ENDPOINTS
+# ============================================
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def crear_importacion(
+    archivo: UploadFile = File(...),
+    pacientes: Optional[UploadFile] = File(None),
+    current_especialista: dict = Depends(get_current_active_especialista)
+):
+    """
+    📦 Importar registros en bloque (campañas de tamizaje)
+    
+    Recibe un ZIP con las imágenes y un CSV de pacientes (dentro del ZIP o
+    en el campo `pacientes`). El CSV funciona como manifiesto: cada fila
+    indica la imagen (`archivo`, ruta o nombre dentro del ZIP) y los datos
+    del paciente (`nombre`, `edad`, `sexo`, `numero_expediente` opcional).
+    
+    La importación corre en segundo plano por lotes:
+    - Decodificación de imágenes en paralelo
+    - Inferencia por lotes (un forward del ViT por lote)
+    - Escritura concurrente de imágenes
+    - `insert_many` ordenado por trozos
+    
+    No se genera mapa de atención ni explicación con Gemini (se pueden
+    obtener después con `/registros/{id}/reanalizar`). Las imágenes que no
+    pasan la validación de calidad no se guardan y se reportan como rechazadas.
+    
+    Returns:
+        Identificador del trabajo; el avance se consulta en `GET /importaciones/{id}`
+    """
+    db = get_database()
+    
+    if not (archivo.filename or "").lower().endswith(".zip"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo debe ser un ZIP con las imágenes"
+        )
+    
+    if archivo.size is not None and archivo.size > settings.import_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El ZIP es muy grande. Máximo: {settings.import_max_size / 1024 / 1024}MB"
+        )
+    
+    ruta_zip = await asyncio.to_thread(_guardar_temporal, archivo.file)
+    
+    try:
+        try:
+            zf = await asyncio.to_thread(zipfile.ZipFile, ruta_zip)
+        except zipfile.BadZipFile:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El archivo no es un ZIP válido"
+            )
+        
+        with zf:
+            if pacientes is not None:
+                contenido_csv = await pacientes.read()
+            else:
+                contenido_csv = await asyncio.to_thread(_leer_csv_del_zip, zf)
+        
+        if not contenido_csv:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Falta el CSV de pacientes (dentro del ZIP o en el campo 'pacientes')"
+            )
+        
+        filas = parsear_csv(contenido_csv)
+        
+        if not filas:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El CSV no tiene filas"
+            )
+        if len(filas) > settings.import_max_registros:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo {settings.import_max_registros} registros por importación"
+            )
+    
+    except BaseException:
+        await asyncio.to_thread(os.remove, ruta_zip)
+        raise
+    
+    ahora = datetime.utcnow()
+    importacion = {
+        "especialistaId": current_especialista["_id"],
+        "estado": "pendiente",
+        "archivo": archivo.filename,
+        "total": len(filas),
+        "procesados": 0,
+        "insertados": 0,
+        "rechazados": 0,
+        "fallidos": 0,
+        "errores": [],
+        "creado": ahora,
+        "actualizado": ahora
+    }
+    result = await db.importaciones.insert_one(importacion)
+    
+    tarea = asyncio.create_task(
+        _ejecutar_importacion(result.inserted_id, current_especialista["_id"], ruta_zip, filas)
+    )
+    _trabajos.add(tarea)
+    tarea.add_done_callback(_trabajos.discard)
+    
+    logger.info(f"📦 Importación {result.inserted_id} creada: {len(filas)} filas")
+    
+    return {
+        "id": str(result.inserted_id),
+        "estado": "pendiente",
+        "total": len(filas)
+    }
+
+
+@router.get("/")
+async def listar_importaciones(
+    current_especialista: dict = Depends(get_current_active_especialista)
+):
+    """
+    📋 Últimas importaciones del especialista (sin el detalle de errores)
+    """
+    db = get_database()
+    
+    cursor = db.importaciones.find(
+        {"especialistaId": current_especialista["_id"]},
+        {"errores": 0}
+    ).sort("creado", -1).limit(20)
+    
+    importaciones = [_formatear_importacion(doc) for doc in await cursor.to_list(length=20)]
+    return BSONJSONResponse(importaciones)
+
+
+@router.get("/{importacion_id}")
+async def obtener_importacion(
+    importacion_id: str,
+    current_especialista: dict = Depends(get_current_active_especialista)
+):
+    """
+    📊 Estado y progreso de una importación
+    
+    Incluye contadores (procesados, insertados, rechazados, fallidos),
+    porcentaje de avance y los últimos errores por fila.
+    """
+    db = get_database()
+    
+    if not ObjectId.is_valid(importacion_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de importación inválido"
+        )
+    
+    importacion = await db.importaciones.find_one({
+        "_id": ObjectId(importacion_id),
+        "especialistaId": current_especialista["_id"]
+    })
+    
+    if not importacion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Importación no encontrada"
+        )
+    
+    return BSONJSONResponse(_formatear_importacion(importacion))
@@ -1,19 +1,34 @@
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import Optional, List
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from PIL import Image
+import asyncio
 import io
 import logging
 
-from app.db.models import RegistroResponse
-from app.core.auth import get_current_active_especialista
-from app.core.utils import save_uploaded_image, generate_numero_expediente, delete_file, get_file_path
-from app.db.database import get_database
+from app.db.models import RegistroResponse, RegistroResumen, PROYECCION_RESUMEN, PROYECCION_REGISTRO, aplicar_proyeccion
+from app.core.auth import get_current_active_especialista, es_administrador
+from app.core.utils import delete_file
+from app.core.almacenamiento import get_almacenamiento
+from app.core.blobs import guardar_blob, liberar_blob
+from app.core.derivados import eliminar_derivados, codificar_mapa_atencion
+from app.db.database import get_database, get_database_analitica, max_time_ms
+from app.db.contadores import EXPEDIENTE_REINTENTOS, asignar_numero_expediente
+from app.db.estadisticas import registrar_alta, registrar_baja, registrar_reanalisis
+from app.core.cache import invalidar_dashboard
+from app.core.paginacion import ORDEN_REGISTROS, codificar_cursor, filtro_despues_de
+from app.core.serializacion import BSONJSONResponse, a_json
+from app.core.exportacion import FORMATOS, construir_filtro_exportacion, exportar, parquet_disponible
+from app.config import settings
+from app.core.busqueda import CAMPO_TOKENS, generar_tokens_busqueda, construir_filtro_busqueda
 
 # ✅ NUEVO: Importar ImageQualityError para manejo de imágenes inválidas
-from app.ai import get_model, generate_medical_explanation, ImageQualityError
+from app.ai import get_model, inferencia_lock, generate_medical_explanation, ImageQualityError
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +96,21 @@ async def validate_and_load_image(file: UploadFile) -> tuple[Image.Image, bytes]
     Raises:
         HTTPException: Si hay error al cargar o validar la imagen
     """
+    image_bytes = await leer_imagen(file)
+    
+    # 5. Decodificar fuera del event loop
+    pil_image = await asyncio.to_thread(decodificar_imagen, image_bytes)
+    
+    return pil_image, image_bytes
+
+
+async def leer_imagen(file: UploadFile) -> bytes:
+    """
+    Validar tipo y tamaño de la imagen y leer sus bytes (sin decodificar)
+    
+    Raises:
+        HTTPException: Si hay error al leer o validar el archivo
+    """
     # 1. Validar tipo de archivo
     validate_image_file(file)
     
@@ -108,9 +138,21 @@ async def validate_and_load_image(file: UploadFile) -> tuple[Image.Image, bytes]
             detail=f"El archivo es muy grande. Máximo: {max_size / 1024 / 1024}MB"
         )
     
-    # 5. Intentar abrir como imagen PIL
+    return image_bytes
+
+
+def decodificar_imagen(image_bytes: bytes) -> Image.Image:
+    """
+    Abrir bytes como imagen PIL RGB y verificar dimensiones mínimas
+    
+    Función síncrona (CPU): llamar con asyncio.to_thread.
+    
+    Raises:
+        HTTPException: Si los bytes no son una imagen válida
+    """
     try:
         pil_image = Image.open(io.BytesIO(image_bytes))
+        pil_image.load()  # Image.open es perezoso: decodificar aquí, no en el event loop
         
         # Verificar que sea RGB o convertir
         if pil_image.mode not in ('RGB', 'L'):
@@ -129,8 +171,10 @@ async def validate_and_load_image(file: UploadFile) -> tuple[Image.Image, bytes]
         
         logger.info(f"✅ Imagen cargada: {pil_image.width}x{pil_image.height}, modo: {pil_image.mode}")
         
-        return pil_image, image_bytes
+        return pil_image
         
+    except HTTPException:
+        raise
     except Image.UnidentifiedImageError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -143,6 +187,28 @@ async def validate_and_load_image(file: UploadFile) -> tuple[Image.Image, bytes]
         )
 
 
+async def liberar_imagenes(db, imagenes: dict) -> None:
+    """
+    Liberar las imágenes de un registro
+
+    Los blobs solo pierden una referencia (pueden compartirse entre
+    registros); los registros anteriores al almacenamiento por contenido
+    no tienen digest y su archivo se elimina directamente.
+    """
+    for campo_ruta, campo_digest in (
+        ("rutaOriginal", "digestOriginal"),
+        ("rutaMapaAtencion", "digestMapaAtencion")
+    ):
+        try:
+            if imagenes.get(campo_digest):
+                await liberar_blob(db, imagenes[campo_digest])
+            elif imagenes.get(campo_ruta):
+                await delete_file(imagenes[campo_ruta])
+                await eliminar_derivados(imagenes[campo_ruta])
+        except Exception as e:
+            logger.warning(f"⚠️ Error liberando imagen {imagenes.get(campo_ruta)}: {e}")
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
@@ -223,9 +289,9 @@ async def analizar_imagen_ia(
             )
             result["explicacion_medica"] = explanation
             
-            # Eliminar heatmap del response (muy pesado para JSON)
-            if "heatmap" in result:
-                del result["heatmap"]
+            # Eliminar imágenes del response (muy pesadas para JSON)
+            result.pop("heatmap", None)
+            result.pop("mapa_atencion", None)
         
         return {
             "success": True,
@@ -246,6 +312,151 @@ async def analizar_imagen_ia(
         )
 
 
+
+
+async def _leer_para_lote(file: UploadFile) -> tuple[Optional[bytes], Optional[str]]:
+    """Validar y leer una imagen del lote (errores como texto, sin excepciones)"""
+    try:
+        return await leer_imagen(file), None
+    except HTTPException as e:
+        return None, e.detail
+    except Exception as e:
+        return None, f"Error leyendo archivo: {str(e)}"
+
+
+async def _decodificar_para_lote(indice: int, nombre: str, image_bytes: bytes) -> tuple[int, str, Optional[Image.Image], Optional[str]]:
+    """Decodificar una imagen del lote (errores como texto, sin excepciones)"""
+    try:
+        return indice, nombre, await asyncio.to_thread(decodificar_imagen, image_bytes), None
+    except HTTPException as e:
+        return indice, nombre, None, e.detail
+    except Exception as e:
+        return indice, nombre, None, f"Error procesando imagen: {str(e)}"
+
+
+def _linea_ndjson(contenido: dict) -> bytes:
+    return a_json(contenido) + b"\n"
+
+
+@router.post("/analizar-lote", status_code=status.HTTP_200_OK)
+async def analizar_lote_ia(
+    imagenes: List[UploadFile] = File(...),
+    current_especialista: dict = Depends(get_current_active_especialista)
+):
+    """
+    🤖 Analizar varias imágenes con IA (sin guardar registros)
+    
+    Pensado para campañas de tamizaje: las imágenes se validan y decodifican
+    en paralelo y se analizan en lotes (un forward del ViT por lote).
+    
+    La respuesta es NDJSON (`application/x-ndjson`): una línea por imagen en
+    cuanto termina, en orden de finalización, y una línea final de resumen:
+    
+        {"indice": 0, "archivo": "a.jpg", "estado": "ok", "analisis": {...}}
+        {"indice": 2, "archivo": "c.jpg", "estado": "rechazada", "detalles": {...}}
+        {"indice": 1, "archivo": "b.txt", "estado": "error", "detalle": "..."}
+        {"resumen": {"total": 3, "ok": 1, "rechazada": 1, "error": 1}}
+    
+    ✅ INCLUYE VALIDACIÓN OOD: las imágenes de baja calidad se reportan como
+    "rechazada" sin interrumpir el resto del lote.
+    """
+    if len(imagenes) > settings.ai_batch_max_images:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {settings.ai_batch_max_images} imágenes por lote"
+        )
+    
+    logger.info(f"🔬 Analizando lote de {len(imagenes)} imágenes")
+    model = get_model()
+    
+    # Leer los archivos aquí: FastAPI los cierra al volver el endpoint,
+    # antes de que el generador de la respuesta empiece a correr
+    leidos = await asyncio.gather(*(_leer_para_lote(file) for file in imagenes))
+    archivos = [
+        (indice, file.filename, image_bytes, error)
+        for indice, (file, (image_bytes, error)) in enumerate(zip(imagenes, leidos))
+    ]
+    
+    async def inferir(lote: list) -> list[dict]:
+        try:
+            async with inferencia_lock:
+                resultados = await asyncio.to_thread(
+                    model.predict_batch,
+                    [imagen for _, _, imagen in lote],
+                    True
+                )
+        except Exception as e:
+            # Un forward fallido no corta el stream: el lote completo queda en error
+            logger.error(f"❌ Error en inferencia por lote: {e}")
+            return [
+                {"indice": indice, "archivo": nombre, "estado": "error", "detalle": f"Error analizando imagen: {str(e)}"}
+                for indice, nombre, _ in lote
+            ]
+        
+        lineas = []
+        for (indice, nombre, _), resultado in zip(lote, resultados):
+            if resultado.get("rechazada"):
+                calidad = resultado["validacion_calidad"]
+                lineas.append({
+                    "indice": indice,
+                    "archivo": nombre,
+                    "estado": "rechazada",
+                    "error": "IMAGEN_INVALIDA",
+                    "detalles": {
+                        "confianza": calidad["confianza_ood"],
+                        "umbral_requerido": calidad["umbral"]
+                    }
+                })
+            else:
+                lineas.append({"indice": indice, "archivo": nombre, "estado": "ok", "analisis": resultado})
+        return lineas
+    
+    async def generar():
+        conteo = {"ok": 0, "rechazada": 0, "error": 0}
+        tareas = [
+            asyncio.create_task(_decodificar_para_lote(indice, nombre, image_bytes))
+            for indice, nombre, image_bytes, error in archivos
+            if not error
+        ]
+        lote = []
+        
+        try:
+            for indice, nombre, _, error in archivos:
+                if error:
+                    conteo["error"] += 1
+                    yield _linea_ndjson({"indice": indice, "archivo": nombre, "estado": "error", "detalle": error})
+            
+            for siguiente in asyncio.as_completed(tareas):
+                indice, nombre, pil_image, error = await siguiente
+                
+                if error:
+                    conteo["error"] += 1
+                    yield _linea_ndjson({"indice": indice, "archivo": nombre, "estado": "error", "detalle": error})
+                    continue
+                
+                lote.append((indice, nombre, pil_image))
+                if len(lote) >= settings.ai_batch_size:
+                    for linea in await inferir(lote):
+                        conteo[linea["estado"]] += 1
+                        yield _linea_ndjson(linea)
+                    lote = []
+            
+            if lote:
+                for linea in await inferir(lote):
+                    conteo[linea["estado"]] += 1
+                    yield _linea_ndjson(linea)
+            
+            yield _linea_ndjson({"resumen": {"total": len(imagenes), **conteo}})
+            logger.info(f"✅ Lote completado: {conteo}")
+        
+        finally:
+            # Cliente desconectado: no seguir decodificando
+            for tarea in tareas:
+                tarea.cancel()
+    
+    return StreamingResponse(generar(), media_type="application/x-ndjson")
+
+
 @router.post("/", response_model=RegistroResponse, status_code=status.HTTP_201_CREATED)
 async def crear_registro(
     paciente_nombre: str = Form(..., min_length=1, max_length=200),
@@ -296,8 +507,6 @@ async def crear_registro(
     
     try:
         pil_image, image_bytes = await validate_and_load_image(imagen_original)
-        # Resetear puntero para guardar después
-        await imagen_original.seek(0)
     except HTTPException:
         raise
     except Exception as e:
@@ -368,8 +577,8 @@ async def crear_registro(
         
         # Generar explicación con Gemini (si se solicita)
         ai_summary = None
-        imagen_mapa = None
-        
+        heatmap_bytes = None
+
         if generar_explicacion:
             logger.info("🧠 Generando explicación con Gemini...")
             
@@ -385,19 +594,14 @@ async def crear_registro(
                 # Continuar sin explicación si Gemini falla
                 ai_summary = f"Análisis completado. Resultado: {resultado} (confianza: {confianza}%)"
             
-            # Guardar heatmap como archivo temporal
-            if ia_result.get("heatmap"):
+            # Codificar solo el overlay (WebP reducido); la imagen combinada
+            # se usa únicamente para Gemini y no se guarda
+            if ia_result.get("mapa_atencion"):
                 try:
-                    heatmap_bytes = io.BytesIO()
-                    ia_result["heatmap"].save(heatmap_bytes, format='PNG')
-                    heatmap_bytes.seek(0)
-                    
-                    from fastapi import UploadFile as UF
-                    imagen_mapa = UF(
-                        filename=f"heatmap_{datetime.now().timestamp()}.png",
-                        file=heatmap_bytes
+                    heatmap_bytes = await asyncio.to_thread(
+                        codificar_mapa_atencion, ia_result["mapa_atencion"]
                     )
-                    logger.info("✅ Heatmap generado")
+                    logger.info(f"✅ Heatmap generado ({len(heatmap_bytes) // 1024}KB)")
                 except Exception as e:
                     logger.warning(f"⚠️ Error guardando heatmap: {e}")
         
@@ -413,69 +617,45 @@ async def crear_registro(
         )
     
     # ========================================
-    # 4. GENERAR NÚMERO DE EXPEDIENTE
+    # 4. ASIGNAR NÚMERO DE EXPEDIENTE
     # ========================================
     
-    if not numero_expediente:
-        numero_expediente = generate_numero_expediente()
-        
-        # Verificar unicidad
-        max_retries = 10
-        retry_count = 0
-        while await db.registros.find_one({"numeroExpediente": numero_expediente}):
-            numero_expediente = generate_numero_expediente()
-            retry_count += 1
-            if retry_count >= max_retries:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Error generando número de expediente único"
-                )
-    else:
-        # Verificar que no exista
-        existing = await db.registros.find_one({"numeroExpediente": numero_expediente})
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"El número de expediente '{numero_expediente}' ya existe"
-            )
+    # Secuencia diaria atómica. La unicidad (también de los números
+    # proporcionados) la garantiza el índice único al insertar.
+    expediente_generado = not numero_expediente
+    if expediente_generado:
+        numero_expediente = await asignar_numero_expediente(db)
     
     logger.info(f"📋 Número de expediente: {numero_expediente}")
     
     # ========================================
-    # 5. GUARDAR IMÁGENES EN DISCO
+    # 5. GUARDAR IMÁGENES (ALMACENAMIENTO POR CONTENIDO)
     # ========================================
-    
+
+    # Los blobs se nombran por su SHA-256: guardar es idempotente y una
+    # imagen repetida solo suma una referencia, sin duplicar bytes.
     logger.info("💾 Guardando imágenes...")
-    
+
     try:
-        ruta_original = await save_uploaded_image(
-            imagen_original,
-            numero_expediente,
-            tipo="original"
-        )
-        logger.info(f"✅ Imagen original guardada: {ruta_original}")
+        extension = Path(imagen_original.filename).suffix.lower()
+        blob_original = await guardar_blob(db, image_bytes, extension)
+        logger.info(f"✅ Imagen original guardada: {blob_original['ruta']}")
     except Exception as e:
         logger.error(f"❌ Error guardando imagen original: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error guardando imagen original: {str(e)}"
         )
-    
-    # Guardar heatmap si existe
-    ruta_mapa = None
-    if imagen_mapa:
+
+    blob_mapa = None
+    if heatmap_bytes:
         try:
-            ruta_mapa = await save_uploaded_image(
-                imagen_mapa,
-                numero_expediente,
-                tipo="mapa_atencion"
-            )
-            logger.info(f"✅ Heatmap guardado: {ruta_mapa}")
+            blob_mapa = await guardar_blob(db, heatmap_bytes, ".webp")
+            logger.info(f"✅ Heatmap guardado: {blob_mapa['ruta']}")
         except Exception as e:
-            logger.warning(f"⚠️ Error guardando heatmap: {e}")
             # Continuar sin heatmap si falla
-            # No eliminar imagen original ya guardada
-    
+            logger.warning(f"⚠️ Error guardando heatmap: {e}")
+
     # ========================================
     # 6. CREAR DOCUMENTO PARA MONGODB
     # ========================================
@@ -489,8 +669,10 @@ async def crear_registro(
         },
         "especialistaId": current_especialista["_id"],
         "imagenes": {
-            "rutaOriginal": ruta_original,
-            "rutaMapaAtencion": ruta_mapa
+            "rutaOriginal": blob_original["ruta"],
+            "rutaMapaAtencion": blob_mapa["ruta"] if blob_mapa else None,
+            "digestOriginal": blob_original["digest"],
+            "digestMapaAtencion": blob_mapa["digest"] if blob_mapa else None
         },
         "analisis": {
             "resultado": resultado,
@@ -499,6 +681,7 @@ async def crear_registro(
             "procesadoConIA": True
         },
         "resultado": resultado,  # ✅ Solo "Anemia" o "No Anemia" (nunca "no valido")
+        CAMPO_TOKENS: generar_tokens_busqueda(paciente_nombre),
         "fechaAnalisis": datetime.utcnow(),
         "createdAt": datetime.utcnow(),
         "updatedAt": datetime.utcnow()
@@ -512,40 +695,63 @@ async def crear_registro(
     # 7. INSERTAR EN MONGODB
     # ========================================
     
+    # El índice único rechaza números de expediente repetidos. Un número
+    # generado solo choca con números antiguos (formato aleatorio anterior)
+    # y se reintenta con el siguiente de la secuencia; si el número lo dio
+    # el usuario, solo se liberan las referencias a los blobs.
     logger.info("💾 Guardando en MongoDB...")
     
+    intentos = EXPEDIENTE_REINTENTOS if expediente_generado else 1
     try:
-        result = await db.registros.insert_one(registro_doc)
+        for intento in range(1, intentos + 1):
+            try:
+                result = await db.registros.insert_one(registro_doc)
+                break
+            except DuplicateKeyError:
+                if intento == intentos:
+                    raise
+                logger.warning(f"⚠️ Expediente {registro_doc['numeroExpediente']} ocupado, reintentando")
+                registro_doc.pop("_id", None)
+                registro_doc["numeroExpediente"] = await asignar_numero_expediente(db)
+        numero_expediente = registro_doc["numeroExpediente"]
         logger.info(f"✅ Registro guardado: {result.inserted_id}")
+    except DuplicateKeyError:
+        await liberar_imagenes(db, registro_doc["imagenes"])
+        if expediente_generado:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Conflicto asignando número de expediente. Intente de nuevo"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El número de expediente '{numero_expediente}' ya existe"
+        )
     except Exception as e:
         logger.error(f"❌ Error guardando en MongoDB: {e}")
-        
-        # Limpiar archivos guardados si falla la BD
-        try:
-            delete_file(ruta_original)
-            if ruta_mapa:
-                delete_file(ruta_mapa)
-        except:
-            pass
-        
+        await liberar_imagenes(db, registro_doc["imagenes"])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error guardando registro en base de datos: {str(e)}"
         )
     
+    # Actualizar rollups del dashboard ($inc atómico) e invalidar su caché
+    try:
+        await registrar_alta(db, registro_doc)
+    except Exception as e:
+        logger.warning(f"⚠️ Error actualizando estadísticas (quedan pendientes de reconstruir): {e}")
+    await invalidar_dashboard(db, current_especialista["_id"])
+    
     # ========================================
-    # 8. OBTENER Y RETORNAR REGISTRO CREADO
+    # 8. RETORNAR REGISTRO CREADO
     # ========================================
     
-    created_registro = await db.registros.find_one({"_id": result.inserted_id})
-    
-    # Convertir ObjectIds a strings para JSON
-    created_registro["_id"] = str(created_registro["_id"])
-    created_registro["especialistaId"] = str(created_registro["especialistaId"])
+    # insert_one ya agregó el _id al documento: se responde desde memoria
+    # con los mismos campos que GET /registros/{id}, sin volver a leerlo
+    created_registro = aplicar_proyeccion(registro_doc, PROYECCION_REGISTRO)
     
     logger.info(f"🎉 Registro completado exitosamente: {numero_expediente}")
     
-    return created_registro
+    return BSONJSONResponse(created_registro, status_code=status.HTTP_201_CREATED)
 
 
 @router.post("/{registro_id}/reanalizar", status_code=status.HTTP_200_OK)
@@ -577,10 +783,13 @@ async def reanalizar_registro(
         )
     
     # Buscar registro
-    registro = await db.registros.find_one({
-        "_id": ObjectId(registro_id),
-        "especialistaId": current_especialista["_id"]
-    })
+    registro = await db.registros.find_one(
+        {
+            "_id": ObjectId(registro_id),
+            "especialistaId": current_especialista["_id"]
+        },
+        max_time_ms=max_time_ms("lectura")
+    )
     
     if not registro:
         raise HTTPException(
@@ -596,18 +805,20 @@ async def reanalizar_registro(
             detail="Registro no tiene imagen original"
         )
     
-    # Construir ruta completa
-    image_path = get_file_path(ruta_original)
-    
-    if not image_path.exists():
+    # Leer imagen del almacenamiento (disco local o S3)
+    try:
+        image_bytes = await get_almacenamiento().leer(ruta_original)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Archivo de imagen no encontrado en el servidor"
         )
     
     try:
-        # Cargar imagen
-        pil_image = Image.open(image_path).convert("RGB")
+        # Decodificar fuera del event loop
+        pil_image = await asyncio.to_thread(
+            lambda: Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        )
         
         # Analizar con IA (CON VALIDACIÓN)
         model = get_model()
@@ -661,22 +872,68 @@ async def reanalizar_registro(
             )
             result["explicacion_medica"] = explanation
         
-        # Actualizar registro en BD
-        await db.registros.update_one(
-            {"_id": ObjectId(registro_id)},
-            {
-                "$set": {
-                    "analisis.resultado": result["resultado"],
-                    "analisis.aiSummary": result.get("explicacion_medica"),
-                    "analisis.confianza": result["confianza"],
-                    "resultado": result["resultado"],
-                    "updatedAt": datetime.utcnow()
-                }
-            }
+        cambios = {
+            "analisis.resultado": result["resultado"],
+            "analisis.aiSummary": result.get("explicacion_medica"),
+            "analisis.confianza": result["confianza"],
+            "resultado": result["resultado"],
+            "updatedAt": datetime.utcnow()
+        }
+        
+        # Nuevo heatmap como blob: si es idéntico al anterior solo cambia
+        # el conteo de referencias, no se escriben bytes nuevos
+        blob_mapa = None
+        if ia_result.get("mapa_atencion"):
+            try:
+                heatmap_bytes = await asyncio.to_thread(
+                    codificar_mapa_atencion, ia_result["mapa_atencion"]
+                )
+                blob_mapa = await guardar_blob(db, heatmap_bytes, ".webp")
+                cambios["imagenes.rutaMapaAtencion"] = blob_mapa["ruta"]
+                cambios["imagenes.digestMapaAtencion"] = blob_mapa["digest"]
+            except Exception as e:
+                logger.warning(f"⚠️ Error guardando heatmap: {e}")
+        
+        # Actualizar registro en BD; el documento previo (no el leído al
+        # inicio) dice qué heatmap se reemplazó, aunque haya re-análisis
+        # simultáneos del mismo registro
+        anterior = await db.registros.find_one_and_update(
+            {"_id": ObjectId(registro_id), "especialistaId": current_especialista["_id"]},
+            {"$set": cambios},
+            return_document=ReturnDocument.BEFORE
         )
         
+        if anterior is None:
+            # Eliminado mientras se analizaba: el heatmap nuevo no tiene dueño
+            if blob_mapa:
+                await liberar_blob(db, blob_mapa["digest"])
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Registro no encontrado"
+            )
+        
+        # Liberar el heatmap anterior una vez que el registro apunta al nuevo
+        if blob_mapa:
+            imagenes = anterior.get("imagenes", {})
+            await liberar_imagenes(db, {
+                "rutaMapaAtencion": imagenes.get("rutaMapaAtencion"),
+                "digestMapaAtencion": imagenes.get("digestMapaAtencion")
+            })
+        
         logger.info(f"✅ Registro actualizado: {registro_id}")
         
+        # Ajustar rollups con la diferencia respecto del estado que se reemplazó
+        try:
+            registro_actualizado = {
+                **anterior,
+                "resultado": result["resultado"],
+                "analisis": {**anterior.get("analisis", {}), "confianza": result["confianza"]}
+            }
+            await registrar_reanalisis(db, anterior, registro_actualizado)
+        except Exception as e:
+            logger.warning(f"⚠️ Error actualizando estadísticas (quedan pendientes de reconstruir): {e}")
+        await invalidar_dashboard(db, current_especialista["_id"])
+        
         return {
             "success": True,
             "analisis_actualizado": result,
@@ -686,6 +943,8 @@ async def reanalizar_registro(
     except ImageQualityError:
         # Ya manejado arriba
         raise
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error re-analizando: {e}")
         raise HTTPException(
@@ -694,12 +953,13 @@ async def reanalizar_registro(
         )
 
 
-@router.get("/", response_model=List[RegistroResponse])
+@router.get("/", response_model=List[RegistroResumen])
 async def listar_registros(
     skip: int = 0,
     limit: int = 20,
     resultado: Optional[str] = None,
     buscar: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_especialista: dict = Depends(get_current_active_especialista)
 ):
     """
@@ -707,33 +967,122 @@ async def listar_registros(
     
     ✅ Solo retorna registros válidos guardados en BD
     (Las imágenes rechazadas nunca se guardan)
+    
+    Devuelve el resumen de cada registro (sin aiSummary); el documento
+    completo se obtiene con GET /registros/{id}.
+    
+    Paginación por cursor: si la página está completa, el header
+    `X-Next-Cursor` trae el cursor opaco para pedir la siguiente
+    (`?cursor=...`). `skip` se mantiene por compatibilidad, pero su costo
+    crece con la profundidad de la página.
     """
-    db = get_database()
+    db = get_database_analitica(current_especialista)
     especialista_id = current_especialista["_id"]
     
     query = {"especialistaId": especialista_id}
+    condiciones = []
     
     # ✅ resultado solo puede ser "Anemia" o "No Anemia" (nunca "no valido")
     if resultado and resultado in ["Anemia", "No Anemia"]:
         query["resultado"] = resultado
     
-    if buscar:
-        query["$or"] = [
-            {"paciente.nombre": {"$regex": buscar, "$options": "i"}},
-            {"numeroExpediente": {"$regex": buscar, "$options": "i"}}
-        ]
+    # Búsqueda indexada: tokens del nombre (sin acentos) o prefijo de expediente
+    filtro_busqueda = construir_filtro_busqueda(especialista_id, buscar)
+    if filtro_busqueda:
+        condiciones.append(filtro_busqueda)
+    
+    if cursor:
+        condiciones.append(filtro_despues_de(cursor))
     
-    registros = await db.registros.find(query)\
-        .sort("fechaAnalisis", -1)\
-        .skip(skip)\
-        .limit(limit)\
-        .to_list(length=limit)
+    if condiciones:
+        query["$and"] = condiciones
     
-    for registro in registros:
-        registro["_id"] = str(registro["_id"])
-        registro["especialistaId"] = str(registro["especialistaId"])
+    consulta = db.registros.find(
+        query, PROYECCION_RESUMEN, max_time_ms=max_time_ms("listado")
+    ).sort(ORDEN_REGISTROS)
+    if skip and not cursor:
+        consulta = consulta.skip(skip)
     
-    return registros
+    registros = await consulta.limit(limit).to_list(length=limit)
+    
+    headers = {}
+    if registros and len(registros) == limit:
+        headers["X-Next-Cursor"] = codificar_cursor(registros[-1])
+    
+    # Documentos proyectados -> JSON directo (sin validar cada uno con pydantic)
+    return BSONJSONResponse(registros, headers=headers)
+
+
+@router.get("/exportar")
+async def exportar_registros(
+    formato: str = "csv",
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    resultado: Optional[str] = None,
+    todos: bool = False,
+    current_especialista: dict = Depends(get_current_active_especialista)
+):
+    """
+    📤 Exportar registros a CSV o Parquet
+    
+    La respuesta se genera por bloques desde el cursor de Mongo
+    (transferencia chunked): la memoria no crece con el número de registros.
+    
+    Args:
+        formato: "csv" o "parquet" (Parquet requiere pyarrow en el servidor)
+        desde: Fecha de análisis inicial (inclusive, UTC)
+        hasta: Fecha de análisis final (exclusiva, UTC)
+        resultado: "Anemia" o "No Anemia"
+        todos: Exportar los registros de todos los especialistas (solo administradores)
+    """
+    db = get_database_analitica(current_especialista)
+    
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato inválido: {formato}. Use: {', '.join(FORMATOS)}"
+        )
+    
+    if formato == "parquet" and not parquet_disponible():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Exportación a Parquet no disponible en este servidor"
+        )
+    
+    if resultado and resultado not in ["Anemia", "No Anemia"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Resultado debe ser 'Anemia' o 'No Anemia'"
+        )
+    
+    if todos and not es_administrador(current_especialista):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden exportar todos los registros"
+        )
+    
+    # Fechas con zona -> UTC sin zona (como se guardan en Mongo)
+    desde, hasta = [
+        fecha.astimezone(timezone.utc).replace(tzinfo=None) if fecha and fecha.tzinfo else fecha
+        for fecha in (desde, hasta)
+    ]
+    
+    filtro = construir_filtro_exportacion(
+        especialista_id=None if todos else current_especialista["_id"],
+        desde=desde,
+        hasta=hasta,
+        resultado=resultado
+    )
+    
+    media_type, extension = FORMATOS[formato]
+    nombre = f"registros-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}{extension}"
+    logger.info(f"📤 Exportando registros ({formato}): {filtro}")
+    
+    return StreamingResponse(
+        exportar(db, filtro, formato),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
 
 
 @router.get("/{registro_id}", response_model=RegistroResponse)
@@ -750,10 +1099,14 @@ async def obtener_registro(
             detail="ID de registro inválido"
         )
     
-    registro = await db.registros.find_one({
-        "_id": ObjectId(registro_id),
-        "especialistaId": current_especialista["_id"]
-    })
+    registro = await db.registros.find_one(
+        {
+            "_id": ObjectId(registro_id),
+            "especialistaId": current_especialista["_id"]
+        },
+        PROYECCION_REGISTRO,
+        max_time_ms=max_time_ms("lectura")
+    )
     
     if not registro:
         raise HTTPException(
@@ -761,10 +1114,7 @@ async def obtener_registro(
             detail="Registro no encontrado"
         )
     
-    registro["_id"] = str(registro["_id"])
-    registro["especialistaId"] = str(registro["especialistaId"])
-    
-    return registro
+    return BSONJSONResponse(registro)
 
 
 @router.get("/expediente/{numero_expediente}", response_model=RegistroResponse)
@@ -775,10 +1125,14 @@ async def obtener_registro_por_expediente(
     """Obtener registro por número de expediente"""
     db = get_database()
     
-    registro = await db.registros.find_one({
-        "numeroExpediente": numero_expediente,
-        "especialistaId": current_especialista["_id"]
-    })
+    registro = await db.registros.find_one(
+        {
+            "numeroExpediente": numero_expediente,
+            "especialistaId": current_especialista["_id"]
+        },
+        PROYECCION_REGISTRO,
+        max_time_ms=max_time_ms("lectura")
+    )
     
     if not registro:
         raise HTTPException(
@@ -786,10 +1140,7 @@ async def obtener_registro_por_expediente(
             detail="Registro no encontrado"
         )
     
-    registro["_id"] = str(registro["_id"])
-    registro["especialistaId"] = str(registro["especialistaId"])
-    
-    return registro
+    return BSONJSONResponse(registro)
 
 
 @router.delete("/{registro_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -806,10 +1157,17 @@ async def eliminar_registro(
             detail="ID de registro inválido"
         )
     
-    registro = await db.registros.find_one({
-        "_id": ObjectId(registro_id),
-        "especialistaId": current_especialista["_id"]
-    })
+    # Eliminar de MongoDB y obtener el documento eliminado en la misma
+    # operación: rollups e imágenes se ajustan con el estado real que se
+    # borró (aunque un re-análisis lo haya cambiado), y un borrado
+    # simultáneo del mismo registro responde 404
+    registro = await db.registros.find_one_and_delete(
+        {
+            "_id": ObjectId(registro_id),
+            "especialistaId": current_especialista["_id"]
+        },
+        max_time_ms=max_time_ms("lectura")
+    )
     
     if not registro:
         raise HTTPException(
@@ -817,20 +1175,15 @@ async def eliminar_registro(
             detail="Registro no encontrado"
         )
     
-    # Eliminar de MongoDB
-    result = await db.registros.delete_one({"_id": ObjectId(registro_id)})
-    
-    if result.deleted_count == 0:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error eliminando registro"
-        )
+    # Restar de los rollups e invalidar caché del dashboard
+    try:
+        await registrar_baja(db, registro)
+    except Exception as e:
+        logger.warning(f"⚠️ Error actualizando estadísticas (quedan pendientes de reconstruir): {e}")
+    await invalidar_dashboard(db, current_especialista["_id"])
     
-    # Eliminar archivos asociados
-    if registro.get("imagenes", {}).get("rutaOriginal"):
-        delete_file(registro["imagenes"]["rutaOriginal"])
-    if registro.get("imagenes", {}).get("rutaMapaAtencion"):
-        delete_file(registro["imagenes"]["rutaMapaAtencion"])
+    # Liberar archivos asociados (los blobs huérfanos los elimina scripts/recolectar_blobs.py)
+    await liberar_imagenes(db, registro.get("imagenes", {}))
     
     logger.info(f"🗑️ Registro eliminado: {registro_id}")
     
@@ -0,0 +1,120 @@
+"""
+Benchmark de búsqueda de pacientes
+Compara la búsqueda indexada (tokens + prefijo de expediente) con la
+búsqueda anterior ($regex sin anclar, insensible a mayúsculas) a medida
+que crece la colección.
+
+Usa una base de datos separada (<mongodb_db_name>_benchmark) que se
+elimina al terminar.
+
+Uso:
+    python scripts/benchmark_busqueda.py [--tamanos 1000 10000 100000] [--repeticiones 20]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.busqueda import CAMPO_TOKENS, generar_tokens_busqueda, construir_filtro_busqueda
+
+NOMBRES = ["José", "María", "Juan", "Ana", "Luis", "Sofía", "Carlos", "Lucía", "Jorge", "Valeria"]
+APELLIDOS = ["Núñez", "López", "García", "Hernández", "Martínez", "Pérez", "Sánchez", "Ramírez", "Flores", "Gómez"]
+BUSQUEDAS = ["jose nu", "Lopez", "maria g", "20240115-"]
+LOTE = 5000
+
+
+def generar_registro(especialista_id: ObjectId, indice: int, inicio: datetime) -> dict:
+    nombre = f"{random.choice(NOMBRES)} {random.choice(APELLIDOS)} {random.choice(APELLIDOS)}"
+    fecha = inicio + timedelta(minutes=indice)
+    return {
+        "numeroExpediente": f"{fecha.strftime('%Y%m%d')}-{indice:06d}",
+        "paciente": {"nombre": nombre, "edad": random.randint(0, 90), "sexo": "Otro"},
+        "especialistaId": especialista_id,
+        "resultado": random.choice(["Anemia", "No Anemia"]),
+        CAMPO_TOKENS: generar_tokens_busqueda(nombre),
+        "fechaAnalisis": fecha
+    }
+
+
+async def medir(coleccion, query: dict, repeticiones: int) -> tuple[float, int]:
+    """Latencia mediana (ms) de la primera página y documentos examinados"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        await coleccion.find(query).sort([("fechaAnalisis", -1), ("_id", -1)]).limit(20).to_list(length=20)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    plan = await coleccion.find(query).sort([("fechaAnalisis", -1), ("_id", -1)]).limit(20).explain()
+    examinados = plan.get("executionStats", {}).get("totalDocsExamined", -1)
+    return statistics.median(tiempos), examinados
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de pacientes")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    nombre_db = f"{settings.mongodb_db_name}_benchmark"
+    db = client[nombre_db]
+    coleccion = db.registros
+
+    especialista_id = ObjectId()
+    inicio = datetime(2024, 1, 1)
+    insertados = 0
+
+    try:
+        await coleccion.create_index(
+            [("especialistaId", 1), (CAMPO_TOKENS, 1), ("fechaAnalisis", -1)]
+        )
+        await coleccion.create_index([("especialistaId", 1), ("numeroExpediente", 1)])
+        await coleccion.create_index([("especialistaId", 1), ("fechaAnalisis", -1), ("_id", -1)])
+
+        print(f"{'registros':>10} | {'búsqueda':<10} | {'indexada ms':>11} | {'docs':>7} | {'regex ms':>9} | {'docs':>7}")
+        print("-" * 70)
+
+        for tamano in sorted(args.tamanos):
+            while insertados < tamano:
+                lote = [
+                    generar_registro(especialista_id, i, inicio)
+                    for i in range(insertados, min(insertados + LOTE, tamano))
+                ]
+                await coleccion.insert_many(lote, ordered=False)
+                insertados += len(lote)
+
+            for buscar in BUSQUEDAS:
+                indexada = {"especialistaId": especialista_id, **construir_filtro_busqueda(especialista_id, buscar)}
+                regex = {
+                    "especialistaId": especialista_id,
+                    "$or": [
+                        {"paciente.nombre": {"$regex": buscar, "$options": "i"}},
+                        {"numeroExpediente": {"$regex": buscar, "$options": "i"}}
+                    ]
+                }
+                ms_indexada, docs_indexada = await medir(coleccion, indexada, args.repeticiones)
+                ms_regex, docs_regex = await medir(coleccion, regex, args.repeticiones)
+                print(
+                    f"{tamano:>10} | {buscar:<10} | {ms_indexada:>11.2f} | {docs_indexada:>7} | "
+                    f"{ms_regex:>9.2f} | {docs_regex:>7}"
+                )
+
+    finally:
+        await client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
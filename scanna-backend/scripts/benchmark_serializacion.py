@@ -0,0 +1,114 @@
+"""
+Benchmark de serialización de registros
+Compara el camino anterior (mutar ids + validar con response_model +
+jsonable_encoder + json.dumps) con la serialización directa con orjson
+de los documentos proyectados.
+
+No necesita base de datos: genera documentos sintéticos con la forma
+que devuelve Mongo.
+
+Uso:
+    python scripts/benchmark_serializacion.py [--tamanos 20 100 500] [--repeticiones 200]
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.models import RegistroResponse
+from app.core.serializacion import a_json
+
+RESUMEN_IA = (
+    "El análisis de la conjuntiva palpebral muestra una coloración compatible con "
+    "el resultado obtenido. Se recomienda confirmar con biometría hemática. "
+) * 6
+
+
+def generar_documentos(cantidad: int) -> list:
+    especialista_id = ObjectId()
+    inicio = datetime(2024, 1, 1, 8, 30, 15, 123000)
+    return [
+        {
+            "_id": ObjectId(),
+            "numeroExpediente": f"20240101-{i:04d}",
+            "paciente": {"nombre": f"Paciente {i}", "edad": 30 + i % 50, "sexo": "Femenino"},
+            "especialistaId": especialista_id,
+            # Mitad blobs por contenido (con digest), mitad registros anteriores (sin digest)
+            "imagenes": {
+                "rutaOriginal": f"blobs/ab/cd/{i:064x}.jpg",
+                "rutaMapaAtencion": None,
+                "digestOriginal": f"{i:064x}",
+                "digestMapaAtencion": None
+            } if i % 2 == 0 else {
+                "rutaOriginal": f"originales/20240101-{i:04d}.jpg",
+                "rutaMapaAtencion": f"mapas_atencion/20240101-{i:04d}_mapa.png"
+            },
+            "analisis": {"resultado": "Anemia", "aiSummary": RESUMEN_IA},
+            "resultado": "Anemia",
+            "fechaAnalisis": inicio + timedelta(minutes=i)
+        }
+        for i in range(cantidad)
+    ]
+
+
+def camino_response_model(documentos: list) -> bytes:
+    """Equivalente a lo que hacían los endpoints con response_model"""
+    for documento in documentos:
+        documento["_id"] = str(documento["_id"])
+        documento["especialistaId"] = str(documento["especialistaId"])
+    validados = TypeAdapter(List[RegistroResponse]).validate_python(documentos)
+    contenido = jsonable_encoder(validados, by_alias=True)
+    return json.dumps(contenido, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def camino_orjson(documentos: list) -> bytes:
+    return a_json(documentos)
+
+
+def medir(funcion, documentos: list, repeticiones: int) -> float:
+    """Mediana en ms (cada repetición trabaja sobre una copia, como un request nuevo)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        copia = copy.deepcopy(documentos)
+        inicio = time.perf_counter()
+        funcion(copia)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de registros")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'registros':>10} | {'response_model ms':>18} | {'orjson ms':>10} | {'aceleración':>11}")
+    print("-" * 60)
+
+    for tamano in args.tamanos:
+        documentos = generar_documentos(tamano)
+
+        # Ambos caminos deben producir el mismo JSON
+        assert json.loads(camino_response_model(copy.deepcopy(documentos))) == \
+            json.loads(camino_orjson(copy.deepcopy(documentos)))
+
+        ms_modelo = medir(camino_response_model, documentos, args.repeticiones)
+        ms_orjson = medir(camino_orjson, documentos, args.repeticiones)
+        print(f"{tamano:>10} | {ms_modelo:>18.3f} | {ms_orjson:>10.3f} | {ms_modelo / ms_orjson:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Script para resolver números de expediente repetidos
+Necesario antes de crear el índice único `numero_expediente_unico`: la API
+no arranca mientras existan duplicados (las versiones anteriores no
+indexaban `numeroExpediente`)
+
+En cada grupo repetido se conserva el número en el registro más antiguo;
+los demás pasan a `<número>-D<n>` (sigue siendo localizable por prefijo).
+
+Uso:
+    python scripts/deduplicar_expedientes.py            # solo reportar
+    python scripts/deduplicar_expedientes.py --aplicar  # renombrar y crear el índice
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def buscar_duplicados(db) -> list:
+    """Grupos de registros con el mismo número de expediente (más antiguo primero)"""
+    return await db.registros.aggregate([
+        {"$sort": {"fechaAnalisis": 1, "_id": 1}},
+        {
+            "$group": {
+                "_id": "$numeroExpediente",
+                "ids": {"$push": "$_id"},
+                "total": {"$sum": 1}
+            }
+        },
+        {"$match": {"total": {"$gt": 1}}}
+    ], allowDiskUse=True).to_list(length=None)
+
+
+async def renombrar(db, numero: str, ids: list) -> int:
+    """Renombrar todos los registros del grupo salvo el primero"""
+    renombrados = 0
+    sufijo = 1
+    for registro_id in ids[1:]:
+        while await db.registros.count_documents({"numeroExpediente": f"{numero}-D{sufijo}"}, limit=1):
+            sufijo += 1
+        nuevo = f"{numero}-D{sufijo}"
+        await db.registros.update_one({"_id": registro_id}, {"$set": {"numeroExpediente": nuevo}})
+        logger.info(f"   ✏️ {registro_id}: {numero} -> {nuevo}")
+        renombrados += 1
+        sufijo += 1
+    return renombrados
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Resolver números de expediente repetidos")
+    parser.add_argument("--aplicar", action="store_true", help="Renombrar duplicados y crear el índice único")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.mongodb_db_name]
+
+    try:
+        grupos = await buscar_duplicados(db)
+        if not grupos:
+            logger.info("✅ No hay números de expediente repetidos")
+        else:
+            logger.warning(f"⚠️ {len(grupos)} números de expediente repetidos "
+                           f"({sum(g['total'] - 1 for g in grupos)} registros a renombrar)")
+            for grupo in grupos:
+                logger.info(f"   {grupo['_id']}: {grupo['total']} registros")
+
+        if not args.aplicar:
+            if grupos:
+                logger.info("ℹ️ Ejecute con --aplicar para renombrarlos")
+            return
+
+        renombrados = 0
+        for grupo in grupos:
+            renombrados += await renombrar(db, grupo["_id"], grupo["ids"])
+
+        await db.registros.create_index("numeroExpediente", unique=True, name="numero_expediente_unico")
+        logger.info(f"✅ {renombrados} registros renombrados; índice único creado")
+
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
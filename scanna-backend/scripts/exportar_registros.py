@@ -0,0 +1,81 @@
+"""
+Script para exportar registros a CSV o Parquet
+Escribe el archivo por bloques desde el cursor (memoria constante)
+
+Uso:
+    python scripts/exportar_registros.py --salida registros.csv
+    python scripts/exportar_registros.py --salida registros.parquet --formato parquet \
+        [--especialista <email o id>] [--desde 2025-01-01] [--hasta 2025-02-01] [--resultado Anemia]
+
+Sin --especialista se exportan los registros de todos los especialistas.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.exportacion import FORMATOS, construir_filtro_exportacion, exportar, parquet_disponible
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def buscar_especialista(db, valor: str) -> ObjectId:
+    """Resolver un especialista por ObjectId o por email"""
+    if ObjectId.is_valid(valor):
+        return ObjectId(valor)
+
+    especialista = await db.especialistas.find_one({"email": valor}, {"_id": 1})
+    if not especialista:
+        logger.error(f"❌ Especialista no encontrado: {valor}")
+        sys.exit(1)
+    return especialista["_id"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Exportar registros a CSV o Parquet")
+    parser.add_argument("--salida", required=True, help="Archivo de salida")
+    parser.add_argument("--formato", choices=list(FORMATOS), help="Por defecto, según la extensión de --salida")
+    parser.add_argument("--especialista", help="Email u ObjectId del especialista (por defecto, todos)")
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="Fecha de análisis inicial, UTC (inclusive)")
+    parser.add_argument("--hasta", type=datetime.fromisoformat, help="Fecha de análisis final, UTC (exclusiva)")
+    parser.add_argument("--resultado", choices=["Anemia", "No Anemia"])
+    args = parser.parse_args()
+
+    formato = args.formato or ("parquet" if args.salida.endswith(".parquet") else "csv")
+    if formato == "parquet" and not parquet_disponible():
+        logger.error("❌ Exportar a Parquet requiere pyarrow (pip install pyarrow)")
+        sys.exit(1)
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.mongodb_db_name]
+
+    try:
+        especialista_id = await buscar_especialista(db, args.especialista) if args.especialista else None
+        filtro = construir_filtro_exportacion(especialista_id, args.desde, args.hasta, args.resultado)
+
+        logger.info(f"📤 Exportando registros ({formato}) a {args.salida}...")
+        escritos = 0
+        with open(args.salida, "wb") as salida:
+            async for bloque in exportar(db, filtro, formato):
+                salida.write(bloque)
+                escritos += len(bloque)
+
+        logger.info(f"✅ Exportación completada: {escritos / 1024:.1f}KB")
+
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Script para generar los tokens de búsqueda de registros existentes
+Ejecutar una vez tras desplegar la búsqueda indexada de pacientes, y tras
+cambiar NGRAM_MIN/NGRAM_MAX
+
+Sin --todos procesa los registros sin tokens y los indexados antes de que
+existieran los prefijos de una letra (NGRAM_MIN = 1).
+
+Uso:
+    python scripts/indexar_busqueda.py [--todos]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.busqueda import CAMPO_TOKENS, generar_tokens_busqueda
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOTE = 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Generar tokens de búsqueda de pacientes")
+    parser.add_argument("--todos", action="store_true", help="Regenerar también los que ya tienen tokens")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.mongodb_db_name]
+
+    try:
+        query = {} if args.todos else {"$or": [
+            {CAMPO_TOKENS: {"$exists": False}},
+            {CAMPO_TOKENS: {"$not": {"$elemMatch": {"$regex": "^.$"}}}}
+        ]}
+        operaciones = []
+        total = 0
+
+        async for registro in db.registros.find(query, {"paciente.nombre": 1}):
+            nombre = registro.get("paciente", {}).get("nombre", "")
+            operaciones.append(UpdateOne(
+                {"_id": registro["_id"]},
+                {"$set": {CAMPO_TOKENS: generar_tokens_busqueda(nombre)}}
+            ))
+
+            if len(operaciones) >= LOTE:
+                await db.registros.bulk_write(operaciones, ordered=False)
+                total += len(operaciones)
+                operaciones = []
+                logger.info(f"  ... {total} registros indexados")
+
+        if operaciones:
+            await db.registros.bulk_write(operaciones, ordered=False)
+            total += len(operaciones)
+
+        logger.info(f"✅ {total} registros indexados")
+
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -39,17 +39,32 @@ async def create_indexes():
         # ============================================
         logger.info("📝 Creando índices para 'registros'...")
         
-        await db.registros.create_index("numero_expediente", unique=True)
+        await db.registros.create_index("numeroExpediente", unique=True, name="numero_expediente_unico")
         await db.registros.create_index("especialista_id")
         await db.registros.create_index("fecha_analisis", expireAfterSeconds=-1)  # -1 = no expira
         await db.registros.create_index("resultado")
         await db.registros.create_index("paciente.nombre", name="paciente_nombre_text")
         
+        # Búsqueda de pacientes (tokens sin acentos + edge n-grams, ver app/core/busqueda.py)
+        await db.registros.create_index([
+            ("especialistaId", 1),
+            ("busquedaTokens", 1),
+            ("fechaAnalisis", -1)
+        ], name="especialista_busqueda")
+        await db.registros.create_index([
+            ("especialistaId", 1),
+            ("numeroExpediente", 1)
+        ], name="especialista_expediente")
+        
         # Índice compuesto para queries frecuentes
+        # (usa los nombres de campo que escribe la API: especialistaId / fechaAnalisis)
+        # Respalda el $match del motor de estadísticas y la paginación por
+        # cursor de los listados: orden (fechaAnalisis, _id) descendente
         await db.registros.create_index([
-            ("especialista_id", 1),
-            ("fecha_analisis", -1)
-        ])
+            ("especialistaId", 1),
+            ("fechaAnalisis", -1),
+            ("_id", -1)
+        ], name="especialista_fecha_id")
         
         logger.info("✅ Índices de registros creados")
         
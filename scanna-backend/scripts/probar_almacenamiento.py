@@ -0,0 +1,67 @@
+"""
+Prueba de ida y vuelta del backend de almacenamiento configurado
+
+Útil para validar la configuración de S3 contra un MinIO local:
+
+    docker run -p 9000:9000 -p 9001:9001 minio/minio server /data --console-address :9001
+
+    STORAGE_BACKEND=s3 S3_BUCKET=scanna S3_ENDPOINT_URL=http://localhost:9000 \\
+    S3_ACCESS_KEY=minioadmin S3_SECRET_KEY=minioadmin \\
+    python scripts/probar_almacenamiento.py
+
+Uso:
+    python scripts/probar_almacenamiento.py [--tamano-mb 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.almacenamiento import get_almacenamiento, cerrar_almacenamiento
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Probar backend de almacenamiento")
+    parser.add_argument("--tamano-mb", type=float, default=20, help="Tamaño del archivo de prueba (multipart)")
+    args = parser.parse_args()
+
+    almacenamiento = get_almacenamiento()
+    ruta = f"pruebas/{int(time.time())}.bin"
+    data = os.urandom(int(args.tamano_mb * 1024 * 1024))
+
+    try:
+        inicio = time.perf_counter()
+        await almacenamiento.guardar(ruta, data)
+        logger.info(f"⬆️  Subida: {len(data) / 1024 / 1024:.1f}MB en {time.perf_counter() - inicio:.2f}s")
+
+        assert await almacenamiento.existe(ruta), "El archivo no existe tras subirlo"
+
+        inicio = time.perf_counter()
+        leido = await almacenamiento.leer(ruta)
+        logger.info(f"⬇️  Descarga: {time.perf_counter() - inicio:.2f}s")
+        assert leido == data, "El contenido leído no coincide"
+
+        url = await almacenamiento.url_firmada(ruta)
+        logger.info(f"🔗 URL pre-firmada: {url or '(servido por la API)'}")
+
+        await almacenamiento.eliminar(ruta)
+        assert not await almacenamiento.existe(ruta), "El archivo sigue existiendo"
+
+        logger.info(f"✅ Backend '{almacenamiento.nombre}' OK")
+
+    finally:
+        await cerrar_almacenamiento()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
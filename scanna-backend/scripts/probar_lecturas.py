@@ -0,0 +1,89 @@
+"""
+Script para comprobar a qué servidor van las lecturas analíticas
+Muestra la topología del replica set y el servidor que responde una
+consulta del dashboard con la preferencia configurada
+
+Réplica local de prueba (3 nodos en un mismo contenedor):
+    docker run -d --name scanna-rs -p 27017:27017 -p 27018:27018 -p 27019:27019 mongo:7 \
+        bash -c "mkdir -p /data/r0 /data/r1 /data/r2 && \
+                 mongod --replSet rs0 --port 27018 --dbpath /data/r1 --bind_ip_all --fork --logpath /data/r1.log && \
+                 mongod --replSet rs0 --port 27019 --dbpath /data/r2 --bind_ip_all --fork --logpath /data/r2.log && \
+                 mongod --replSet rs0 --port 27017 --dbpath /data/r0 --bind_ip_all"
+    docker exec scanna-rs mongosh --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27017"}, {_id: 1, host: "localhost:27018"}, {_id: 2, host: "localhost:27019"}]})'
+
+    MONGODB_URI="mongodb://localhost:27017/?replicaSet=rs0" python scripts/probar_lecturas.py
+
+Uso:
+    python scripts/probar_lecturas.py [--especialista <email>] [--repeticiones 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.db.database import opciones_cliente, preferencia_analitica
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Comprobar el enrutamiento de lecturas analíticas")
+    parser.add_argument("--especialista", help="Email del especialista cuyos rollups se leen (por defecto, cualquiera)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_uri, **opciones_cliente())
+
+    try:
+        hola = await client.admin.command("hello")
+        if "setName" not in hola:
+            logger.warning("⚠️ El servidor no es parte de un replica set: todas las lecturas van al mismo nodo")
+        else:
+            logger.info(f"🗂️ Replica set {hola['setName']}")
+            logger.info(f"   Primario: {hola.get('primary')}")
+            for host in hola.get("hosts", []):
+                if host != hola.get("primary"):
+                    logger.info(f"   Secundario: {host}")
+
+        preferencia = preferencia_analitica()
+        if preferencia is None:
+            logger.info("📖 Preferencia analítica: primary (sin enrutamiento)")
+            db = client[settings.mongodb_db_name]
+        else:
+            logger.info(f"📖 Preferencia analítica: {preferencia!r}")
+            db = client.get_database(settings.mongodb_db_name, read_preference=preferencia)
+
+        filtro = {}
+        if args.especialista:
+            especialista = await client[settings.mongodb_db_name].especialistas.find_one(
+                {"email": args.especialista}, {"_id": 1}
+            )
+            if not especialista:
+                logger.error(f"❌ Especialista no encontrado: {args.especialista}")
+                sys.exit(1)
+            filtro = {"especialistaId": especialista["_id"]}
+
+        for _ in range(args.repeticiones):
+            cursor = db.estadisticas_diarias.find(filtro).limit(1)
+            await cursor.to_list(length=1)
+            host, puerto = cursor.address
+            servidor = f"{host}:{puerto}"
+            rol = "primario" if servidor == hola.get("primary", servidor) else "secundario"
+            logger.info(f"   ✅ Lectura atendida por {servidor} ({rol})")
+
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
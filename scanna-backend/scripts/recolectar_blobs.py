@@ -0,0 +1,105 @@
+"""
+Script de mantenimiento del almacenamiento de imágenes por contenido
+
+- Migra registros anteriores (rutas en originales/ y mapas_atencion/) a blobs
+- Elimina blobs sin referencias tras un periodo de gracia
+
+Uso:
+    python scripts/recolectar_blobs.py [--gracia-horas 24] [--migrar]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.blobs import PREFIJO_BLOBS, guardar_blob, recolectar_blobs
+from app.core.almacenamiento import get_almacenamiento, cerrar_almacenamiento
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CAMPOS_IMAGEN = (
+    ("rutaOriginal", "digestOriginal"),
+    ("rutaMapaAtencion", "digestMapaAtencion")
+)
+
+
+async def migrar_registros(db) -> int:
+    """
+    Mover las imágenes de registros sin digest al almacenamiento por contenido
+
+    Idempotente: se saltan las rutas que ya son blobs o ya tienen digest, y
+    una imagen que no existe queda con digest None (el registro deja de
+    coincidir con la consulta en las siguientes ejecuciones).
+    """
+    almacenamiento = get_almacenamiento()
+    migrados = 0
+    query = {"imagenes.rutaOriginal": {"$ne": None}, "imagenes.digestOriginal": {"$exists": False}}
+
+    async for registro in db.registros.find(query, {"imagenes": 1}):
+        imagenes = registro.get("imagenes", {})
+        cambios = {}
+        anteriores = []
+
+        for campo_ruta, campo_digest in CAMPOS_IMAGEN:
+            ruta = imagenes.get(campo_ruta)
+            if not ruta or campo_digest in imagenes or ruta.startswith(f"{PREFIJO_BLOBS}/"):
+                continue
+
+            try:
+                data = await almacenamiento.leer(ruta)
+            except FileNotFoundError:
+                logger.warning(f"⚠️ Archivo no encontrado: {ruta}")
+                cambios[f"imagenes.{campo_digest}"] = None
+                continue
+
+            blob = await guardar_blob(db, data, Path(ruta).suffix)
+            cambios[f"imagenes.{campo_ruta}"] = blob["ruta"]
+            cambios[f"imagenes.{campo_digest}"] = blob["digest"]
+            if ruta != blob["ruta"]:
+                anteriores.append(ruta)
+
+        if not cambios:
+            continue
+
+        await db.registros.update_one({"_id": registro["_id"]}, {"$set": cambios})
+        for ruta in anteriores:
+            await almacenamiento.eliminar(ruta)
+        migrados += 1
+
+    return migrados
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recolectar blobs de imágenes sin referencias")
+    parser.add_argument("--gracia-horas", type=float, default=24, help="Antigüedad mínima del huérfano")
+    parser.add_argument("--migrar", action="store_true", help="Migrar antes los registros sin digest")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.mongodb_db_name]
+
+    try:
+        if args.migrar:
+            migrados = await migrar_registros(db)
+            logger.info(f"✅ {migrados} registros migrados a blobs")
+
+        eliminados = await recolectar_blobs(db, gracia=timedelta(hours=args.gracia_horas))
+        logger.info(f"✅ {eliminados} blobs eliminados")
+
+    finally:
+        await cerrar_almacenamiento()
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
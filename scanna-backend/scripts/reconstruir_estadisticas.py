@@ -0,0 +1,98 @@
+"""
+Script para reconstruir los rollups de estadísticas desde los registros
+Ejecutar una vez al desplegar los rollups, o para corregir desviaciones
+
+Uso:
+    python scripts/reconstruir_estadisticas.py [--especialista <id>] [--verificar]
+    python scripts/reconstruir_estadisticas.py --pendientes
+
+--pendientes reconstruye solo los especialistas cuyos rollups quedaron a
+medias por un error de escritura (colección estadisticas_pendientes).
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.db.estadisticas import (
+    COLECCION_PENDIENTES,
+    calcular_estadisticas,
+    leer_estadisticas,
+    listar_pendientes,
+    reconstruir_pendientes,
+    reconstruir_rollups
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def verificar(db, especialista_id: ObjectId) -> bool:
+    """Comparar rollups contra el cálculo $facet sobre registros"""
+    desde_rollups = await leer_estadisticas(db, especialista_id)
+    desde_registros = await calcular_estadisticas(db, especialista_id)
+
+    campos = ["total", "positivos", "negativos", "hoy", "semana"]
+    diferencias = {
+        campo: (desde_rollups[campo], desde_registros[campo])
+        for campo in campos
+        if desde_rollups[campo] != desde_registros[campo]
+    }
+
+    if diferencias:
+        logger.warning(f"⚠️ {especialista_id}: diferencias {diferencias}")
+        return False
+
+    logger.info(f"✅ {especialista_id}: rollups consistentes")
+    return True
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Reconstruir estadísticas diarias")
+    parser.add_argument("--especialista", help="ObjectId del especialista (por defecto, todos)")
+    parser.add_argument("--verificar", action="store_true", help="Comparar contra los registros")
+    parser.add_argument("--pendientes", action="store_true", help="Solo especialistas marcados como pendientes")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client[settings.mongodb_db_name]
+
+    try:
+        if args.pendientes:
+            pendientes = await listar_pendientes(db)
+            for pendiente in pendientes:
+                logger.info(f"   {pendiente['_id']}: pendiente desde {pendiente['desde']} ({pendiente.get('error')})")
+            reconstruidos = await reconstruir_pendientes(db)
+            logger.info(f"✅ {reconstruidos} especialistas reconstruidos")
+            return
+
+        especialista_id = ObjectId(args.especialista) if args.especialista else None
+
+        logger.info("🔧 Reconstruyendo estadísticas diarias...")
+        escritos = await reconstruir_rollups(db, especialista_id)
+        logger.info(f"✅ {escritos} documentos diarios escritos")
+
+        # Los pendientes quedan resueltos por la reconstrucción
+        await db[COLECCION_PENDIENTES].delete_many({"_id": especialista_id} if especialista_id else {})
+
+        if args.verificar:
+            ids = [especialista_id] if especialista_id else await db.registros.distinct("especialistaId")
+            resultados = [await verificar(db, esp_id) for esp_id in ids]
+            if not all(resultados):
+                sys.exit(1)
+
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,15 @@
+"""
+Configuración común de las pruebas
+
+Las variables obligatorias de Settings se definen antes de importar la app.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("SECRET_KEY", "pruebas")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
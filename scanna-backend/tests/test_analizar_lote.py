@@ -0,0 +1,153 @@
+"""
+POST /registros/analizar-lote
+
+Se envía un multipart real a la app ASGI (los archivos pasan por el parser
+de FastAPI y se cierran al volver el endpoint, como en producción). El
+modelo se reemplaza por uno falso: no se necesitan pesos ni GPU.
+"""
+
+import asyncio
+import io
+import json
+import uuid
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from fastapi import FastAPI
+from PIL import Image
+
+from app.core.auth import get_current_active_especialista
+from app.routes import registros
+
+
+class ModeloFalso:
+    def __init__(self, falla: bool = False):
+        self.falla = falla
+        self.lotes = []
+
+    def predict_batch(self, images, validate_quality=True):
+        if self.falla:
+            raise RuntimeError("CUDA out of memory")
+        self.lotes.append(len(images))
+        return [
+            {"resultado": "Anemia", "confianza": 0.9, "clase_predicha": "ANEMIA"}
+            for _ in images
+        ]
+
+
+def _png(color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (128, 128), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _multipart(archivos: list) -> tuple[bytes, str]:
+    limite = uuid.uuid4().hex
+    partes = []
+    for nombre, tipo, contenido in archivos:
+        partes.append(
+            f"--{limite}\r\n"
+            f'Content-Disposition: form-data; name="imagenes"; filename="{nombre}"\r\n'
+            f"Content-Type: {tipo}\r\n\r\n".encode() + contenido + b"\r\n"
+        )
+    partes.append(f"--{limite}--\r\n".encode())
+    return b"".join(partes), f"multipart/form-data; boundary={limite}"
+
+
+async def _post(app, ruta: str, cuerpo: bytes, tipo: str) -> tuple[int, bytes]:
+    """Petición directa a la app ASGI (sin cliente HTTP)"""
+    recibido = {"status": None, "cuerpo": b""}
+    pendiente = [{"type": "http.request", "body": cuerpo, "more_body": False}]
+
+    async def receive():
+        if pendiente:
+            return pendiente.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            recibido["status"] = mensaje["status"]
+        elif mensaje["type"] == "http.response.body":
+            recibido["cuerpo"] += mensaje.get("body", b"")
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": ruta,
+        "raw_path": ruta.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", tipo.encode()),
+            (b"content-length", str(len(cuerpo)).encode())
+        ],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80)
+    }
+    await app(scope, receive, send)
+    return recibido["status"], recibido["cuerpo"]
+
+
+@pytest.fixture
+def app():
+    aplicacion = FastAPI()
+    aplicacion.include_router(registros.router)
+    aplicacion.dependency_overrides[get_current_active_especialista] = lambda: {"_id": "esp", "activo": True}
+    return aplicacion
+
+
+def _lineas(cuerpo: bytes) -> list:
+    return [json.loads(linea) for linea in cuerpo.decode().splitlines()]
+
+
+def test_lote_analiza_las_imagenes(app, monkeypatch):
+    modelo = ModeloFalso()
+    monkeypatch.setattr(registros, "get_model", lambda: modelo)
+
+    cuerpo, tipo = _multipart([
+        ("a.png", "image/png", _png()),
+        ("b.png", "image/png", _png((20, 20, 200))),
+        ("c.png", "image/png", _png((20, 200, 20)))
+    ])
+    status_code, respuesta = asyncio.run(_post(app, "/registros/analizar-lote", cuerpo, tipo))
+
+    assert status_code == 200
+    lineas = _lineas(respuesta)
+    imagenes = [linea for linea in lineas if "indice" in linea]
+    assert sorted(linea["indice"] for linea in imagenes) == [0, 1, 2]
+    assert all(linea["estado"] == "ok" for linea in imagenes)
+    assert all(linea["analisis"]["resultado"] == "Anemia" for linea in imagenes)
+    assert lineas[-1] == {"resumen": {"total": 3, "ok": 3, "rechazada": 0, "error": 0}}
+    assert sum(modelo.lotes) == 3
+
+
+def test_lote_reporta_archivos_invalidos(app, monkeypatch):
+    monkeypatch.setattr(registros, "get_model", lambda: ModeloFalso())
+
+    cuerpo, tipo = _multipart([
+        ("a.png", "image/png", _png()),
+        ("b.png", "image/png", b"no es una imagen")
+    ])
+    _, respuesta = asyncio.run(_post(app, "/registros/analizar-lote", cuerpo, tipo))
+
+    lineas = {linea.get("indice"): linea for linea in _lineas(respuesta)}
+    assert lineas[0]["estado"] == "ok"
+    assert lineas[1]["estado"] == "error"
+    assert lineas[None] == {"resumen": {"total": 2, "ok": 1, "rechazada": 0, "error": 1}}
+
+
+def test_lote_con_inferencia_fallida_termina_con_resumen(app, monkeypatch):
+    monkeypatch.setattr(registros, "get_model", lambda: ModeloFalso(falla=True))
+
+    cuerpo, tipo = _multipart([("a.png", "image/png", _png()), ("b.png", "image/png", _png())])
+    _, respuesta = asyncio.run(_post(app, "/registros/analizar-lote", cuerpo, tipo))
+
+    lineas = _lineas(respuesta)
+    assert all(linea["estado"] == "error" for linea in lineas[:-1])
+    assert lineas[-1] == {"resumen": {"total": 2, "ok": 0, "rechazada": 0, "error": 2}}
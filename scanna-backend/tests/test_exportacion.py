@@ -0,0 +1,84 @@
+"""
+Exportación de registros a CSV
+
+La colección se reemplaza por un cursor en memoria con la misma interfaz
+que usa _lotes (find -> sort -> batch_size -> async for).
+"""
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.core.exportacion import COLUMNAS, exportar_csv, neutralizar_celda
+
+
+class CursorFalso:
+    def __init__(self, documentos):
+        self.documentos = documentos
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def batch_size(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self._iterar()
+
+    async def _iterar(self):
+        for documento in self.documentos:
+            yield documento
+
+
+class ColeccionFalsa:
+    def __init__(self, documentos):
+        self.documentos = documentos
+
+    def find(self, *args, **kwargs):
+        return CursorFalso(self.documentos)
+
+
+class DbFalsa:
+    def __init__(self, documentos):
+        self.registros = ColeccionFalsa(documentos)
+
+
+def _registro(nombre: str) -> dict:
+    return {
+        "_id": ObjectId(),
+        "numeroExpediente": "20250101-0001",
+        "especialistaId": ObjectId(),
+        "paciente": {"nombre": nombre, "edad": 34, "sexo": "Femenino"},
+        "resultado": "Anemia",
+        "analisis": {"confianza": 91.5, "procesadoConIA": True},
+        "fechaAnalisis": datetime(2025, 1, 1, 12, 0)
+    }
+
+
+async def _exportar(documentos) -> list:
+    partes = [bloque async for bloque in exportar_csv(DbFalsa(documentos), {})]
+    texto = b"".join(partes).decode("utf-8").lstrip("\ufeff")
+    return list(csv.reader(io.StringIO(texto)))
+
+
+def test_neutralizar_celda():
+    assert neutralizar_celda('=HYPERLINK("x")') == '\'=HYPERLINK("x")'
+    for prefijo in ("+", "-", "@", "\t", "\r"):
+        assert neutralizar_celda(prefijo + "1") == "'" + prefijo + "1"
+    assert neutralizar_celda("María López") == "María López"
+    assert neutralizar_celda(34) == 34
+    assert neutralizar_celda(None) is None
+
+
+def test_csv_neutraliza_formulas_en_nombres():
+    filas = asyncio.run(_exportar([_registro('=HYPERLINK("http://x","clic")'), _registro("José Núñez")]))
+
+    encabezado, *datos = filas
+    assert encabezado == [nombre for nombre, _ in COLUMNAS]
+    columna = encabezado.index("paciente_nombre")
+    assert datos[0][columna] == '\'=HYPERLINK("http://x","clic")'
+    assert datos[1][columna] == "José Núñez"
+    assert datos[0][encabezado.index("fecha_analisis")] == "2025-01-01T12:00:00"
@@ -0,0 +1,43 @@
+import type { SyntheticEvent } from 'react';
+
+interface AttentionMapImageProps {
+  mapUrl: string;
+  originalUrl?: string;
+  onError?: (e: SyntheticEvent<HTMLImageElement>) => void;
+}
+
+// Los registros nuevos guardan solo la capa de color del mapa (WebP con
+// transparencia); los anteriores guardan la imagen combinada en PNG
+export function isOverlayMap(url: string) {
+  return /\.webp(\?|$)/i.test(url);
+}
+
+export function AttentionMapImage({ mapUrl, originalUrl, onError }: AttentionMapImageProps) {
+  if (isOverlayMap(mapUrl) && originalUrl) {
+    // Superponer la capa sobre la imagen original (mismo encuadre)
+    return (
+      <>
+        <img
+          src={originalUrl}
+          alt="Imagen original"
+          className="w-full h-full object-cover"
+        />
+        <img
+          src={mapUrl}
+          alt="Mapa de atención"
+          className="absolute inset-0 w-full h-full object-cover"
+          onError={onError}
+        />
+      </>
+    );
+  }
+
+  return (
+    <img
+      src={mapUrl}
+      alt="Mapa de atención"
+      className="w-full h-full object-cover"
+      onError={onError}
+    />
+  );
+}
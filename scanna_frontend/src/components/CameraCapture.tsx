@@ -296,7 +296,7 @@ export function CameraCapture({ onBack, onCapture, patientData }: CameraCaptureP
           ? `${API_BASE}/uploads/${response.imagenes.rutaMapaAtencion}`
           : undefined,
         originalImageUrl: response.imagenes.rutaOriginal 
-          ? `${API_BASE}/uploads/${response.imagenes.rutaOriginal}`
+          ? `${API_BASE}/uploads/${response.imagenes.rutaOriginal}?tam=mediano`
           : undefined,
         explanation: response.analisis.aiSummary || 'Análisis completado exitosamente.',
         patientData: response.paciente,
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Search, ChevronRight, Calendar, ArrowLeft, Activity, AlertCircle } from 'lucide-react';
-import { perfilAPI, API_BASE_URL, type EspecialistaEstadisticas } from '../services/api';
+import { perfilAPI, registrosAPI, API_BASE_URL, type EspecialistaEstadisticas } from '../services/api';
+import { AttentionMapImage, isOverlayMap } from './AttentionMapImage';
 
 interface Detection {
   id: string;
@@ -70,7 +71,6 @@ export function History() {
           recordNumber: registro.numeroExpediente || '',
           imageUrl: registro.imagenes?.rutaOriginal,
           attentionMapUrl: registro.imagenes?.rutaMapaAtencion,
-          summary: registro.analisis?.aiSummary,
           confidence: '95%'
         };
       });
@@ -84,6 +84,21 @@ export function History() {
     }
   };
 
+  // Los listados no incluyen el resumen de IA: se carga al abrir el detalle
+  const selectDetection = async (detection: Detection) => {
+    setSelectedDetection(detection);
+    try {
+      const registro = await registrosAPI.obtenerPorId(detection.id);
+      setSelectedDetection((actual) =>
+        actual?.id === detection.id
+          ? { ...actual, summary: registro.analisis?.aiSummary }
+          : actual
+      );
+    } catch (err) {
+      console.error('Error fetching detection detail:', err);
+    }
+  };
+
   const filteredDetections = allDetections.filter((detection) => {
     const matchesSearch = searchQuery === '' || 
       detection.patientName.toLowerCase().includes(searchQuery.toLowerCase()) ||
@@ -142,8 +157,11 @@ export function History() {
   }
 
   if (selectedDetection) {
-    const imageUrl = selectedDetection.imageUrl ? `${API_BASE_URL}/uploads/${selectedDetection.imageUrl}` : undefined;
-    const attentionMapUrl = selectedDetection.attentionMapUrl ? `${API_BASE_URL}/uploads/${selectedDetection.attentionMapUrl}` : undefined;
+    // Derivado WebP de tamaño medio: suficiente para el detalle y mucho más ligero que el original
+    const imageUrl = selectedDetection.imageUrl ? `${API_BASE_URL}/uploads/${selectedDetection.imageUrl}?tam=mediano` : undefined;
+    // El overlay del mapa ya está reducido: se pide tal cual
+    const mapPath = selectedDetection.attentionMapUrl;
+    const attentionMapUrl = mapPath ? `${API_BASE_URL}/uploads/${mapPath}${isOverlayMap(mapPath) ? '' : '?tam=mediano'}` : undefined;
 
     return (
       <div className="p-4 sm:p-6 lg:p-8 h-full overflow-auto">
@@ -205,10 +223,9 @@ export function History() {
             <div className="mb-6">
               <h2 className="text-lg tracking-tight text-gray-900 mb-3 ml-1">Mapa de Atención</h2>
               <div className="relative rounded-[28px] overflow-hidden bg-gray-100 aspect-video shadow-sm border border-gray-200">
-                <img 
-                  src={attentionMapUrl}
-                  alt="Mapa de atención" 
-                  className="w-full h-full object-cover"
+                <AttentionMapImage
+                  mapUrl={attentionMapUrl}
+                  originalUrl={imageUrl}
                   onError={(e) => {
                     if (imageUrl) {
                       e.currentTarget.src = imageUrl;
@@ -321,7 +338,7 @@ export function History() {
           {filteredDetections.map((detection) => (
             <button
               key={detection.id}
-              onClick={() => setSelectedDetection(detection)}
+              onClick={() => selectDetection(detection)}
               className="w-full bg-white rounded-[18px] lg:rounded-[20px] p-4 lg:p-5 border border-gray-200 shadow-sm hover:shadow-md transition-all text-left"
             >
               <div className="flex items-center justify-between mb-3">
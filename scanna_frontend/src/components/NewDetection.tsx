@@ -2,6 +2,7 @@ import { useState, useRef } from 'react';
 import { ArrowLeft, Camera, Upload, Loader2 } from 'lucide-react';
 import { CameraCapture } from './CameraCapture';
 import { ImageQualityErrorModal } from './ImageQualityErrorModal'; // ✅ NUEVO
+import { AttentionMapImage } from './AttentionMapImage';
 import { registrosAPI, API_BASE_URL } from '../services/api';
 
 interface NewDetectionProps {
@@ -13,6 +14,7 @@ interface DetectionResult {
   status: 'normal' | 'warning' | 'alert';
   confidence: number;
   attentionMapUrl?: string;
+  originalImageUrl?: string;
   explanation?: string;
 }
 
@@ -150,6 +152,9 @@ export function NewDetection({ onClose }: NewDetectionProps) {
         attentionMapUrl: response.imagenes.rutaMapaAtencion 
           ? `${API_BASE}/uploads/${response.imagenes.rutaMapaAtencion}`
           : undefined,
+        originalImageUrl: response.imagenes.rutaOriginal 
+          ? `${API_BASE}/uploads/${response.imagenes.rutaOriginal}?tam=mediano`
+          : undefined,
         explanation: response.analisis.aiSummary || 'Análisis completado exitosamente.'
       };
 
@@ -295,10 +300,9 @@ export function NewDetection({ onClose }: NewDetectionProps) {
             <div className="mb-6">
               <h2 className="text-lg tracking-tight text-gray-900 mb-3 ml-1">Mapa de Atención</h2>
               <div className="relative rounded-[28px] overflow-hidden bg-gray-100 aspect-video shadow-sm border border-gray-200">
-                <img 
-                  src={detectionResult.attentionMapUrl} 
-                  alt="Mapa de atención" 
-                  className="w-full h-full object-cover"
+                <AttentionMapImage
+                  mapUrl={detectionResult.attentionMapUrl}
+                  originalUrl={detectionResult.originalImageUrl}
                   onError={(e) => {
                     console.error('❌ Error al cargar mapa de atención:', detectionResult.attentionMapUrl);
                     e.currentTarget.style.display = 'none';
@@ -241,9 +241,9 @@ export const dashboardAPI = {
     return await response.json();
   },
 
-  async getTendencias(dias: number = 30) {
+  async getTendencias(dias: number = 30, granularidad: 'dia' | 'semana' | 'mes' = 'dia') {
     const response = await fetch(
-      `${API_BASE_URL}/dashboard/tendencias?dias=${dias}`,
+      `${API_BASE_URL}/dashboard/tendencias?dias=${dias}&granularidad=${granularidad}`,
       {
         method: 'GET',
         headers: getAuthHeaders(),